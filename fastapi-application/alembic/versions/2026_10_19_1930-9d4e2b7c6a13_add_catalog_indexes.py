@@ -0,0 +1,90 @@
+"""add catalog indexes
+
+Revision ID: 9d4e2b7c6a13
+Revises: c5d19e3a7b60
+Create Date: 2026-10-19 19:30:12.408113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d4e2b7c6a13"
+down_revision: Union[str, None] = "c5d19e3a7b60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, extra kwargs)
+INDEXES = [
+    (
+        "ix_products_listing",
+        "products",
+        ["category_id", "brand_id", "created_at"],
+        {"postgresql_where": sa.text("active")},
+    ),
+    ("ix_products_brand_id", "products", ["brand_id"], {}),
+    (
+        "ix_product_variations_listing",
+        "product_variations",
+        ["product_id", "active", "quantity", "price"],
+        {},
+    ),
+    (
+        "ix_product_properties_name_value_variation_id",
+        "product_properties",
+        ["name", "value", "variation_id"],
+        {},
+    ),
+    ("ix_user_favorites_product_id", "user_favorites", ["product_id"], {}),
+    ("ix_banner_products_product_id", "banner_products", ["product_id"], {}),
+    ("ix_carts_user_id", "carts", ["user_id"], {}),
+    (
+        "ix_cart_products_cart_id_product_variation_id",
+        "cart_products",
+        ["cart_id", "product_variation_id"],
+        {},
+    ),
+    (
+        "ix_cart_products_product_variation_id",
+        "cart_products",
+        ["product_variation_id"],
+        {},
+    ),
+    (
+        "ix_cart_products_parent_cart_product_id",
+        "cart_products",
+        ["parent_cart_product_id"],
+        {},
+    ),
+]
+
+
+def upgrade() -> None:
+    # Tables are live during deploy: build without blocking writes
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
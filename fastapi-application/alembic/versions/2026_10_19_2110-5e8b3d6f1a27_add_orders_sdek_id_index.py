@@ -0,0 +1,41 @@
+"""add orders sdek_id index
+
+Revision ID: 5e8b3d6f1a27
+Revises: 2c7f1a9e5b38
+Create Date: 2026-10-19 21:10:43.215870
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e8b3d6f1a27"
+down_revision: Union[str, None] = "2c7f1a9e5b38"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # orders is live during deploy: build without blocking writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_orders_sdek_id"),
+            "orders",
+            ["sdek_id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_orders_sdek_id"),
+            table_name="orders",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
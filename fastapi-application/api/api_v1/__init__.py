@@ -20,6 +20,7 @@ from .banners import router as banner_router
 from .payments import router as payments_router
 from .properties import router as properties_router
 from .delivery import router as delivery_router
+from .diagnostics import router as diagnostics_router
 
 
 http_bearer = HTTPBearer(auto_error=False)
@@ -41,4 +42,5 @@ router.include_router(uds_router)
 router.include_router(payments_router)
 router.include_router(help_form_router)
 router.include_router(banner_router)
+router.include_router(diagnostics_router)
 # router.include_router(messages_router)
@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
+from core.request_timing import TimedRoute
 from core.models import Category, db_helper
 from core.schemas.banner import BannerRead
 from core.schemas.category import GroupRead, CategoryRead
@@ -14,12 +15,13 @@ from services.categories import CategoryService
 router = APIRouter(
     prefix=settings.api.v1.banners,
     tags=["Banners"],
+    route_class=TimedRoute,
 )
 
 
 @router.get("", response_model=list[BannerRead])
 async def get_banners(
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    session: Annotated[AsyncSession, Depends(db_helper.read_session_getter)],
     accept_language: str = Header("ru")
 ) -> list[GroupRead]:
     service = BannerService(session)
@@ -31,7 +33,7 @@ async def get_banners(
 @router.get("/{banner_id}", response_model=BannerRead)
 async def get_banner(
     banner_id: int,
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    session: Annotated[AsyncSession, Depends(db_helper.read_session_getter)],
 ) -> Category:
     service = BannerService(session)
     return await service.get_banner(banner_id)
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
+from core.request_timing import TimedRoute
 from core.models import db_helper
 from core.schemas.brand import BrandRead
 from services.brands import BrandService
@@ -11,12 +12,13 @@ from services.brands import BrandService
 router = APIRouter(
     prefix=settings.api.v1.brands,
     tags=["Brands"],
+    route_class=TimedRoute,
 )
 
 
 @router.get("/", response_model=list[BrandRead])
 async def get_brands(
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)]
+    session: Annotated[AsyncSession, Depends(db_helper.read_session_getter)]
 ):
     service = BrandService(session)
 
@@ -25,7 +27,7 @@ async def get_brands(
 
 @router.get("/random_list", response_model=list[BrandRead])
 async def get_random_brands_list(
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    session: Annotated[AsyncSession, Depends(db_helper.read_session_getter)],
     count: int = Query(20, ge=1, le=100),
 ):
     service = BrandService(session)
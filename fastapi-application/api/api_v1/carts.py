@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.api_v1.fastapi_users import current_active_user
 from core.config import settings
+from core.request_timing import TimedRoute
 from core.models import db_helper, User
 from core.schemas.cart import CartRead, CartAddProductSchema, CartRemoveProductSchema
 from services.carts import CartService
@@ -12,6 +13,7 @@ from services.carts import CartService
 router = APIRouter(
     prefix=settings.api.v1.carts,
     tags=["Carts"],
+    route_class=TimedRoute,
 )
 
 
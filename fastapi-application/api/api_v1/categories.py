@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
+from core.request_timing import TimedRoute
 from core.models import Category, db_helper
 from core.schemas.category import GroupRead, CategoryRead
 from services.categories import CategoryService
@@ -11,12 +12,13 @@ from services.categories import CategoryService
 router = APIRouter(
     prefix=settings.api.v1.categories,
     tags=["Categories"],
+    route_class=TimedRoute,
 )
 
 
 @router.get("", response_model=list[GroupRead])
 async def get_categories(
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    session: Annotated[AsyncSession, Depends(db_helper.read_session_getter)],
     accept_language: str = Header("ru")
 ) -> list[GroupRead]:
     service = CategoryService(session)
@@ -28,7 +30,7 @@ async def get_categories(
 @router.get("/{category_id}", response_model=CategoryRead)
 async def get_category(
     category_id: int,
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    session: Annotated[AsyncSession, Depends(db_helper.read_session_getter)],
 ) -> Category:
     service = CategoryService(session)
     return await service.get_category(category_id)
@@ -1,29 +1,30 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import FastAPI, Query
-import httpx
-from fastapi.responses import JSONResponse
+from fastapi import Query
 
+from api.dependencies.http_sessions import get_http_sessions
 from core.config import settings
-from core.models import Category, db_helper
-from core.schemas.category import GroupRead, CategoryRead
-from services.categories import CategoryService
+from core.request_timing import TimedRoute
+from core.http_sessions import HttpSessionRegistry
+from core.models import db_helper
 from services.delivery import DeliveryService
 
 router = APIRouter(
     prefix=settings.api.v1.delivery,
     tags=["Delivery"],
+    route_class=TimedRoute,
 )
 
 
 @router.get("/{order_id}", response_model=None)
 async def get_order(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    http_sessions: Annotated[HttpSessionRegistry, Depends(get_http_sessions)],
     order_id: str,
-) -> list[GroupRead]:
-    service = DeliveryService(session, settings.redis.url, settings.sdek_config.client_id, settings.sdek_config.client_secret)
+) -> dict:
+    service = DeliveryService(session, settings.sdek_config.client_id, settings.sdek_config.client_secret, http_sessions.cdek)
     return await service.get_status(order_id)
 
 
@@ -33,11 +34,12 @@ async def get_order(
 
 @router.get("/cdek/cities")
 async def fetch_cities(
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    session: Annotated[AsyncSession, Depends(db_helper.read_session_getter)],
+    http_sessions: Annotated[HttpSessionRegistry, Depends(get_http_sessions)],
     name: str = Query(...),
     country_code: str = Query("RU"),
 ):
-    service = DeliveryService(session, settings.redis.url, settings.sdek_config.client_id, settings.sdek_config.client_secret)
+    service = DeliveryService(session, settings.sdek_config.client_id, settings.sdek_config.client_secret, http_sessions.cdek)
     cities = await service.get_cities(name=name, country_code=country_code)
     return cities
 
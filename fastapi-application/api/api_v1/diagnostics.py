@@ -0,0 +1,61 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+
+from api.api_v1.fastapi_users import current_active_superuser
+from core.authentication.password import password_helper
+from core.config import settings
+from core.loop_monitor import loop_monitor
+from core.models import User, db_helper
+from core.schemas.diagnostics import (
+    LoopMonitorRead,
+    PasswordHashingRead,
+    QueryCacheRead,
+)
+
+router = APIRouter(
+    prefix=settings.api.v1.diagnostics,
+    tags=["Diagnostics"],
+)
+
+
+@router.get("/loop-blocks", response_model=LoopMonitorRead)
+async def get_loop_blocks(
+    user: Annotated[User, Depends(current_active_superuser)],
+):
+    return LoopMonitorRead(
+        enabled=loop_monitor.running,
+        threshold_ms=loop_monitor.config.threshold_ms,
+        blocks=loop_monitor.snapshot(),
+    )
+
+
+@router.delete("/loop-blocks", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_loop_blocks(
+    user: Annotated[User, Depends(current_active_superuser)],
+):
+    loop_monitor.reset()
+
+
+@router.get("/query-cache", response_model=QueryCacheRead)
+async def get_query_cache_stats(
+    user: Annotated[User, Depends(current_active_superuser)],
+):
+    return db_helper.cache_stats.as_dict()
+
+
+@router.delete("/query-cache", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_query_cache_stats(
+    user: Annotated[User, Depends(current_active_superuser)],
+):
+    db_helper.cache_stats.reset()
+
+
+@router.get("/password-hashing", response_model=PasswordHashingRead)
+async def get_password_hashing_stats(
+    user: Annotated[User, Depends(current_active_superuser)],
+):
+    return {
+        "workers": password_helper.max_workers,
+        **password_helper.stats.as_dict(),
+    }
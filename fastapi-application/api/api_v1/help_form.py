@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
+from core.request_timing import TimedRoute
 from core.models import Category, db_helper
 from core.schemas.helpl_form import HelpForm
 from core.tasks.help_form import send_help_form_email
@@ -12,6 +13,7 @@ from utils.email_sender import send_email
 router = APIRouter(
     prefix=settings.api.v1.help_form,
     tags=["Help"],
+    route_class=TimedRoute,
 )
 
 
@@ -6,12 +6,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.api_v1.fastapi_users import current_active_user
 from core.config import settings
+from core.request_timing import TimedRoute
 from core.models import db_helper, User
+from core.schemas.base import KeysetPagination
 from core.schemas.order import (
     OrderRead,
     OrderCreate,
     OrderUDSDiscountSchema,
     OrderProductReadWithOrderId,
+    OrderHistoryPage,
+    OrderProductHistoryPage,
 )
 from services.delivery import DeliveryService
 from services.orders import OrderService
@@ -19,6 +23,7 @@ from services.orders import OrderService
 router = APIRouter(
     prefix=settings.api.v1.orders,
     tags=["Orders"],
+    route_class=TimedRoute,
 )
 
 
@@ -27,10 +32,30 @@ async def get_orders(
     user: Annotated[
         User,
         Depends(current_active_user),
-    ]
+    ],
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    service = OrderService(session)
+
+    return await service.get_orders(user)
+
+
+@router.get("/history", response_model=OrderHistoryPage)
+async def get_order_history(
+    user: Annotated[
+        User,
+        Depends(current_active_user),
+    ],
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    pagination: KeysetPagination = Depends(KeysetPagination),
 ):
+    """
+    Order summaries, newest first.
+    Pass `next_cursor` of the response as `cursor` to get the next page.
+    """
+    service = OrderService(session)
 
-    return user.orders
+    return await service.get_order_history(user, pagination)
 
 
 @router.get("/order_products", response_model=List[OrderProductReadWithOrderId])
@@ -46,6 +71,23 @@ async def get_order_products_by_user(
     return await service.get_order_products_by_user(user)
 
 
+@router.get(
+    "/order_products/history",
+    response_model=OrderProductHistoryPage,
+)
+async def get_order_products_history(
+    user: Annotated[
+        User,
+        Depends(current_active_user),
+    ],
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    pagination: KeysetPagination = Depends(KeysetPagination),
+):
+    service = OrderService(session)
+
+    return await service.get_order_products_history(user, pagination)
+
+
 @router.post("/create_from_cart", response_model=OrderRead)
 async def create_order_from_cart(
     user: Annotated[
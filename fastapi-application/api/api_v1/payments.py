@@ -1,21 +1,21 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Request, BackgroundTasks, Body
-from loguru import logger
+from fastapi import APIRouter, Depends, Request, Body
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.api_v1.fastapi_users import current_active_user
+from api.dependencies.http_sessions import get_http_sessions
 from core.config import settings
+from core.request_timing import TimedRoute
+from core.http_sessions import HttpSessionRegistry
 from core.models import db_helper, User
-from core.models.order import OrderStatus
-from core.schemas.payments import PaymentSignature, PaymentResult
-from services.delivery import DeliveryService
-from services.orders import OrderService
+from core.schemas.payments import PaymentSignature
 from services.payments import PaymentsService
 
 router = APIRouter(
     prefix=settings.api.v1.payments,
     tags=["Payments"],
+    route_class=TimedRoute,
 )
 
 
@@ -27,6 +27,7 @@ async def generate_signature(
     request: Request,
     user: Annotated[User, Depends(current_active_user)],
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    http_sessions: Annotated[HttpSessionRegistry, Depends(get_http_sessions)],
 ):
     """
         Generate signature for FreedomPay payment
@@ -48,7 +49,7 @@ async def generate_signature(
         ```
         """
 
-    service = PaymentsService(session)
+    service = PaymentsService(session, http_sessions)
 
     return await service.generate_signature(user, dict(request.query_params))
 
@@ -57,37 +58,21 @@ async def generate_signature(
 async def result_url(
         request: Request,
         session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
-        background_tasks: BackgroundTasks,
+        http_sessions: Annotated[HttpSessionRegistry, Depends(get_http_sessions)],
 ):
-    service = PaymentsService(session)
-    order_service = OrderService(session)
+    service = PaymentsService(session, http_sessions)
     data = await request.form()
-    result = await service.result_url_handler(data, background_tasks)
-    try:
-        payment_data = PaymentResult(**data)
-        order = await order_service._get_order(
-            int(payment_data.pg_order_id)
-        )
-        if order.status == OrderStatus.paid:
-            sdek_service = DeliveryService(
-                session,
-                settings.redis.url,
-                settings.sdek_config.client_id,
-                settings.sdek_config.client_secret,
-            )
-            await sdek_service.create_order(order)
-    except Exception as e:
-        logger.error(e)
 
-    return result
+    return await service.result_url_handler(data)
 
 
 @router.post("/get_payment_url")
 async def get_payment_url(
         user: Annotated[User, Depends(current_active_user)],
         session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+        http_sessions: Annotated[HttpSessionRegistry, Depends(get_http_sessions)],
         order_id: int = Body(..., embed=True),
 ):
-    service = PaymentsService(session)
+    service = PaymentsService(session, http_sessions)
 
     return await service.get_payment_url(user, order_id)
\ No newline at end of file
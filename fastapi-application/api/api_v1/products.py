@@ -6,6 +6,7 @@ from api.api_v1.fastapi_users import current_active_user, current_active_user_op
 from api.dependencies.pagination import Pagination
 from api.dependencies.product.ordering import Ordering
 from core.config import settings
+from core.request_timing import TimedRoute
 from core.filters.products import ProductFilter, ProductFilterRequest
 from core.models import db_helper, User
 from core.schemas.product import ProductRead, ProductResponseWithPagination
@@ -14,6 +15,7 @@ from services.products import ProductService
 router = APIRouter(
     prefix=settings.api.v1.products,
     tags=["Products"],
+    route_class=TimedRoute,
 )
 
 
@@ -23,7 +25,7 @@ async def get_products(
     product_filter: ProductFilter = FilterDepends(ProductFilter),
     order_by: Ordering = Depends(Ordering),
     pagination: Pagination = Depends(Pagination),
-    session: AsyncSession = Depends(db_helper.session_getter),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
 ) -> list[ProductRead]:
     properties = product_filter_request.properties
     service = ProductService(session)
@@ -36,7 +38,7 @@ async def get_products(
 
 @router.get("/new", response_model=ProductResponseWithPagination)
 async def get_new_products(
-    session: AsyncSession = Depends(db_helper.session_getter),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
     pagination: Pagination = Depends(Pagination),
 ) -> list[ProductRead]:
     service = ProductService(session)
@@ -46,7 +48,7 @@ async def get_new_products(
 
 @router.get("/bestselling", response_model=ProductResponseWithPagination)
 async def get_bestselling_products(
-    session: AsyncSession = Depends(db_helper.session_getter),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
     pagination: Pagination = Depends(Pagination),
 ) -> list[ProductRead]:
     service = ProductService(session)
@@ -57,7 +59,7 @@ async def get_bestselling_products(
 @router.get("/favorites/list", response_model=ProductResponseWithPagination)
 async def get_favorite_products(
     user: User = Depends(current_active_user),
-    session: AsyncSession = Depends(db_helper.session_getter),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
     pagination: Pagination = Depends(Pagination),
 ) -> list[ProductRead]:
     service = ProductService(session)
@@ -91,7 +93,7 @@ async def unset_favorite_product(
 async def get_product(
     product_id: int,
     user: User = Depends(current_active_user_optional),
-    session: AsyncSession = Depends(db_helper.session_getter),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
 ) -> ProductRead:
     service = ProductService(session)
 
@@ -8,6 +8,7 @@ from api.api_v1.fastapi_users import current_active_user
 from api.dependencies.pagination import Pagination
 from api.dependencies.product.ordering import Ordering
 from core.config import settings
+from core.request_timing import TimedRoute
 from core.filters.products import ProductFilter, ProductFilterRequest
 from core.models import db_helper, User
 from core.schemas.product import ProductRead, ProductPropertyRead
@@ -16,12 +17,13 @@ from services.products import ProductService
 router = APIRouter(
     prefix=settings.api.v1.products,
     tags=["properties"],
+    route_class=TimedRoute,
 )
 
 
 @router.get("/properties", response_model=list[ProductPropertyRead])
 async def get_properties(
-    session: AsyncSession = Depends(db_helper.session_getter),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
 ) -> list[ProductPropertyRead]:
     service = ProductService(session)
     properties = await service.get_properties()
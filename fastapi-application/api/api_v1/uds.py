@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.api_v1.fastapi_users import current_active_user
 from core.config import settings
+from core.request_timing import TimedRoute
 from core.models import db_helper, User
 from core.schemas.uds import UDSDataRead
 from services.uds import UDSService
@@ -12,6 +13,7 @@ from services.uds import UDSService
 router = APIRouter(
     prefix=settings.api.v1.uds,
     tags=["UDS"],
+    route_class=TimedRoute,
 )
 
 
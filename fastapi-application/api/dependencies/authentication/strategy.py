@@ -4,10 +4,12 @@ from typing import (
 )
 
 from fastapi import Depends
-from fastapi_users.authentication.strategy.db import (
-    DatabaseStrategy,
-)
+from fastapi_users.authentication import Strategy
 
+from core.authentication.strategy import (
+    CachedDatabaseStrategy,
+    get_jwt_strategy,
+)
 from core.config import settings
 from .access_tokens import get_access_tokens_db
 
@@ -21,8 +23,11 @@ def get_database_strategy(
         "AccessTokenDatabase[AccessToken]",
         Depends(get_access_tokens_db),
     ],
-) -> DatabaseStrategy:
-    return DatabaseStrategy(
+) -> Strategy:
+    if settings.access_token.strategy == "jwt":
+        return get_jwt_strategy()
+
+    return CachedDatabaseStrategy(
         database=access_tokens_db,
         lifetime_seconds=settings.access_token.lifetime_seconds,
     )
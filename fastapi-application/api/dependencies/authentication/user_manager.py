@@ -2,6 +2,7 @@ from typing import Annotated, TYPE_CHECKING
 
 from fastapi import Depends
 
+from core.authentication.password import password_helper
 from core.authentication.user_manager import UserManager
 
 from .users import get_users_db
@@ -16,4 +17,4 @@ async def get_user_manager(
         Depends(get_users_db),
     ]
 ):
-    yield UserManager(users_db)
+    yield UserManager(users_db, password_helper)
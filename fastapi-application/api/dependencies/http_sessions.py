@@ -0,0 +1,5 @@
+from core.http_sessions import HttpSessionRegistry, http_sessions
+
+
+def get_http_sessions() -> HttpSessionRegistry:
+    return http_sessions
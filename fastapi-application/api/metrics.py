@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from core.metrics import render
+
+router = APIRouter(include_in_schema=False)
+
+
+@router.get("/metrics")
+def get_metrics():
+    return Response(render(), media_type=CONTENT_TYPE_LATEST)
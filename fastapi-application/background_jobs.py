@@ -0,0 +1,91 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from core.config import settings
+from core import metrics
+from core.http_sessions import http_sessions
+from core.models import db_helper
+from core.redis_helper import redis_helper
+from services.delivery import DeliveryService
+from services.outbox import OutboxWorker
+from services.outbox_handlers import OUTBOX_BATCH_HANDLERS, OUTBOX_HANDLERS
+
+
+async def refresh_cdek_cities():
+    for country_code in settings.sdek_config.cities_country_codes:
+        async with db_helper.session_factory() as session:
+            service = DeliveryService(
+                session,
+                settings.sdek_config.client_id,
+                settings.sdek_config.client_secret,
+                http_sessions.cdek,
+            )
+            count = await service.refresh_cities(country_code)
+
+        logger.info(f"CDEK cities refreshed: {country_code} | {count}")
+
+
+async def refresh_shipment_statuses():
+    async with db_helper.session_factory() as session:
+        service = DeliveryService(
+            session,
+            settings.sdek_config.client_id,
+            settings.sdek_config.client_secret,
+            http_sessions.cdek,
+        )
+        count = await service.refresh_shipment_statuses()
+
+    logger.info(f"Shipment statuses refreshed: {count}")
+
+
+async def write_metrics():
+    metrics.write_textfile("background_jobs")
+
+
+async def run_periodically(
+    job: Callable[[], Awaitable[None]],
+    interval_seconds: float,
+):
+    while True:
+        try:
+            await job()
+        except Exception as e:
+            logger.exception(e)
+
+        await asyncio.sleep(interval_seconds)
+
+
+async def main():
+    outbox_worker = OutboxWorker(
+        db_helper.session_factory,
+        OUTBOX_HANDLERS,
+        settings.outbox,
+        batch_handlers=OUTBOX_BATCH_HANDLERS,
+    )
+
+    try:
+        await asyncio.gather(
+            outbox_worker.run(),
+            run_periodically(
+                refresh_cdek_cities,
+                settings.sdek_config.cities_refresh_interval_seconds,
+            ),
+            run_periodically(
+                refresh_shipment_statuses,
+                settings.sdek_config.shipment_poll_interval_seconds,
+            ),
+            run_periodically(
+                write_metrics,
+                settings.metrics.textfile_interval_seconds,
+            ),
+        )
+    finally:
+        await http_sessions.close()
+        await redis_helper.dispose()
+        await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,244 @@
+"""
+Local fake of the 1C HTTP service.
+
+Serves brands, categories (groups with subcategories and properties),
+products per group and order creation in the formats services/driver_1c.py
+parses. Data is generated from a seed or loaded from a fixtures file, so
+import runs can be compared on exactly the same catalog.
+
+    python -m benchmarks.fakes.one_c --port 8082 --products 20000 \\
+        --latency-ms 200 --error-rate 0.01
+
+and point the importer at it:
+
+    APP_CONFIG__CONFIG_1C__BRANDS_URL=http://127.0.0.1:8082/brands
+    APP_CONFIG__CONFIG_1C__CATEGORIES_URL=http://127.0.0.1:8082/categories
+    APP_CONFIG__CONFIG_1C__PRODUCTS_URL=http://127.0.0.1:8082/products
+    APP_CONFIG__CONFIG_1C__ORDER_CREATE_URL=http://127.0.0.1:8082/orders
+    APP_CONFIG__CONFIG_1C__ORDER_BATCH_CREATE_URL=http://127.0.0.1:8082/orders/batch
+
+Fixtures use the 1C snapshot format of services/snapshots_1c.py (JSON,
+gzip if the name ends with .gz), so a snapshot recorded by the importer in
+production can be served as is. `--save-fixtures` writes generated data in
+this format.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+from pathlib import Path
+
+from aiohttp import web
+
+from benchmarks.catalog import PROPERTY_VALUES, TITLE_WORDS, CatalogSize
+from services.snapshots_1c import load_snapshot, write_snapshot
+
+
+def generate_fixtures(size: CatalogSize, seed: int = 1) -> dict:
+    rnd = random.Random(seed)
+
+    brands = [
+        {
+            "id": f"fake-b-{i}",
+            "name": f"Бренд {i}",
+            "image": f"https://example.com/brands/{i}.png",
+        }
+        for i in range(size.brands)
+    ]
+
+    groups = [
+        {"id": f"fake-g-{i}", "name": f"Группа {i}", "subcategories": []}
+        for i in range(size.groups)
+    ]
+    for i in range(size.categories):
+        rnd.choice(groups)["subcategories"].append(
+            {
+                "id": f"fake-c-{i}",
+                "name": f"Категория {i}",
+                "properties": [
+                    {"id": f"fake-cp-{i}-{n}", "name": name, "values": values}
+                    for n, (name, values) in enumerate(PROPERTY_VALUES.items())
+                ],
+            }
+        )
+    # 1C отдаёт группы и без подкатегорий, пропускать их должен импорт
+    groups = [group for group in groups if group["subcategories"]]
+
+    products = {group["name"]: {"data": []} for group in groups}
+    for i in range(size.products):
+        group = rnd.choice(groups)
+        category = rnd.choice(group["subcategories"])
+        variations = []
+        for n in range(rnd.randint(1, size.max_variations)):
+            variations.append(
+                {
+                    "code_1c": f"fake-v-{i}-{n}",
+                    "name": f"Вариант {n}",
+                    "quantity": str(rnd.choice([0, 0, 1, 3, 10, 50])),
+                    "price": rnd.randint(3, 300) * 100,
+                    "salequantity": str(rnd.randint(0, 500)),
+                    "properties": [
+                        {
+                            "id": f"fake-pp-{name}",
+                            "name": name,
+                            "value": rnd.choice(PROPERTY_VALUES[name]),
+                        }
+                        for name in rnd.sample(
+                            list(PROPERTY_VALUES), size.variation_properties
+                        )
+                    ],
+                    "images": [
+                        {
+                            "path": f"https://example.com/variations/{i}-{n}.jpg",
+                            "main": True,
+                        }
+                    ],
+                }
+            )
+        products[group["name"]]["data"].append(
+            {
+                "code_1c": f"fake-p-{i}",
+                "title": " ".join(rnd.sample(TITLE_WORDS, 3)) + f" {i}",
+                "description": "Описание товара",
+                "usingmethod": "Способ применения",
+                "composition": "Состав",
+                "brand": rnd.choice(brands)["name"],
+                "category": category["id"],
+                "images": [
+                    {"path": f"https://example.com/products/{i}.jpg", "main": True}
+                ],
+                "variations": variations,
+            }
+        )
+
+    return {
+        "brands": {"data": brands},
+        "categories": {"data": groups},
+        "products": products,
+    }
+
+
+def create_app(
+    fixtures: dict,
+    latency_ms: float = 0,
+    jitter_ms: float = 0,
+    error_rate: float = 0,
+) -> web.Application:
+    order_numbers = itertools.count(1)
+    stats = {"requests": 0, "errors": 0}
+    # Ответы сериализуются один раз: сервер не должен сам стать узким местом
+    empty = json.dumps({"data": []})
+    # Снимок неудачного цикла может быть неполным
+    bodies = {
+        "brands": json.dumps(fixtures.get("brands"), ensure_ascii=False),
+        "categories": json.dumps(fixtures.get("categories"), ensure_ascii=False),
+        "products": {
+            name: json.dumps(data, ensure_ascii=False)
+            for name, data in fixtures.get("products", {}).items()
+        },
+    }
+
+    @web.middleware
+    async def chaos(request: web.Request, handler):
+        if request.path == "/_stats":
+            return await handler(request)
+        stats["requests"] += 1
+        delay = latency_ms + random.uniform(0, jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if error_rate and random.random() < error_rate:
+            stats["errors"] += 1
+            return web.Response(text="Fake 1C failure", status=500)
+        return await handler(request)
+
+    def json_response(body: str) -> web.Response:
+        return web.Response(text=body, content_type="application/json")
+
+    async def get_brands(request: web.Request) -> web.Response:
+        return json_response(bodies["brands"])
+
+    async def get_categories(request: web.Request) -> web.Response:
+        return json_response(bodies["categories"])
+
+    async def get_products(request: web.Request) -> web.Response:
+        data = await request.json()
+        return json_response(
+            bodies["products"].get(data.get("category"), empty)
+        )
+
+    async def create_order(request: web.Request) -> web.Response:
+        await request.json()
+        return web.json_response({"OrderNumber": f"FAKE-{next(order_numbers)}"})
+
+    async def create_orders(request: web.Request) -> web.Response:
+        data = await request.json()
+        return web.json_response(
+            {
+                "orders": [
+                    {
+                        "order_id": order["order_id"],
+                        "OrderNumber": f"FAKE-{next(order_numbers)}",
+                    }
+                    for order in data["orders"]
+                ]
+            }
+        )
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application(middlewares=[chaos], client_max_size=64 * 1024**2)
+    app.router.add_get("/brands", get_brands)
+    app.router.add_get("/categories", get_categories)
+    app.router.add_post("/products", get_products)
+    app.router.add_post("/orders", create_order)
+    app.router.add_post("/orders/batch", create_orders)
+    app.router.add_get("/_stats", get_stats)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake 1C HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--fixtures", type=Path, help="Serve data from a file")
+    parser.add_argument("--save-fixtures", type=Path)
+    parser.add_argument("--products", type=int, default=CatalogSize.products)
+    parser.add_argument("--categories", type=int, default=CatalogSize.categories)
+    parser.add_argument("--brands", type=int, default=CatalogSize.brands)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        fixtures = load_snapshot(args.fixtures)
+    else:
+        fixtures = generate_fixtures(
+            CatalogSize(
+                products=args.products,
+                categories=args.categories,
+                brands=args.brands,
+            ),
+            seed=args.seed,
+        )
+
+    if args.save_fixtures:
+        write_snapshot(fixtures, args.save_fixtures)
+
+    web.run_app(
+        create_app(
+            fixtures,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Local fake of the UDS partner API.
+
+Serves the endpoints used by services/uds.py with configurable latency and
+failure rate, so the client (timeouts, retries, circuit breaker) can be
+exercised without touching the real UDS.
+
+    python -m benchmarks.fakes.uds --port 8081 --latency-ms 50 --error-rate 0.1
+
+and point the app at it:
+
+    APP_CONFIG__UDS_CONFIG__UDS_CUSTOMER_FIND_URL=http://127.0.0.1:8081/partner/v2/customers/find
+    APP_CONFIG__UDS_CONFIG__UDS_TRANSACTION_CALC_URL=http://127.0.0.1:8081/partner/v2/operations/calc
+    APP_CONFIG__UDS_CONFIG__UDS_TRANSACTION_CREATE_URL=http://127.0.0.1:8081/partner/v2/operations
+    APP_CONFIG__UDS_CONFIG__UDS_TRANSACTION_REFUND_URL=http://127.0.0.1:8081/partner/v2/operations/{transaction_id}/refund
+
+Code "000000" is treated as unknown and answers 404 like the real API.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+from datetime import datetime
+
+from aiohttp import web
+
+UNKNOWN_CODE = "000000"
+
+
+def create_app(
+    latency_ms: float = 0,
+    error_rate: float = 0,
+    points: float = 500,
+) -> web.Application:
+    transaction_ids = itertools.count(1)
+    stats = {"requests": 0, "errors": 0}
+
+    @web.middleware
+    async def chaos(request: web.Request, handler):
+        if request.path == "/_stats":
+            return await handler(request)
+        stats["requests"] += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if error_rate and random.random() < error_rate:
+            stats["errors"] += 1
+            return web.json_response(
+                {"errorCode": "internalError", "message": "Fake failure"},
+                status=503,
+            )
+        return await handler(request)
+
+    def not_found(code: str) -> web.Response:
+        return web.json_response(
+            {"errorCode": "notFound", "message": f"Customer {code} not found"},
+            status=404,
+        )
+
+    async def customers_find(request: web.Request) -> web.Response:
+        code = request.query.get("code", "")
+        if code == UNKNOWN_CODE:
+            return not_found(code)
+        return web.json_response(
+            {
+                "user": {
+                    "uid": f"fake-{code}",
+                    "participant": {"points": points},
+                }
+            }
+        )
+
+    async def operations_calc(request: web.Request) -> web.Response:
+        data = await request.json()
+        if data.get("code") == UNKNOWN_CODE:
+            return not_found(data["code"])
+        receipt = data["receipt"]
+        used = min(receipt.get("points", 0), points)
+        return web.json_response(
+            {
+                "purchase": {
+                    "total": receipt["total"],
+                    "points": used,
+                    "cash": receipt["total"] - used,
+                }
+            }
+        )
+
+    async def operations_create(request: web.Request) -> web.Response:
+        data = await request.json()
+        if data.get("code") == UNKNOWN_CODE:
+            return not_found(data["code"])
+        receipt = data["receipt"]
+        return web.json_response(
+            {
+                "id": next(transaction_ids),
+                "dateCreated": datetime.utcnow().isoformat(),
+                "action": "PURCHASE",
+                "state": "NORMAL",
+                "points": -receipt.get("points", 0),
+                "cash": int(receipt["cash"]),
+                "total": int(receipt["total"]),
+            }
+        )
+
+    async def operations_refund(request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "id": next(transaction_ids),
+                "action": "REFUND",
+                "state": "NORMAL",
+                "origin": {"id": int(request.match_info["transaction_id"])},
+            }
+        )
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application(middlewares=[chaos])
+    app.router.add_get("/partner/v2/customers/find", customers_find)
+    app.router.add_post("/partner/v2/operations/calc", operations_calc)
+    app.router.add_post("/partner/v2/operations", operations_create)
+    app.router.add_post(
+        "/partner/v2/operations/{transaction_id}/refund", operations_refund
+    )
+    app.router.add_get("/_stats", get_stats)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake UDS partner API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(latency_ms=args.latency_ms, error_rate=args.error_rate),
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
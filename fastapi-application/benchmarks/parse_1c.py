@@ -0,0 +1,240 @@
+"""
+Micro-benchmark of decoding and parsing 1C product responses.
+
+Compares the previous parser (stdlib json, one Pydantic model at a time,
+errors.txt opened on every bad variation) with Driver1C.parse_products
+(orjson, one validation call per product from plain dicts, errors collected
+in memory)
+on the same raw bytes, and checks both give the same products.
+
+    python -m benchmarks.parse_1c --products 20000 --bad-rate 0.01
+    python -m benchmarks.parse_1c --replay /var/lib/distore/1c-snapshots
+
+No database or network is needed.
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import orjson
+
+from benchmarks.catalog import CatalogSize
+from benchmarks.fakes.one_c import generate_fixtures
+from core.schemas.product import (
+    ProductCreateSchema,
+    ProductImageCreateSchema,
+    ProductPropertyCreateSchema,
+    ProductVariationCreateSchema,
+    ProductVariationImageCreateSchema,
+)
+from services.driver_1c import Driver1C
+from services.snapshots_1c import load_snapshot
+
+
+def legacy_parse_products(
+    data,
+    brands_map: dict,
+    categories_map: dict,
+    errors_path: Path,
+) -> list[ProductCreateSchema]:
+    """Driver1C.parse_products before the orjson rewrite, for reference."""
+    if not data:
+        return []
+
+    products = []
+
+    for product_data in data["data"]:
+        try:
+            brand_id = brands_map[product_data.get("brand", "").lower()]
+        except KeyError:
+            brand_id = None
+
+        variations = []
+
+        for variation_data in product_data["variations"]:
+            try:
+                variation = ProductVariationCreateSchema(
+                    uuid_1c=variation_data["code_1c"],
+                    name=variation_data["name"],
+                    quantity=int(variation_data["quantity"]),
+                    price=variation_data["price"],
+                    sale_quantity=int(variation_data["salequantity"]),
+                    properties=[
+                        ProductPropertyCreateSchema(
+                            uuid_1c=prop["id"],
+                            name=prop["name"],
+                            value=prop["value"],
+                        )
+                        for prop in variation_data["properties"]
+                    ],
+                    images=[
+                        ProductVariationImageCreateSchema(
+                            url=image["path"],
+                            is_main=image["main"],
+                        )
+                        for image in variation_data["images"]
+                    ]
+                )
+                variations.append(variation)
+            except Exception as e:
+                with open(errors_path, "a", encoding="utf-8") as f:
+                    f.write(
+                        f"{product_data}\n{variation_data['code_1c']}\n"
+                        f"{e}\n\n"
+                    )
+
+        product = ProductCreateSchema(
+            uuid_1c=product_data["code_1c"],
+            title=product_data["title"],
+            description=product_data["description"],
+            usingmethod=product_data["usingmethod"],
+            composition=product_data["composition"],
+            brand_id=brand_id,
+            category_id=categories_map[product_data["category"]],
+            images=[
+                ProductImageCreateSchema(
+                    url=image['path'],
+                    is_main=image['main']
+                )
+                for image in product_data["images"]
+            ],
+            variations=variations,
+        )
+
+        products.append(product)
+
+    return products
+
+
+def inject_bad_variations(snapshot: dict, rate: float, seed: int) -> int:
+    # Ошибки, которые старый парсер переживает: иначе сравнивать нечего
+    rnd = random.Random(seed)
+    count = 0
+    for response in snapshot["products"].values():
+        for product in response["data"]:
+            for variation in product["variations"]:
+                if rnd.random() >= rate:
+                    continue
+                count += 1
+                if rnd.random() < 0.5:
+                    variation["price"] = 0
+                else:
+                    del variation["salequantity"]
+    return count
+
+
+def maps(snapshot: dict) -> tuple[dict, dict]:
+    brands_map = {
+        brand["name"].lower(): n
+        for n, brand in enumerate(snapshot["brands"]["data"], start=1)
+    }
+    categories_map = {
+        category["id"]: n
+        for n, category in enumerate(
+            (
+                category
+                for group in snapshot["categories"]["data"]
+                for category in group["subcategories"]
+            ),
+            start=1,
+        )
+    }
+    return brands_map, categories_map
+
+
+def best_of(repeat: int, func) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark 1C product parsing")
+    parser.add_argument("--products", type=int, default=CatalogSize.products)
+    parser.add_argument("--replay", type=Path, help="Use a recorded snapshot")
+    parser.add_argument("--bad-rate", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.replay:
+        snapshot = load_snapshot(args.replay)
+    else:
+        snapshot = generate_fixtures(
+            CatalogSize(products=args.products), seed=args.seed
+        )
+    bad = inject_bad_variations(snapshot, args.bad_rate, args.seed)
+    brands_map, categories_map = maps(snapshot)
+
+    # Сырые ответы, как они приходят из 1С
+    bodies = [
+        json.dumps(response, ensure_ascii=False).encode()
+        for response in snapshot["products"].values()
+    ]
+    variations = sum(
+        len(product["variations"])
+        for response in snapshot["products"].values()
+        for product in response["data"]
+    )
+
+    json_ms, decoded = best_of(
+        args.repeat, lambda: [json.loads(body) for body in bodies]
+    )
+    orjson_ms, _ = best_of(
+        args.repeat, lambda: [orjson.loads(body) for body in bodies]
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        errors_path = Path(tmp) / "errors.txt"
+        legacy_ms, legacy = best_of(
+            args.repeat,
+            lambda: [
+                product
+                for data in decoded
+                for product in legacy_parse_products(
+                    data, brands_map, categories_map, errors_path
+                )
+            ],
+        )
+
+    errors: list[dict] = []
+
+    def parse_new():
+        errors.clear()
+        return [
+            product
+            for data in decoded
+            for product in Driver1C.parse_products(
+                data, brands_map, categories_map, errors
+            )
+        ]
+
+    new_ms, new = best_of(args.repeat, parse_new)
+
+    same = [p.model_dump() for p in legacy] == [p.model_dump() for p in new]
+
+    print(
+        f"{len(bodies)} responses, {len(new)} products, {variations} variations, "
+        f"{bad} bad variations injected, {len(errors)} errors reported"
+    )
+    print(f"{'':16} {'decode ms':>10} {'parse ms':>10} {'variations/s':>14}")
+    for name, decode_ms, parse_ms in (
+        ("json + legacy", json_ms, legacy_ms),
+        ("orjson + new", orjson_ms, new_ms),
+    ):
+        rate = variations / ((decode_ms + parse_ms) / 1000)
+        print(f"{name:16} {decode_ms:10.1f} {parse_ms:10.1f} {rate:14.0f}")
+    print(f"same products: {same}")
+
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from core.admin.category import CategoryAdmin, CategoryPropertyAdmin, CategoryPr
 from core.admin.product import ProductAdmin, ProductImageAdmin, ProductVariationAdmin, \
     ProductPropertyAdmin
 from core.admin.banner import BannerAdmin
+from core.admin.outbox import OutboxMessageAdmin
 from core.models import db_helper
 
 
@@ -22,4 +23,6 @@ def create_admin(app):
     admin.add_view(ProductVariationAdmin)
     admin.add_view(ProductPropertyAdmin)
 
+    admin.add_view(OutboxMessageAdmin)
+
     return admin
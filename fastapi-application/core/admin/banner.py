@@ -1,9 +1,9 @@
-from typing import Annotated
 from fastapi import Request
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_object_session
 from sqladmin import ModelView
 from wtforms import TextAreaField
-from core.models import Banner, Product
+from core.models import Banner, Product, db_helper
 
 
 class BannerAdmin(ModelView, model=Banner):
@@ -18,12 +18,19 @@ class BannerAdmin(ModelView, model=Banner):
         "product_ids": TextAreaField("Product IDs (comma-separated)")
     }
 
-    def get_session(self, request: Request) -> AsyncSession:
-        return request.state.session
+    async def _get_products(self, model: Banner, product_ids: list[int]) -> list[Product]:
+        stmt = select(Product).where(Product.id.in_(product_ids))
 
-    async def on_model_change(self, data: dict, model: Banner, is_created: bool, request: Request):
-        session = self.get_session(request)
+        # При редактировании баннер уже в сессии sqladmin - грузим в неё же
+        session = async_object_session(model)
+        if session is not None:
+            return list((await session.scalars(stmt)).unique())
+
+        # Новый баннер: продукты присоединятся к сессии sqladmin при add()
+        async with db_helper.session_factory() as session:
+            return list((await session.scalars(stmt)).unique())
 
+    async def on_model_change(self, data: dict, model: Banner, is_created: bool, request: Request):
         # Обработка product_ids
         product_ids_raw = data.get("product_ids", "")
         product_ids = [
@@ -32,24 +39,10 @@ class BannerAdmin(ModelView, model=Banner):
             if pid.strip().isdigit()
         ] if product_ids_raw else []
 
-        # Получаем продукты с учетом текущей сессии
         if product_ids:
-            # Вариант 1: Делаем запрос с учетом текущей сессии
-            existing_products = []
-            for pid in product_ids:
-                product = await session.get(Product, pid)
-                if product:
-                    existing_products.append(product)
-
-            # Вариант 2: Альтернативный способ с merge
-            # result = await session.execute(select(Product).where(Product.id.in_(product_ids)))
-            # existing_products = []
-            # for product in result.scalars():
-            #     existing_products.append(await session.merge(product))
-
-            model.products = existing_products
+            model.products = await self._get_products(model, product_ids)
         else:
             model.products = []
 
         # Вызываем родительский метод
-        await super().on_model_change(data, model, is_created, request)
\ No newline at end of file
+        await super().on_model_change(data, model, is_created, request)
@@ -0,0 +1,34 @@
+from sqladmin import ModelView
+
+from core.models import OutboxMessage
+
+
+class OutboxMessageAdmin(ModelView, model=OutboxMessage):
+    can_create = False
+    column_list = [
+        "id",
+        "topic",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "last_error",
+        "created_at",
+        "processed_at",
+    ]
+    column_sortable_list = [
+        "id",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "created_at",
+    ]
+    column_searchable_list = [
+        "topic",
+        "status",
+    ]
+    column_default_sort = [("id", True)]
+    # Чтобы повторить dead-сообщение: status=pending, next_attempt_at=сейчас
+    form_columns = [
+        "status",
+        "next_attempt_at",
+    ]
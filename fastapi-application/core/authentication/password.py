@@ -0,0 +1,114 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi_users.password import PasswordHelper
+from loguru import logger
+
+from core import metrics
+from core.config import settings
+
+T = TypeVar("T")
+
+
+class PasswordHashStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.in_flight = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+        self.run_time_total = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "queue_time_avg_ms": (
+                self.queue_time_total / self.calls * 1000 if self.calls else 0
+            ),
+            "queue_time_max_ms": self.queue_time_max * 1000,
+            "run_time_avg_ms": (
+                self.run_time_total / self.calls * 1000 if self.calls else 0
+            ),
+        }
+
+
+class ThreadPoolPasswordHelper(PasswordHelper):
+    """
+    PasswordHelper with async variants that run argon2/bcrypt in a bounded
+    thread pool. Both hashers release the GIL, so the event loop keeps
+    serving other requests while a login is being verified.
+    """
+
+    def __init__(self, max_workers: int, slow_queue_ms: int) -> None:
+        super().__init__()
+        self.max_workers = max_workers
+        self.slow_queue_ms = slow_queue_ms
+        self.stats = PasswordHashStats()
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hash",
+            )
+        return self._executor
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        submitted_at = time.perf_counter()
+        self.stats.in_flight += 1
+        metrics.password_hash_in_flight.inc()
+
+        def job() -> tuple[T, float, float]:
+            started_at = time.perf_counter()
+            result = func(*args)
+            return result, started_at, time.perf_counter()
+
+        try:
+            result, started_at, finished_at = await asyncio.get_running_loop(
+            ).run_in_executor(self.executor, job)
+        finally:
+            self.stats.in_flight -= 1
+            metrics.password_hash_in_flight.dec()
+
+        queue_time = started_at - submitted_at
+        metrics.password_hash_queue_time.observe(queue_time)
+        metrics.password_hash_run_time.observe(finished_at - started_at)
+        self.stats.calls += 1
+        self.stats.queue_time_total += queue_time
+        self.stats.queue_time_max = max(self.stats.queue_time_max, queue_time)
+        self.stats.run_time_total += finished_at - started_at
+
+        if queue_time * 1000 > self.slow_queue_ms:
+            logger.warning(
+                f"Password hashing queue wait {queue_time * 1000:.0f} ms "
+                f"(in flight: {self.stats.in_flight}, workers: {self.max_workers})"
+            )
+
+        return result
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run(self.hash, password)
+
+    async def verify_and_update_async(
+        self,
+        plain_password: str,
+        hashed_password: str,
+    ) -> tuple[bool, str | None]:
+        return await self._run(
+            self.verify_and_update, plain_password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_helper = ThreadPoolPasswordHelper(
+    max_workers=settings.access_token.password_hash_workers,
+    slow_queue_ms=settings.access_token.password_hash_slow_queue_ms,
+)
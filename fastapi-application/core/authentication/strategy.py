@@ -0,0 +1,220 @@
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import jwt
+from fastapi_users import exceptions, models
+from fastapi_users.authentication.strategy import JWTStrategy
+from fastapi_users.authentication.strategy.db import DatabaseStrategy
+from fastapi_users.jwt import decode_jwt, generate_jwt
+from fastapi_users.manager import BaseUserManager
+from loguru import logger
+from redis.exceptions import RedisError
+
+from core.config import settings
+from core.types.user_id import UserIdType
+from .token_cache import AccessTokenCache, access_token_cache
+
+
+class CachedDatabaseStrategy(DatabaseStrategy):
+    """
+    DatabaseStrategy that remembers verified tokens, so the access_tokens
+    table is only queried on a cache miss.
+    """
+
+    def __init__(
+        self,
+        *args,
+        cache: AccessTokenCache = access_token_cache,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+
+    def _is_expired(self, created_at: float) -> bool:
+        if not self.lifetime_seconds:
+            return False
+        return created_at + self.lifetime_seconds < time.time()
+
+    async def read_token(
+        self,
+        token: Optional[str],
+        user_manager: BaseUserManager[models.UP, models.ID],
+    ) -> Optional[models.UP]:
+        if token is None:
+            return None
+
+        cached = await self.cache.get(token)
+
+        if cached is None:
+            return await self._read_and_cache_token(token, user_manager)
+
+        if self._is_expired(cached.created_at):
+            await self._drop_cached(token)
+            return None
+
+        try:
+            return await user_manager.get(cached.user_id)
+        except exceptions.UserNotExists:
+            await self._drop_cached(token)
+            return None
+
+    async def _drop_cached(self, token: str) -> None:
+        # Токен и так отклонен, чистка кэша не должна ронять запрос
+        try:
+            await self.cache.evict(token)
+        except RedisError:
+            pass
+
+    async def _read_and_cache_token(
+        self,
+        token: str,
+        user_manager: BaseUserManager[models.UP, models.ID],
+    ) -> Optional[models.UP]:
+        max_age = None
+        if self.lifetime_seconds:
+            max_age = datetime.fromtimestamp(
+                time.time() - self.lifetime_seconds, timezone.utc
+            )
+
+        access_token = await self.database.get_by_token(token, max_age)
+        if access_token is None:
+            return None
+
+        try:
+            user = await user_manager.get(
+                user_manager.parse_id(access_token.user_id)
+            )
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+
+        await self.cache.set(
+            token,
+            access_token.user_id,
+            access_token.created_at.timestamp(),
+        )
+
+        return user
+
+    async def write_token(self, user: models.UP) -> str:
+        access_token = await self.database.create(
+            self._create_access_token_dict(user)
+        )
+        await self.cache.set(
+            access_token.token,
+            access_token.user_id,
+            access_token.created_at.timestamp(),
+        )
+        return access_token.token
+
+    async def destroy_token(self, token: str, user: models.UP) -> None:
+        await self.cache.evict(token)
+        await super().destroy_token(token, user)
+
+
+class RevocableJWTStrategy(JWTStrategy):
+    """
+    Stateless signed tokens. Logout and password reset put the token
+    (or all tokens of the user) into a Redis revocation list.
+    """
+
+    def __init__(
+        self,
+        *args,
+        cache: AccessTokenCache = access_token_cache,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+
+    def _decode(self, token: str) -> dict | None:
+        try:
+            return decode_jwt(
+                token,
+                self.decode_key,
+                self.token_audience,
+                algorithms=[self.algorithm],
+            )
+        except jwt.PyJWTError:
+            return None
+
+    async def read_token(
+        self,
+        token: Optional[str],
+        user_manager: BaseUserManager[models.UP, models.ID],
+    ) -> Optional[models.UP]:
+        if token is None:
+            return None
+
+        data = self._decode(token)
+        if data is None or data.get("sub") is None:
+            return None
+
+        try:
+            parsed_id = user_manager.parse_id(data["sub"])
+        except exceptions.InvalidID:
+            return None
+
+        try:
+            revoked = await self.cache.is_revoked(
+                token, parsed_id, data.get("iat", 0)
+            )
+        except RedisError as e:
+            # Fail closed: without the revocation list we can't trust the token
+            logger.error(f"Token revocation list unavailable: {e}")
+            return None
+
+        if revoked:
+            return None
+
+        try:
+            return await user_manager.get(parsed_id)
+        except exceptions.UserNotExists:
+            return None
+
+    async def write_token(self, user: models.UP) -> str:
+        data = {
+            "sub": str(user.id),
+            "aud": self.token_audience,
+            # Дробные секунды: revoke_user отсекает токены точно по моменту
+            "iat": time.time(),
+        }
+        return generate_jwt(
+            data,
+            self.encode_key,
+            self.lifetime_seconds,
+            algorithm=self.algorithm,
+        )
+
+    async def destroy_token(self, token: str, user: models.UP) -> None:
+        data = self._decode(token)
+        if data is None:
+            return
+
+        await self.cache.revoke(token, data.get("exp", time.time()))
+
+
+def get_jwt_strategy() -> RevocableJWTStrategy:
+    """The JWT strategy as configured; every JWT is issued and read by it."""
+    return RevocableJWTStrategy(
+        secret=settings.access_token.jwt_secret,
+        lifetime_seconds=settings.access_token.lifetime_seconds,
+    )
+
+
+async def get_token_user_id(token: str) -> UserIdType | None:
+    """
+    Owner of a bearer token, without loading the user or checking
+    revocation. Good for routing a request, not for authorizing it.
+    """
+    if settings.access_token.strategy == "jwt":
+        # Тот же алгоритм и audience, что при проверке токена
+        data = get_jwt_strategy()._decode(token)
+        try:
+            return UserIdType(data["sub"])
+        except (TypeError, KeyError, ValueError):
+            return None
+
+    # Токен попадает в кэш при каждой успешной проверке
+    cached = await access_token_cache.get(token)
+    return cached.user_id if cached is not None else None
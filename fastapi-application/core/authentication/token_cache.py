@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from loguru import logger
+from redis.exceptions import RedisError
+
+from core import metrics
+from core.config import settings
+from core.redis_helper import redis_helper
+from core.types.user_id import UserIdType
+from utils.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True, slots=True)
+class CachedAccessToken:
+    user_id: UserIdType
+    created_at: float  # unix timestamp
+
+
+class AccessTokenCache:
+    """
+    Two-level cache of verified access tokens: in-process LRU in front of Redis.
+
+    Tokens are stored under their sha256 digest, never in plain text.
+    Explicit eviction (logout, password reset) clears Redis and the local
+    LRU of the current worker; other workers drop their copy once
+    `local_cache_ttl_seconds` passes, so keep that value short.
+    Eviction and revocation raise RedisError if Redis stays unavailable.
+    """
+
+    TOKEN_KEY = "auth:token:{digest}"
+    USER_TOKENS_KEY = "auth:user_tokens:{user_id}"
+    REVOKED_TOKEN_KEY = "auth:revoked:{digest}"
+    USER_REVOKED_BEFORE_KEY = "auth:revoked_before:{user_id}"
+
+    WRITE_ATTEMPTS = 3
+    WRITE_RETRY_DELAY_SECONDS = 0.1
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        local_ttl_seconds: int,
+        local_max_size: int,
+        lifetime_seconds: int,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.lifetime_seconds = lifetime_seconds
+        self.local = TTLCache[CachedAccessToken](
+            max_size=local_max_size,
+            ttl_seconds=local_ttl_seconds,
+        )
+        self.redis_hits = 0
+        self.redis_misses = 0
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @property
+    def redis(self):
+        return redis_helper.client
+
+    async def get(self, token: str) -> CachedAccessToken | None:
+        digest = self._digest(token)
+        cached = self.local.get(digest)
+
+        if cached is not None:
+            return cached
+
+        try:
+            value = await self.redis.get(self.TOKEN_KEY.format(digest=digest))
+        except RedisError as e:
+            logger.warning(f"Access token cache unavailable: {e}")
+            return None
+
+        if value is None:
+            self.redis_misses += 1
+            return None
+
+        self.redis_hits += 1
+        user_id, created_at = value.decode().split(":", 1)
+        cached = CachedAccessToken(
+            user_id=UserIdType(user_id),
+            created_at=float(created_at),
+        )
+        self.local.set(digest, cached)
+
+        return cached
+
+    async def set(self, token: str, user_id: UserIdType, created_at: float) -> None:
+        digest = self._digest(token)
+        cached = CachedAccessToken(user_id=user_id, created_at=created_at)
+
+        # Never keep a token in cache longer than it is valid
+        ttl = min(
+            self.ttl_seconds,
+            int(created_at + self.lifetime_seconds - time.time()),
+        )
+        if ttl <= 0:
+            return
+
+        self.local.set(digest, cached, ttl_seconds=min(ttl, self.local.ttl_seconds))
+
+        user_tokens_key = self.USER_TOKENS_KEY.format(user_id=user_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(
+                    self.TOKEN_KEY.format(digest=digest),
+                    f"{user_id}:{created_at}",
+                    ex=ttl,
+                )
+                pipe.sadd(user_tokens_key, digest)
+                pipe.expire(user_tokens_key, self.ttl_seconds)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Access token cache unavailable: {e}")
+
+    async def _write(self, command: Callable[[], Awaitable]) -> None:
+        # Eviction and revocation must not be lost: retry, then let the
+        # error fail the request rather than report a logout that didn't happen
+        for attempt in range(1, self.WRITE_ATTEMPTS + 1):
+            try:
+                await command()
+                return
+            except RedisError as e:
+                if attempt == self.WRITE_ATTEMPTS:
+                    logger.error(f"Token revocation list unavailable: {e}")
+                    raise
+                logger.warning(f"Token revocation list unavailable, retrying: {e}")
+                await asyncio.sleep(self.WRITE_RETRY_DELAY_SECONDS * attempt)
+
+    async def evict(self, token: str) -> None:
+        digest = self._digest(token)
+        self.local.pop(digest)
+
+        await self._write(
+            lambda: self.redis.delete(self.TOKEN_KEY.format(digest=digest))
+        )
+
+    async def evict_user(self, user_id: UserIdType) -> None:
+        self.local.pop_where(lambda cached: cached.user_id == user_id)
+
+        user_tokens_key = self.USER_TOKENS_KEY.format(user_id=user_id)
+
+        async def delete_user_tokens() -> None:
+            digests = await self.redis.smembers(user_tokens_key)
+            keys = [
+                self.TOKEN_KEY.format(digest=digest.decode())
+                for digest in digests
+            ]
+            await self.redis.delete(user_tokens_key, *keys)
+
+        await self._write(delete_user_tokens)
+
+    # Revocation list for stateless (JWT) tokens
+
+    async def revoke(self, token: str, expires_at: float) -> None:
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
+
+        await self._write(
+            lambda: self.redis.set(
+                self.REVOKED_TOKEN_KEY.format(digest=self._digest(token)),
+                1,
+                ex=ttl,
+            )
+        )
+
+    async def revoke_user(self, user_id: UserIdType) -> None:
+        """
+        Revoke every stateless token of the user issued before now. Tokens
+        carry `iat` with sub-second precision; older tokens with a whole
+        second `iat` are rejected for the whole second of the revocation.
+        """
+        await self._write(
+            lambda: self.redis.set(
+                self.USER_REVOKED_BEFORE_KEY.format(user_id=user_id),
+                repr(time.time()),
+                ex=self.lifetime_seconds,
+            )
+        )
+
+    async def is_revoked(
+        self,
+        token: str,
+        user_id: UserIdType,
+        issued_at: float,
+    ) -> bool:
+        revoked, revoked_before = await self.redis.mget(
+            self.REVOKED_TOKEN_KEY.format(digest=self._digest(token)),
+            self.USER_REVOKED_BEFORE_KEY.format(user_id=user_id),
+        )
+
+        if revoked is not None:
+            return True
+
+        return revoked_before is not None and issued_at < float(revoked_before)
+
+access_token_cache = AccessTokenCache(
+    ttl_seconds=settings.access_token.cache_ttl_seconds,
+    local_ttl_seconds=settings.access_token.local_cache_ttl_seconds,
+    local_max_size=settings.access_token.local_cache_max_size,
+    lifetime_seconds=settings.access_token.lifetime_seconds,
+)
+metrics.watch_cache(
+    "access_token_local",
+    lambda: (access_token_cache.local.hits, access_token_cache.local.misses),
+)
+metrics.watch_cache(
+    "access_token_redis",
+    lambda: (access_token_cache.redis_hits, access_token_cache.redis_misses),
+)
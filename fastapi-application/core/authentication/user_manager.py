@@ -1,15 +1,23 @@
-from typing import Optional, TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING, Any
 
+import jwt
 from fastapi import Depends
+from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_users import (
     BaseUserManager,
     IntegerIDMixin,
+    exceptions,
+    schemas,
 )
+from fastapi_users.jwt import decode_jwt
 from loguru import logger
+from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.authentication.password import ThreadPoolPasswordHelper
+from core.authentication.token_cache import access_token_cache
 from core.config import settings
-from core.models import User, db_helper, Cart
+from core.models import User, db_helper, Cart, AccessToken
 from core.tasks.users import send_forget_password_email
 from core.types.user_id import UserIdType
 from services.carts import CartService
@@ -22,6 +30,81 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, UserIdType]):
     reset_password_token_secret = settings.access_token.reset_password_token_secret
     verification_token_secret = settings.access_token.verification_token_secret
 
+    password_helper: ThreadPoolPasswordHelper
+
+    # Password hashing is CPU heavy, so the methods below use the async
+    # helpers which run it in a thread pool instead of on the event loop.
+
+    async def authenticate(
+        self,
+        credentials: OAuth2PasswordRequestForm,
+    ) -> Optional[User]:
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Run the hasher to mitigate timing attack
+            await self.password_helper.hash_async(credentials.password)
+            return None
+
+        verified, updated_password_hash = (
+            await self.password_helper.verify_and_update_async(
+                credentials.password, user.hashed_password
+            )
+        )
+        if not verified:
+            return None
+
+        if updated_password_hash is not None:
+            await self.user_db.update(
+                user, {"hashed_password": updated_password_hash}
+            )
+
+        return user
+
+    async def create(
+        self,
+        user_create: schemas.UC,
+        safe: bool = False,
+        request: Optional["Request"] = None,
+    ) -> User:
+        await self.validate_password(user_create.password, user_create)
+
+        existing_user = await self.user_db.get_by_email(user_create.email)
+        if existing_user is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = (
+            user_create.create_update_dict()
+            if safe
+            else user_create.create_update_dict_superuser()
+        )
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = await self.password_helper.hash_async(
+            password
+        )
+
+        created_user = await self.user_db.create(user_dict)
+
+        await self.on_after_register(created_user, request)
+
+        return created_user
+
+    async def _update(self, user: User, update_dict: dict[str, Any]) -> User:
+        password = update_dict.get("password")
+
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {
+                key: value
+                for key, value in update_dict.items()
+                if key != "password"
+            }
+            update_dict["hashed_password"] = (
+                await self.password_helper.hash_async(password)
+            )
+
+        return await super()._update(user, update_dict)
+
     async def on_after_register(
         self,
         user: User,
@@ -69,3 +152,45 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, UserIdType]):
                 "template_name": "email/forgot_password.html",
             }
         )
+
+    async def reset_password(
+        self,
+        token: str,
+        password: str,
+        request: Optional["Request"] = None,
+    ) -> User:
+        try:
+            data = decode_jwt(
+                token,
+                self.reset_password_token_secret,
+                [self.reset_password_token_audience],
+            )
+            user_id = self.parse_id(data["sub"])
+        except (jwt.PyJWTError, KeyError, exceptions.InvalidID):
+            raise exceptions.InvalidResetPasswordToken()
+
+        # Before the password changes: if Redis is down the reset fails
+        # with the link still valid, so the user can simply retry it
+        await self._revoke_sessions(user_id)
+
+        return await super().reset_password(token, password, request)
+
+    async def on_after_reset_password(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ):
+        # Old sessions must not outlive the password they were issued for
+        await self.user_db.session.execute(
+            delete(AccessToken).where(AccessToken.user_id == user.id)
+        )
+        await self.user_db.session.commit()
+
+        # Again, for tokens cached or issued while the password was changing
+        await self._revoke_sessions(user.id)
+
+    @staticmethod
+    async def _revoke_sessions(user_id: UserIdType) -> None:
+        await access_token_cache.evict_user(user_id)
+        if settings.access_token.strategy == "jwt":
+            await access_token_cache.revoke_user(user_id)
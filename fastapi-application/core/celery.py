@@ -1,5 +1,10 @@
+import os
+import time
+
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_process_shutdown
 
+from . import metrics
 from .config import settings
 
 
@@ -12,3 +17,42 @@ class CeleryConfig:
 app = Celery('celery')
 app.config_from_object(CeleryConfig)
 app.autodiscover_tasks()
+
+
+# Метрики задач для textfile collector: общий файл в multiprocess-режиме,
+# иначе у каждого процесса prefork свой
+
+_task_started: dict[str, float] = {}
+
+
+def _metrics_job() -> str:
+    if metrics.MULTIPROCESS:
+        return "celery"
+    return f"celery_{os.getpid()}"
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id, task, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id, task, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        metrics.celery_task_duration.labels(task=task.name).observe(
+            time.perf_counter() - started
+        )
+    metrics.celery_tasks.labels(task=task.name, state=state or "UNKNOWN").inc()
+    metrics.write_textfile(_metrics_job())
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs):
+    # Иначе метрики завершённого процесса остались бы в выдаче навсегда
+    if metrics.MULTIPROCESS:
+        metrics.mark_process_dead()
+        return
+    path = metrics.textfile_path(_metrics_job())
+    if path is not None:
+        path.unlink(missing_ok=True)
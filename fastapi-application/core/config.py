@@ -1,8 +1,9 @@
 from pathlib import Path
+from typing import Literal
 
 from fastapi_mail import ConnectionConfig
 from fastapi_storages import FileSystemStorage
-from pydantic import BaseModel, RedisDsn
+from pydantic import BaseModel, RedisDsn, model_validator
 from pydantic import PostgresDsn
 from pydantic_settings import (
     BaseSettings,
@@ -30,6 +31,7 @@ class ApiV1Prefix(BaseModel):
     payments: str = "/payments"
     uds: str = "/uds"
     help_form: str = "/help-form"
+    diagnostics: str = "/diagnostics"
 
 
 class ApiPrefix(BaseModel):
@@ -51,6 +53,17 @@ class DatabaseConfig(BaseModel):
     echo_pool: bool = False
     pool_size: int = 50
     max_overflow: int = 10
+    # Optional read replicas for catalog reads; empty = everything on url
+    replica_urls: list[PostgresDsn] = []
+    replica_pool_size: int = 20
+    replica_max_overflow: int = 10
+    # After a write the user reads from the primary this long, so they
+    # see their own changes even if replicas lag behind
+    read_your_writes_seconds: int = 10
+    # SQLAlchemy compiled statement cache, per engine
+    query_cache_size: int = 1200
+    # asyncpg prepared statements, per connection
+    prepared_statement_cache_size: int = 500
 
     naming_convention: dict[str, str] = {
         "ix": "ix_%(column_0_label)s",
@@ -63,12 +76,29 @@ class DatabaseConfig(BaseModel):
 
 class RedisConfig(BaseModel):
     url: str
+    max_connections: int = 50
+    socket_timeout: float = 2.0
 
 
 class AccessToken(BaseModel):
     lifetime_seconds: int = 24 * 60 * 60
     reset_password_token_secret: str
     verification_token_secret: str
+    # "database" - opaque tokens in access_tokens table (verification is cached),
+    # "jwt" - signed stateless tokens with a Redis revocation list
+    strategy: Literal["database", "jwt"] = "database"
+    jwt_secret: str | None = None
+    cache_ttl_seconds: int = 5 * 60
+    local_cache_ttl_seconds: int = 15
+    local_cache_max_size: int = 10_000
+    password_hash_workers: int = 4
+    password_hash_slow_queue_ms: int = 200
+
+    @model_validator(mode="after")
+    def check_jwt_secret(self):
+        if self.strategy == "jwt" and not self.jwt_secret:
+            raise ValueError("jwt_secret is required for the jwt strategy")
+        return self
 
 
 class EmailConfig(BaseModel):
@@ -96,6 +126,12 @@ class UDSConfig(BaseModel):
     uds_transaction_calc_url: str = "https://api.uds.app/partner/v2/operations/calc"
     uds_transaction_create_url: str = "https://api.uds.app/partner/v2/operations"
     uds_transaction_refund_url: str = "https://api.uds.app/partner/v2/operations/{transaction_id}/refund"
+    # Connection limit and timeouts: settings.http_clients.uds
+    # Only for idempotent calls (customer lookup, calculation)
+    retries: int = 2
+    retry_backoff_seconds: float = 0.2
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
 
 
 class Config1C(BaseModel):
@@ -105,6 +141,16 @@ class Config1C(BaseModel):
     categories_url: str
     products_url: str
     order_create_url: str
+    # Optional bulk endpoint: takes {"orders": [Order1C, ...]} and answers
+    # {"orders": [{"order_id": ..., "OrderNumber": ...}, ...]}.
+    # When set, queued orders are exported in batches.
+    order_batch_create_url: str | None = None
+    # Raw responses of every import cycle are saved here (gzip) to replay
+    # a sync offline: python update_data_from_1c.py --replay <file or dir>
+    snapshot_dir: Path | None = None
+    snapshot_keep: int = 50
+    # Products and variations dropped by the last import cycle, as JSON
+    parse_errors_path: Path | None = Path("errors_1c.json")
 
 
 class FreedomPayConfig(BaseModel):
@@ -116,6 +162,104 @@ class FreedomPayConfig(BaseModel):
 class SdekConfig(BaseModel):
     client_id: str
     client_secret: str
+    # The OAuth token is refreshed this long before it expires
+    token_renew_before_seconds: int = 300
+    token_lock_timeout_seconds: int = 10
+    # Local city directory for checkout suggestions
+    cities_country_codes: list[str] = ["KG", "KZ", "RU"]
+    cities_refresh_interval_seconds: int = 24 * 60 * 60
+    cities_suggest_limit: int = 10
+    # Background refresh of shipment statuses
+    shipment_poll_interval_seconds: int = 10 * 60
+    shipment_poll_batch_size: int = 200
+    shipment_poll_concurrency: int = 5
+    # Shipments failing this many checks in a row (unknown or deleted in
+    # CDEK) are no longer polled; GET status still asks CDEK for them
+    shipment_poll_max_failures: int = 20
+    shipment_final_statuses: list[str] = [
+        "DELIVERED",
+        "NOT_DELIVERED",
+        "INVALID",
+    ]
+
+
+class HttpClientConfig(BaseModel):
+    limit: int = 100
+    limit_per_host: int = 20
+    ttl_dns_cache: int = 300
+    keepalive_timeout: float = 30.0
+    connect_timeout: float = 5.0
+    timeout: float = 30.0
+
+
+class HttpClientsConfig(BaseModel):
+    cdek: HttpClientConfig = HttpClientConfig()
+    freedom_pay: HttpClientConfig = HttpClientConfig()
+    one_c: HttpClientConfig = HttpClientConfig(timeout=60.0)
+    # Short timeouts: UDS is called while the client waits at checkout
+    uds: HttpClientConfig = HttpClientConfig(
+        limit=20,
+        connect_timeout=2.0,
+        timeout=5.0,
+    )
+
+
+class CheckoutConfig(BaseModel):
+    # Stock stays reserved for an unpaid order this long
+    reservation_ttl_seconds: int = 30 * 60
+    # Paid orders keep their reservation until 1C confirms the order
+    paid_reservation_ttl_seconds: int = 24 * 60 * 60
+
+
+class OutboxConfig(BaseModel):
+    poll_interval_seconds: float = 1.0
+    # Message is hidden from other workers while a handler runs
+    lease_seconds: int = 5 * 60
+    max_attempts: int = 10
+    # 1C may be down for hours; ~1 day of retries before dead-lettering
+    max_attempts_by_topic: dict[str, int] = {"1c.create_order": 30}
+    backoff_base_seconds: float = 5.0
+    backoff_max_seconds: float = 60 * 60
+    # Messages per round trip for topics with a batch handler
+    batch_size: dict[str, int] = {"1c.create_order": 20}
+    stats_log_interval_seconds: int = 60
+    # Messages of one topic handled at the same time
+    concurrency: dict[str, int] = {
+        "1c.create_order": 2,
+        "cdek.create_order": 4,
+        "uds.create_transaction": 4,
+        "uds.refund_transaction": 4,
+    }
+
+
+class LoopMonitorConfig(BaseModel):
+    # Off by default: the watchdog thread and heartbeat cost a little CPU
+    enabled: bool = False
+    # Loop stalls longer than this are recorded
+    threshold_ms: int = 100
+    interval_ms: int = 20
+    stack_limit: int = 30
+
+
+class RequestTimingConfig(BaseModel):
+    enabled: bool = False
+    # Share of requests to measure, 0..1
+    sample_rate: float = 1.0
+    server_timing_header: bool = True
+    # Log only measured requests at least this slow
+    log_min_ms: float = 0
+
+
+class MetricsConfig(BaseModel):
+    # GET /metrics in Prometheus text format. Several processes (uvicorn or
+    # gunicorn workers, Celery prefork) need PROMETHEUS_MULTIPROC_DIR, see
+    # core/metrics.py
+    enabled: bool = True
+    # node_exporter textfile collector directory for the 1C import and
+    # Celery workers; not written if unset
+    textfile_dir: Path | None = None
+    # How often background jobs rewrite their textfile
+    textfile_interval_seconds: int = 15
 
 
 class Settings(BaseSettings):
@@ -137,6 +281,12 @@ class Settings(BaseSettings):
     config_1c: Config1C
     freedom_pay_config: FreedomPayConfig
     sdek_config: SdekConfig
+    checkout: CheckoutConfig = CheckoutConfig()
+    http_clients: HttpClientsConfig = HttpClientsConfig()
+    outbox: OutboxConfig = OutboxConfig()
+    loop_monitor: LoopMonitorConfig = LoopMonitorConfig()
+    request_timing: RequestTimingConfig = RequestTimingConfig()
+    metrics: MetricsConfig = MetricsConfig()
 
     domain: str
     page_size_default: int = 20
@@ -0,0 +1,72 @@
+import aiohttp
+
+from core.config import HttpClientConfig, HttpClientsConfig, settings
+from core.metrics import upstream_trace
+
+
+class HttpSessionRegistry:
+    """
+    Long-lived aiohttp sessions, one per upstream (CDEK, FreedomPay, 1C, UDS).
+
+    Sessions keep connections alive between requests, so outbound calls
+    skip the TCP/TLS handshake. They are opened in the app lifespan and
+    closed on shutdown; scripts and workers get them lazily on first use.
+    """
+
+    def __init__(self, config: HttpClientsConfig) -> None:
+        self.config = config
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+
+    @staticmethod
+    def _create_session(
+        name: str,
+        config: HttpClientConfig,
+    ) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=config.limit,
+                limit_per_host=config.limit_per_host,
+                ttl_dns_cache=config.ttl_dns_cache,
+                keepalive_timeout=config.keepalive_timeout,
+            ),
+            timeout=aiohttp.ClientTimeout(
+                total=config.timeout,
+                connect=config.connect_timeout,
+            ),
+            trace_configs=[upstream_trace(name)],
+        )
+
+    def get(self, name: str) -> aiohttp.ClientSession:
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            session = self._create_session(name, getattr(self.config, name))
+            self._sessions[name] = session
+        return session
+
+    @property
+    def cdek(self) -> aiohttp.ClientSession:
+        return self.get("cdek")
+
+    @property
+    def freedom_pay(self) -> aiohttp.ClientSession:
+        return self.get("freedom_pay")
+
+    @property
+    def one_c(self) -> aiohttp.ClientSession:
+        return self.get("one_c")
+
+    @property
+    def uds(self) -> aiohttp.ClientSession:
+        return self.get("uds")
+
+    def startup(self) -> None:
+        for name in HttpClientsConfig.model_fields:
+            self.get(name)
+
+    async def close(self) -> None:
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+
+http_sessions = HttpSessionRegistry(settings.http_clients)
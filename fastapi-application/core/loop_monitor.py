@@ -0,0 +1,174 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from loguru import logger
+
+from core.config import LoopMonitorConfig, settings
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass(slots=True)
+class LoopBlock:
+    location: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    # Stack of the longest block seen at this location
+    stack: list[str] = field(default_factory=list)
+
+
+class LoopMonitor:
+    """
+    Finds code that blocks the event loop.
+
+    A heartbeat task ticks every `interval_ms`. A watchdog thread notices a
+    late tick while the loop is still stuck and grabs the loop thread's
+    stack, so the blocking call itself (sync HTTP, file I/O, heavy CPU) is
+    recorded, not whatever callback happens to run next. Blocks are
+    aggregated per innermost project frame.
+    """
+
+    def __init__(self, config: LoopMonitorConfig) -> None:
+        self.config = config
+        self.blocks: dict[str, LoopBlock] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_beat = 0.0
+        self._loop_thread_id: int | None = None
+        # (location, stack) of the block in progress, set by the watchdog
+        self._pending: tuple[str, list[str]] | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat = asyncio.get_running_loop().create_task(self._beat())
+        self._watchdog = threading.Thread(
+            target=self._watch,
+            name="loop-monitor",
+            daemon=True,
+        )
+        self._watchdog.start()
+        logger.info(
+            f"Loop monitor started: threshold {self.config.threshold_ms} ms"
+        )
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+
+        self._stop.set()
+        self._heartbeat.cancel()
+        try:
+            await self._heartbeat
+        except asyncio.CancelledError:
+            pass
+        self._heartbeat = None
+        self._watchdog.join(timeout=1)
+        self._watchdog = None
+
+    def snapshot(self) -> list[LoopBlock]:
+        with self._lock:
+            blocks = list(self.blocks.values())
+
+        return sorted(blocks, key=lambda block: block.total_ms, reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.blocks.clear()
+
+    def log_report(self, limit: int = 20) -> None:
+        for block in self.snapshot()[:limit]:
+            logger.warning(
+                f"Loop blocked at {block.location}: {block.count} times, "
+                f"total {block.total_ms:.0f} ms, max {block.max_ms:.0f} ms"
+            )
+
+    async def _beat(self) -> None:
+        interval = self.config.interval_ms / 1000
+
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+
+            with self._lock:
+                lag_ms = (now - self._last_beat - interval) * 1000
+                pending, self._pending = self._pending, None
+                self._last_beat = now
+
+            if lag_ms < self.config.threshold_ms:
+                continue
+
+            # Watchdog may miss a block that ended between two of its checks
+            location, stack = pending or ("<unknown>", [])
+            self._record(location, stack, lag_ms)
+
+    def _watch(self) -> None:
+        interval = self.config.interval_ms / 1000
+        threshold = self.config.threshold_ms / 1000
+
+        while not self._stop.wait(interval / 2):
+            with self._lock:
+                lag = time.monotonic() - self._last_beat - interval
+                if lag < threshold or self._pending is not None:
+                    continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+
+            pending = self._describe(frame)
+            with self._lock:
+                self._pending = pending
+
+    def _describe(self, frame) -> tuple[str, list[str]]:
+        summary = traceback.extract_stack(frame)[-self.config.stack_limit:]
+        stack = [
+            f"{entry.filename}:{entry.lineno} in {entry.name}"
+            for entry in summary
+        ]
+
+        for entry in reversed(summary):
+            path = Path(entry.filename)
+            if "site-packages" in path.parts:
+                continue
+            if path.is_relative_to(PROJECT_ROOT):
+                location = (
+                    f"{path.relative_to(PROJECT_ROOT)}:{entry.lineno} "
+                    f"in {entry.name}"
+                )
+                return location, stack
+
+        return (stack[-1] if stack else "<unknown>"), stack
+
+    def _record(self, location: str, stack: list[str], duration_ms: float) -> None:
+        with self._lock:
+            block = self.blocks.get(location)
+            if block is None:
+                block = self.blocks[location] = LoopBlock(location)
+
+            block.count += 1
+            block.total_ms += duration_ms
+            if duration_ms >= block.max_ms:
+                block.max_ms = duration_ms
+                block.stack = stack
+
+        logger.warning(f"Event loop blocked {duration_ms:.0f} ms at {location}")
+
+
+loop_monitor = LoopMonitor(settings.loop_monitor)
@@ -0,0 +1,279 @@
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable
+
+import aiohttp
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    write_to_textfile,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.config import settings
+
+# Процессы uvicorn/gunicorn и prefork-воркеры Celery пишут значения в общий
+# каталог PROMETHEUS_MULTIPROC_DIR, выдача собирает их вместе. Каталог
+# задается до старта процессов и очищается при перезапуске сервиса
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# HTTP API
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "API request latency by route template",
+    ["method", "route", "status"],
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "API requests being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# Исходящие запросы к внешним сервисам (1C, UDS, CDEK, FreedomPay)
+
+upstream_request_duration = Histogram(
+    "http_client_request_duration_seconds",
+    "Outbound request latency by upstream",
+    ["upstream", "method", "status"],
+)
+
+# 1C import stages
+
+sync_stage_duration = Gauge(
+    "sync_stage_duration_seconds",
+    "Duration of the last run of a 1C import stage",
+    ["stage"],
+    multiprocess_mode="mostrecent",
+)
+sync_stage_rows = Gauge(
+    "sync_stage_rows",
+    "Rows processed by the last run of a 1C import stage",
+    ["stage", "kind"],
+    multiprocess_mode="mostrecent",
+)
+sync_stage_queries = Gauge(
+    "sync_stage_queries",
+    "SQL statements run by the last run of a 1C import stage",
+    ["stage"],
+    multiprocess_mode="mostrecent",
+)
+sync_last_success = Gauge(
+    "sync_last_success_timestamp_seconds",
+    "Unix time of the last successful 1C import cycle",
+    multiprocess_mode="max",
+)
+
+# Celery
+
+celery_task_duration = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time",
+    ["task"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+celery_tasks = Counter(
+    "celery_tasks",
+    "Finished Celery tasks by state",
+    ["task", "state"],
+)
+
+# Password hashing thread pool (core/authentication/password.py)
+
+password_hash_queue_time = Histogram(
+    "password_hash_queue_seconds",
+    "Wait for a free password hashing thread",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+password_hash_run_time = Histogram(
+    "password_hash_duration_seconds",
+    "Password hash or verification run time in the thread pool",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+password_hash_in_flight = Gauge(
+    "password_hash_in_flight",
+    "Password hash and verification calls queued or running",
+    multiprocess_mode="livesum",
+)
+
+# Pools and caches of the process
+
+db_pool_connections = Gauge(
+    "db_pool_connections",
+    "SQLAlchemy pool connections by state",
+    ["engine", "state"],
+    multiprocess_mode="livesum",
+)
+cache_hits = Counter("cache_hits", "Cache hits", ["cache"])
+cache_misses = Counter("cache_misses", "Cache misses", ["cache"])
+
+
+# Значения пулов и кэшей читаются при сборе, без хуков на горячем пути
+
+_pools: dict[str, AsyncEngine] = {}
+_caches: dict[str, Callable[[], tuple[int, int]]] = {}
+# Уже переданные в счетчики (hits, misses) каждого кэша
+_caches_seen: dict[str, tuple[int, int]] = {}
+_process_refreshed_at = 0.0
+
+
+def refresh_process_metrics() -> None:
+    global _process_refreshed_at
+    _process_refreshed_at = time.monotonic()
+
+    for name, engine in _pools.items():
+        pool = engine.sync_engine.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        db_pool_connections.labels(name, "size").set(pool.size())
+        db_pool_connections.labels(name, "checked_out").set(pool.checkedout())
+        db_pool_connections.labels(name, "checked_in").set(pool.checkedin())
+        # overflow() отрицательный, пока пул не заполнен до size
+        db_pool_connections.labels(name, "overflow").set(max(pool.overflow(), 0))
+
+    for name, stats in _caches.items():
+        hits, misses = stats()
+        seen_hits, seen_misses = _caches_seen.get(name, (0, 0))
+        # labels() заводит счетчик с нулем еще до первого попадания
+        cache_hits.labels(name).inc(max(hits - seen_hits, 0))
+        cache_misses.labels(name).inc(max(misses - seen_misses, 0))
+        _caches_seen[name] = (hits, misses)
+
+
+def _exposed_registry() -> CollectorRegistry:
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render() -> bytes:
+    """Metrics of this process, or of all processes in multiprocess mode."""
+    refresh_process_metrics()
+    return generate_latest(_exposed_registry())
+
+
+def mark_process_dead(pid: int | None = None) -> None:
+    """Drops live gauges of an exited process in multiprocess mode."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def watch_pool(name: str, engine: AsyncEngine) -> None:
+    _pools[name] = engine
+
+
+def watch_cache(name: str, stats: Callable[[], tuple[int, int]]) -> None:
+    """`stats` returns (hits, misses) since start."""
+    _caches[name] = stats
+
+
+def upstream_trace(upstream: str) -> aiohttp.TraceConfig:
+    """Trace config for an aiohttp session that talks to one upstream."""
+    trace = aiohttp.TraceConfig(
+        trace_config_ctx_factory=lambda trace_request_ctx: SimpleNamespace(
+            started=0.0
+        )
+    )
+
+    async def on_request_start(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        upstream_request_duration.labels(
+            upstream=upstream,
+            method=params.method,
+            status=params.response.status,
+        ).observe(time.perf_counter() - ctx.started)
+
+    async def on_request_exception(session, ctx, params):
+        upstream_request_duration.labels(
+            upstream=upstream,
+            method=params.method,
+            status=type(params.exception).__name__,
+        ).observe(time.perf_counter() - ctx.started)
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
+
+
+def upstream_response_hook(upstream: str) -> Callable:
+    """`requests` response hook, for the sync 1C calls."""
+
+    def hook(response, *args, **kwargs):
+        upstream_request_duration.labels(
+            upstream=upstream,
+            method=response.request.method,
+            status=response.status_code,
+        ).observe(response.elapsed.total_seconds())
+
+    return hook
+
+
+def textfile_path(job: str) -> Path | None:
+    if settings.metrics.textfile_dir is None:
+        return None
+    return settings.metrics.textfile_dir / f"{job}.prom"
+
+
+def write_textfile(job: str) -> None:
+    """
+    Dumps the metrics for the node_exporter textfile collector, for
+    processes without an HTTP port (1C import, Celery workers).
+    """
+    path = textfile_path(job)
+    if path is None:
+        return
+    refresh_process_metrics()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_to_textfile(str(path), _exposed_registry())
+
+
+class MetricsMiddleware:
+    """Request latency per route template (not raw path, to bound cardinality)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = http_requests_in_progress.labels(method=method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            route = scope.get("route")
+            http_request_duration.labels(
+                method=method,
+                route=getattr(route, "path", "<unmatched>"),
+                status=status_code,
+            ).observe(time.perf_counter() - started)
+            # Выдачу собирает один процесс, пулы и кэши остальных
+            # попадают в нее через общий каталог
+            if MULTIPROCESS and time.monotonic() - _process_refreshed_at > 1:
+                refresh_process_metrics()
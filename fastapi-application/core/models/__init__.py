@@ -13,6 +13,11 @@ __all__ = (
     "Cart",
     "Order",
     "Banner",
+    "CdekCity",
+    "ShipmentStatus",
+    "OutboxMessage",
+    "PaymentWebhookReceipt",
+    "OrderPaymentEvent",
 )
 
 from .access_token import AccessToken
@@ -24,4 +29,7 @@ from .category import Group, Category, CategoryProperty, Value
 from .product import Product
 from .cart import Cart
 from .order import Order
-from .banner import Banner
\ No newline at end of file
+from .banner import Banner
+from .delivery import CdekCity, ShipmentStatus
+from .outbox import OutboxMessage
+from .payment import PaymentWebhookReceipt, OrderPaymentEvent
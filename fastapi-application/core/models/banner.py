@@ -19,7 +19,9 @@ banner_products = Table(
     "banner_products",
     Base.metadata,
     Column("banner_id", ForeignKey("banners.id"), primary_key=True),
-    Column("product_id", ForeignKey("products.id"), primary_key=True)
+    Column(
+        "product_id", ForeignKey("products.id"), primary_key=True, index=True
+    ),
 )
 
 
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -12,7 +12,7 @@ if TYPE_CHECKING:
 
 
 class Cart(Base, IdIntPkMixin):
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     user: Mapped["User"] = relationship(back_populates="cart", single_parent=True, lazy="joined")
     products: Mapped[list["CartProduct"]] = relationship(
         back_populates="cart",
@@ -24,11 +24,19 @@ class Cart(Base, IdIntPkMixin):
 
 
 class CartProduct(Base, IdIntPkMixin):
+    __table_args__ = (
+        Index(
+            "ix_cart_products_cart_id_product_variation_id",
+            "cart_id",
+            "product_variation_id",
+        ),
+    )
+
     cart_id: Mapped[int] = mapped_column(ForeignKey("carts.id"))
     cart: Mapped["Cart"] = relationship(back_populates="products")
 
     product_variation_id: Mapped[int] = mapped_column(
-        ForeignKey("product_variations.id")
+        ForeignKey("product_variations.id"), index=True
     )
     product_variation: Mapped["ProductVariation"] = relationship(
         back_populates="cart_products",
@@ -38,6 +46,7 @@ class CartProduct(Base, IdIntPkMixin):
     parent_cart_product_id: Mapped[int | None] = mapped_column(
         ForeignKey("cart_products.id"),
         nullable=True,
+        index=True,
     )
     parent: Mapped[Optional["CartProduct"]] = relationship(
         back_populates="children", remote_side="CartProduct.id"
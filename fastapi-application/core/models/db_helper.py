@@ -1,15 +1,104 @@
-from typing import AsyncGenerator
+import itertools
+from typing import AsyncGenerator, Sequence
 
+from fastapi import Request
+from fastapi.security.utils import get_authorization_scheme_param
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncEngine,
     async_sessionmaker,
     AsyncSession,
 )
-from sqlalchemy.orm import sessionmaker
-
+from sqlalchemy.orm import ORMExecuteState, Session
 
+from core import metrics
+from core.authentication.strategy import get_token_user_id
 from core.config import settings
+from core.redis_helper import redis_helper
+from core.request_timing import watch_engine
+from core.types.user_id import UserIdType
+
+# Set for read_your_writes_seconds after the user's request wrote to the
+# primary; while it exists the user's reads go to the primary too
+RECENT_WRITE_KEY = "db:recent_write:{user_id}"
+
+
+# Сессия запроса отмечает в request.state, что писала в primary
+def _mark_request_write(session: Session) -> None:
+    request_state = session.info.get("request_state")
+    if request_state is not None:
+        request_state.db_write = True
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    _mark_request_write(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_execute(orm_execute_state: ORMExecuteState) -> None:
+    if not orm_execute_state.is_select:
+        _mark_request_write(orm_execute_state.session)
+
+
+class QueryCacheStats:
+    """
+    Hit counters for SQLAlchemy's compiled cache and asyncpg's prepared
+    statement cache. A low hit rate means queries are built with a
+    different shape on each call.
+    """
+
+    def __init__(self) -> None:
+        self.compiled_hits = 0
+        self.compiled_misses = 0
+        self.prepared_hits = 0
+        self.prepared_misses = 0
+
+    def watch(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context.cache_hit is CacheStats.CACHE_HIT:
+            self.compiled_hits += 1
+        elif context.cache_hit is CacheStats.CACHE_MISS:
+            self.compiled_misses += 1
+
+        # Тот же ключ, по которому кэширует адаптер asyncpg
+        cache = getattr(
+            conn.connection.dbapi_connection, "_prepared_statement_cache", None
+        )
+        if cache is None:
+            return
+        if statement in cache:
+            self.prepared_hits += 1
+        else:
+            self.prepared_misses += 1
+
+    @staticmethod
+    def _ratio(hits: int, misses: int) -> float | None:
+        total = hits + misses
+        return hits / total if total else None
+
+    def as_dict(self) -> dict:
+        return {
+            "compiled_hits": self.compiled_hits,
+            "compiled_misses": self.compiled_misses,
+            "compiled_hit_ratio": self._ratio(
+                self.compiled_hits, self.compiled_misses
+            ),
+            "prepared_hits": self.prepared_hits,
+            "prepared_misses": self.prepared_misses,
+            "prepared_hit_ratio": self._ratio(
+                self.prepared_hits, self.prepared_misses
+            ),
+        }
+
+    def reset(self) -> None:
+        self.__init__()
 
 
 class DatabaseHelper:
@@ -20,28 +109,160 @@ class DatabaseHelper:
         echo_pool: bool = False,
         pool_size: int = 5,
         max_overflow: int = 10,
+        replica_urls: Sequence[str] = (),
+        replica_pool_size: int = 5,
+        replica_max_overflow: int = 10,
+        read_your_writes_seconds: int = 10,
+        query_cache_size: int = 500,
+        prepared_statement_cache_size: int = 100,
     ) -> None:
+        cache_options = {
+            "query_cache_size": query_cache_size,
+            "connect_args": {
+                "prepared_statement_cache_size": prepared_statement_cache_size,
+            },
+        }
         self.engine: AsyncEngine = create_async_engine(
             url=url,
             echo=echo,
             echo_pool=echo_pool,
             pool_size=pool_size,
             max_overflow=max_overflow,
+            **cache_options,
+        )
+        self.session_factory = self._make_session_factory(self.engine)
+
+        self.replica_engines: list[AsyncEngine] = [
+            create_async_engine(
+                url=replica_url,
+                echo=echo,
+                echo_pool=echo_pool,
+                pool_size=replica_pool_size,
+                max_overflow=replica_max_overflow,
+                **cache_options,
+            )
+            for replica_url in replica_urls
+        ]
+        self._replica_session_factories = itertools.cycle(
+            [self._make_session_factory(engine) for engine in self.replica_engines]
+        )
+        self.read_your_writes_seconds = read_your_writes_seconds
+
+        self.cache_stats = QueryCacheStats()
+        for engine in (self.engine, *self.replica_engines):
+            self.cache_stats.watch(engine)
+            watch_engine(engine)
+
+        metrics.watch_pool("primary", self.engine)
+        for num, engine in enumerate(self.replica_engines):
+            metrics.watch_pool(f"replica_{num}", engine)
+        metrics.watch_cache(
+            "sqlalchemy_compiled",
+            lambda: (self.cache_stats.compiled_hits, self.cache_stats.compiled_misses),
         )
-        self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
-            bind=self.engine,
+        metrics.watch_cache(
+            "asyncpg_prepared",
+            lambda: (self.cache_stats.prepared_hits, self.cache_stats.prepared_misses),
+        )
+
+    @staticmethod
+    def _make_session_factory(
+        engine: AsyncEngine,
+    ) -> async_sessionmaker[AsyncSession]:
+        return async_sessionmaker(
+            bind=engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
 
+    @property
+    def has_replicas(self) -> bool:
+        return bool(self.replica_engines)
+
     async def dispose(self) -> None:
         await self.engine.dispose()
+        for engine in self.replica_engines:
+            await engine.dispose()
+
+    async def session_getter(
+        self,
+        request: Request,
+    ) -> AsyncGenerator[AsyncSession, None]:
+        # FastAPI caches dependencies per request, so every dependency of a
+        # request shares this session. The connection is checked out on the
+        # first query, not here.
+        async with self.session_factory(
+            info={"request_state": request.state}
+        ) as session:
+            yield session
 
-    async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
-        async with self.session_factory() as session:
+    async def read_session_factory(
+        self,
+        request: Request | None = None,
+    ) -> async_sessionmaker[AsyncSession]:
+        """Replica for read-only work, primary if none or the user just wrote."""
+        if not self.has_replicas:
+            return self.session_factory
+
+        if request is not None and await self._has_recent_write(request):
+            return self.session_factory
+
+        return next(self._replica_session_factories)
+
+    async def read_session_getter(
+        self,
+        request: Request,
+    ) -> AsyncGenerator[AsyncSession, None]:
+        # Только для чтения: сессия может смотреть в реплику
+        session_factory = await self.read_session_factory(request)
+        async with session_factory() as session:
             yield session
 
+    @staticmethod
+    async def _request_user_id(request: Request) -> UserIdType | None:
+        # Клиенты ходят с bearer-токеном, cookies у них нет
+        scheme, token = get_authorization_scheme_param(
+            request.headers.get("Authorization")
+        )
+        if scheme.lower() != "bearer" or not token:
+            return None
+
+        return await get_token_user_id(token)
+
+    async def mark_recent_write(self, request: Request) -> None:
+        if not getattr(request.state, "db_write", False):
+            return
+
+        user_id = await self._request_user_id(request)
+        if user_id is None:
+            return
+
+        try:
+            await redis_helper.client.set(
+                RECENT_WRITE_KEY.format(user_id=user_id),
+                1,
+                ex=self.read_your_writes_seconds,
+            )
+        except RedisError as e:
+            logger.warning(f"Can't pin reads to the primary: {e}")
+
+    async def _has_recent_write(self, request: Request) -> bool:
+        user_id = await self._request_user_id(request)
+        if user_id is None:
+            return False
+
+        try:
+            return bool(
+                await redis_helper.client.exists(
+                    RECENT_WRITE_KEY.format(user_id=user_id)
+                )
+            )
+        except RedisError as e:
+            # Без метки читаем из primary: лишняя нагрузка лучше устаревших данных
+            logger.warning(f"Can't check recent writes: {e}")
+            return True
+
 
 db_helper = DatabaseHelper(
     url=str(settings.db.url),
@@ -49,14 +270,10 @@ db_helper = DatabaseHelper(
     echo_pool=settings.db.echo_pool,
     pool_size=settings.db.pool_size,
     max_overflow=settings.db.max_overflow,
+    replica_urls=[str(replica_url) for replica_url in settings.db.replica_urls],
+    replica_pool_size=settings.db.replica_pool_size,
+    replica_max_overflow=settings.db.replica_max_overflow,
+    read_your_writes_seconds=settings.db.read_your_writes_seconds,
+    query_cache_size=settings.db.query_cache_size,
+    prepared_statement_cache_size=settings.db.prepared_statement_cache_size,
 )
-
-engine = create_async_engine(str(settings.db.url), echo=True)
-AsyncSessionLocal = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
-)
-
-# Зависимость для получения сессии
-async def get_db_session() -> AsyncSession:
-    async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
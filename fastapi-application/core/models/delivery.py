@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, String, Text, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models import Base
+from core.models.mixins.id_int_pk import IdIntPkMixin
+
+
+class CdekCity(Base, IdIntPkMixin):
+    """Local copy of the CDEK city directory, used for city suggestions."""
+
+    __tablename__ = "cdek_cities"
+    __table_args__ = (
+        # prefix search: lower(full_name) LIKE 'бишк%'
+        Index(
+            "ix_cdek_cities_country_code_full_name_prefix",
+            "country_code",
+            text("lower(full_name) text_pattern_ops"),
+        ),
+        # substring/typo search, needs pg_trgm
+        Index(
+            "ix_cdek_cities_full_name_trgm",
+            "full_name",
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
+    )
+
+    city_uuid: Mapped[str] = mapped_column(unique=True)
+    code: Mapped[int]
+    city: Mapped[str]
+    full_name: Mapped[str]
+    country_code: Mapped[str] = mapped_column(String(2))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.utcnow()
+    )
+
+
+class ShipmentStatus(Base, IdIntPkMixin):
+    """Last known CDEK status of an order shipment, kept fresh by a poller."""
+
+    __tablename__ = "shipment_statuses"
+
+    order_id: Mapped[int] = mapped_column(
+        ForeignKey("orders.id", ondelete="CASCADE"), unique=True
+    )
+    sdek_id: Mapped[str] = mapped_column(index=True)
+    # Empty until the first successful check
+    code: Mapped[str | None]
+    name: Mapped[str | None]
+    # Status as returned by CDEK (entity.statuses[0])
+    data: Mapped[dict | None] = mapped_column(JSON)
+    is_final: Mapped[bool] = mapped_column(default=False, index=True)
+    # Set on every check, failed ones too, so the poller moves on
+    checked_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.utcnow()
+    )
+    # Failed checks in a row; reset by a successful one
+    failures: Mapped[int] = mapped_column(default=0, server_default="0")
+    last_error: Mapped[str | None] = mapped_column(Text)
@@ -41,13 +41,23 @@ class Order(Base, IdIntPkMixin):
     total_price: Mapped[float]
     promo_code: Mapped[str | None]
     code_1c: Mapped[str | None]
-    sdek_id: Mapped[str | None]
+    sdek_id: Mapped[str | None] = mapped_column(index=True)
     delivery: Mapped[bool] = mapped_column(default=True)
     discount: Mapped[int] = mapped_column(default=0)
     final_price: Mapped[float]
     uds_transaction_id: Mapped[int | None] = mapped_column(default=None)
-    payment_data: Mapped[dict | None] = mapped_column(JSON, nullable=True)
-    payment_responses: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # Legacy payment history, moved to order_payment_events. No longer
+    # written; deferred so order reads don't load it.
+    payment_data: Mapped[dict | None] = mapped_column(
+        JSON, nullable=True, deferred=True
+    )
+    payment_responses: Mapped[dict | None] = mapped_column(
+        JSON, nullable=True, deferred=True
+    )
+    # Stock of the order lines is held for the order until this moment
+    reserved_until: Mapped[datetime | None] = mapped_column(
+        DateTime, default=None, index=True
+    )
 
     created_at = mapped_column(DateTime, default=lambda: datetime.utcnow())
     updated_at = mapped_column(
@@ -55,7 +65,7 @@ class Order(Base, IdIntPkMixin):
     )
 
 
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     user: Mapped["User"] = relationship(back_populates="orders", lazy="joined")
 
     products: Mapped[list["OrderProduct"]] = relationship(
@@ -64,11 +74,11 @@ class Order(Base, IdIntPkMixin):
 
 
 class OrderProduct(Base, IdIntPkMixin):
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), index=True)
     order: Mapped["Order"] = relationship(back_populates="products", lazy="joined")
 
     product_variation_id: Mapped[int] = mapped_column(
-        ForeignKey("product_variations.id")
+        ForeignKey("product_variations.id"), index=True
     )
     product_variation: Mapped["ProductVariation"] = relationship(
         back_populates="order_products",
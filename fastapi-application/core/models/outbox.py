@@ -0,0 +1,50 @@
+import enum
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Index, Text, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models import Base
+from core.models.mixins.id_int_pk import IdIntPkMixin
+
+
+class OutboxTopic(str, enum.Enum):
+    create_1c_order = "1c.create_order"
+    create_cdek_order = "cdek.create_order"
+    create_uds_transaction = "uds.create_transaction"
+    refund_uds_transaction = "uds.refund_transaction"
+
+
+class OutboxStatus(str, enum.Enum):
+    pending = "pending"
+    done = "done"
+    dead = "dead"
+
+
+class OutboxMessage(Base, IdIntPkMixin):
+    """
+    Side effect to run after a transaction commits. Written in the same
+    transaction as the change that caused it, delivered by the outbox worker.
+    """
+
+    __table_args__ = (
+        Index(
+            "ix_outbox_messages_pending",
+            "topic",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    topic: Mapped[str]
+    payload: Mapped[dict] = mapped_column(JSON)
+    status: Mapped[OutboxStatus] = mapped_column(default=OutboxStatus.pending)
+    attempts: Mapped[int] = mapped_column(default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.utcnow()
+    )
+    last_error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.utcnow()
+    )
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime)
@@ -0,0 +1,51 @@
+import enum
+from datetime import datetime
+
+from sqlalchemy import JSON, BigInteger, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models import Base
+from core.models.mixins.id_int_pk import IdIntPkMixin
+
+
+class PaymentWebhookReceipt(Base, IdIntPkMixin):
+    """
+    Signed answer already given to a FreedomPay result_url callback.
+    Retries of the same callback get it back without touching the order.
+    """
+
+    __table_args__ = (
+        UniqueConstraint("pg_order_id", "pg_payment_id", "pg_result"),
+    )
+
+    pg_order_id: Mapped[str]
+    pg_payment_id: Mapped[int] = mapped_column(BigInteger)
+    pg_result: Mapped[int]
+    response_xml: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.utcnow()
+    )
+
+
+class PaymentEventKind(str, enum.Enum):
+    callback = "callback"
+    response = "response"
+
+
+class OrderPaymentEvent(Base, IdIntPkMixin):
+    """
+    Append-only history of payment callbacks and our answers to them.
+    Replaces the payment_data/payment_responses JSON lists on orders.
+    """
+
+    order_id: Mapped[int] = mapped_column(
+        ForeignKey("orders.id", ondelete="CASCADE"), index=True
+    )
+    kind: Mapped[PaymentEventKind]
+    # Callback form data
+    data: Mapped[dict | None] = mapped_column(JSON)
+    # Response XML
+    response_text: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.utcnow()
+    )
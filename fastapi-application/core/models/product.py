@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, DateTime, Text, UniqueConstraint
+from sqlalchemy import ForeignKey, DateTime, Index, Text, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -20,6 +20,16 @@ if TYPE_CHECKING:
 
 class Product(Base, IdIntPkMixin):
     __tablename__ = "products"
+    __table_args__ = (
+        # Листинг каталога: активные товары по категории/бренду, новинки
+        Index(
+            "ix_products_listing",
+            "category_id",
+            "brand_id",
+            "created_at",
+            postgresql_where=text("active"),
+        ),
+    )
 
     title: Mapped[str]
     title_ky: Mapped[str] = mapped_column(nullable=True)
@@ -31,7 +41,9 @@ class Product(Base, IdIntPkMixin):
     composition: Mapped[str | None] = mapped_column(Text, nullable=True)
     uuid_1c: Mapped[str] = mapped_column(unique=True)
 
-    brand_id: Mapped[int] = mapped_column(ForeignKey("brands.id"), nullable=True)
+    brand_id: Mapped[int] = mapped_column(
+        ForeignKey("brands.id"), nullable=True, index=True
+    )
     brand: Mapped["Brand"] = relationship(back_populates="products", lazy="joined")
 
     category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"))
@@ -104,6 +116,16 @@ class ProductImage(Base, IdIntPkMixin):
 
 class ProductVariation(Base, IdIntPkMixin):
     __tablename__ = "product_variations"
+    __table_args__ = (
+        # JOIN products -> variations с условиями листинга (наличие, цена)
+        Index(
+            "ix_product_variations_listing",
+            "product_id",
+            "active",
+            "quantity",
+            "price",
+        ),
+    )
 
     name: Mapped[str]
     price: Mapped[float]
@@ -154,6 +176,13 @@ class ProductProperty(Base, IdIntPkMixin):
 
     __table_args__ = (
         UniqueConstraint("variation_id", "name", "value", name="uix_variation_name_value"),
+        # Фильтр по свойствам идёт от (name, value) к вариациям
+        Index(
+            "ix_product_properties_name_value_variation_id",
+            "name",
+            "value",
+            "variation_id",
+        ),
     )
 
     def __repr__(self):
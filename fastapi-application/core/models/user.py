@@ -21,7 +21,9 @@ user_favorites = Table(
     "user_favorites",
     Base.metadata,
     Column("user_id", ForeignKey("users.id"), primary_key=True),
-    Column("product_id", ForeignKey("products.id"), primary_key=True),
+    Column(
+        "product_id", ForeignKey("products.id"), primary_key=True, index=True
+    ),
 )
 
 
@@ -38,9 +40,11 @@ class User(Base, IdIntPkMixin, SQLAlchemyBaseUserTable[UserIdType]):
         lazy="joined",
     )
 
+    # Not loaded with the user: order history is queried by user_id
+    # with pagination (see OrderService)
     orders: Mapped[list["Order"]] = relationship(
         back_populates="user",
-        lazy="joined",
+        lazy="select",
         order_by="Order.id",
     )
 
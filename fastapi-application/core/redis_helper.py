@@ -0,0 +1,43 @@
+from redis.asyncio import Redis, ConnectionPool
+
+from core.config import settings
+
+
+class RedisHelper:
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 50,
+        socket_timeout: float = 2.0,
+    ) -> None:
+        self.url = url
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self._client: Redis | None = None
+
+    @property
+    def client(self) -> Redis:
+        # Created lazily so that importing modules (celery, scripts)
+        # does not open a pool they never use.
+        if self._client is None:
+            pool = ConnectionPool.from_url(
+                self.url,
+                max_connections=self.max_connections,
+                socket_timeout=self.socket_timeout,
+                socket_connect_timeout=self.socket_timeout,
+            )
+            self._client = Redis(connection_pool=pool)
+
+        return self._client
+
+    async def dispose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+redis_helper = RedisHelper(
+    url=settings.redis.url,
+    max_connections=settings.redis.max_connections,
+    socket_timeout=settings.redis.socket_timeout,
+)
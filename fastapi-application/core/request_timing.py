@@ -0,0 +1,217 @@
+import asyncio
+import functools
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from core.config import RequestTimingConfig, settings
+
+
+@dataclass
+class Timing:
+    started: float = field(default_factory=time.perf_counter)
+    sql_count: int = 0
+    db_ms: float = 0.0
+    pool_ms: float = 0.0
+    endpoint_ms: float = 0.0
+    serialize_ms: float = 0.0
+    # perf_counter() when the endpoint function returned
+    endpoint_finished: float | None = None
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round(self.total_ms, 2),
+            "sql_count": self.sql_count,
+            "db_ms": round(self.db_ms, 2),
+            "pool_ms": round(self.pool_ms, 2),
+            "endpoint_ms": round(self.endpoint_ms, 2),
+            "serialize_ms": round(self.serialize_ms, 2),
+        }
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            (
+                f"db;dur={self.db_ms:.2f};desc=\"{self.sql_count} queries\"",
+                f"pool;dur={self.pool_ms:.2f}",
+                f"app;dur={self.endpoint_ms:.2f}",
+                f"serialize;dur={self.serialize_ms:.2f}",
+                f"total;dur={self.total_ms:.2f}",
+            )
+        )
+
+
+# Timing of the request (or importer stage) being measured, None if not sampled
+current_timing: ContextVar[Timing | None] = ContextVar("current_timing", default=None)
+
+
+@contextmanager
+def track():
+    """
+    Measures SQL inside the block; for code outside HTTP requests.
+    Nested blocks also add their numbers to the enclosing one.
+    """
+    parent = current_timing.get()
+    timing = Timing()
+    token = current_timing.set(timing)
+    try:
+        yield timing
+    finally:
+        current_timing.reset(token)
+        if parent is not None:
+            parent.sql_count += timing.sql_count
+            parent.db_ms += timing.db_ms
+            parent.pool_ms += timing.pool_ms
+
+
+# SQL: время выполнения запросов и ожидания соединения из пула
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timing.get() is not None:
+        context._timing_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = current_timing.get()
+    started = getattr(context, "_timing_started", None)
+    if timing is None or started is None:
+        return
+
+    timing.sql_count += 1
+    timing.db_ms += (time.perf_counter() - started) * 1000
+
+
+def watch_engine(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# Сессия берёт соединение из пула сразу после создания корневой транзакции,
+# разница до after_begin - ожидание пула (и подключение, если оно новое)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _after_transaction_create(session: Session, transaction) -> None:
+    if transaction.parent is None and current_timing.get() is not None:
+        session.info["_checkout_started"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_begin")
+def _after_begin(session: Session, transaction, connection) -> None:
+    started = session.info.pop("_checkout_started", None)
+    timing = current_timing.get()
+    if started is not None and timing is not None:
+        timing.pool_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedRoute(APIRoute):
+    """Records how long the endpoint function itself runs."""
+
+    def get_route_handler(self):
+        call = self.dependant.call
+
+        if getattr(call, "_timed", False):
+            return super().get_route_handler()
+
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    _endpoint_finished(started)
+        else:
+            @functools.wraps(call)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return call(*args, **kwargs)
+                finally:
+                    _endpoint_finished(started)
+
+        timed._timed = True
+        self.dependant.call = timed
+        return super().get_route_handler()
+
+
+def _endpoint_finished(started: float) -> None:
+    timing = current_timing.get()
+    if timing is not None:
+        timing.endpoint_finished = time.perf_counter()
+        timing.endpoint_ms += (timing.endpoint_finished - started) * 1000
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    """Serialisation = response_model validation + JSON rendering."""
+
+    def render(self, content) -> bytes:
+        body = super().render(content)
+
+        timing = current_timing.get()
+        if timing is not None and timing.endpoint_finished is not None:
+            timing.serialize_ms = (time.perf_counter() - timing.endpoint_finished) * 1000
+
+        return body
+
+
+class RequestTimingMiddleware:
+    """
+    Measures sampled requests: SQL count and time, pool wait, endpoint and
+    serialisation time. Adds a Server-Timing header and logs the numbers
+    as structured fields.
+    """
+
+    def __init__(self, app, config: RequestTimingConfig = settings.request_timing):
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.config.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        timing = Timing()
+        token = current_timing.set(timing)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.config.server_timing_header:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", timing.server_timing().encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timing.reset(token)
+
+            if timing.total_ms >= self.config.log_min_ms:
+                logger.bind(
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status_code,
+                    **timing.as_dict(),
+                ).info(
+                    f"{scope['method']} {scope['path']} {status_code} "
+                    f"{timing.total_ms:.0f} ms, {timing.sql_count} queries "
+                    f"{timing.db_ms:.0f} ms"
+                )
@@ -1,5 +1,8 @@
+from fastapi import Query
 from pydantic import BaseModel
 
+from core.config import settings
+
 
 class BaseWithORM(BaseModel):
     class Config:
@@ -12,4 +15,10 @@ class PaginationMetadata(BaseModel):
     current_page: int
     total_pages: int
     has_next: bool
-    has_previous: bool
\ No newline at end of file
+    has_previous: bool
+
+
+class KeysetPagination(BaseModel):
+    # id of the last item of the previous page
+    cursor: int | None = Query(None, ge=1)
+    limit: int = Query(settings.page_size_default, ge=1, le=100)
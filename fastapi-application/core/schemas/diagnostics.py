@@ -0,0 +1,35 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class LoopBlockRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    location: str
+    count: int
+    total_ms: float
+    max_ms: float
+    stack: list[str]
+
+
+class LoopMonitorRead(BaseModel):
+    enabled: bool
+    threshold_ms: int
+    blocks: list[LoopBlockRead]
+
+
+class QueryCacheRead(BaseModel):
+    compiled_hits: int
+    compiled_misses: int
+    compiled_hit_ratio: float | None
+    prepared_hits: int
+    prepared_misses: int
+    prepared_hit_ratio: float | None
+
+
+class PasswordHashingRead(BaseModel):
+    workers: int
+    calls: int
+    in_flight: int
+    queue_time_avg_ms: float
+    queue_time_max_ms: float
+    run_time_avg_ms: float
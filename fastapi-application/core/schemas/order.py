@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
 
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, ConfigDict, model_validator
 
 from core.schemas.product import ProductImageRead, ProductVariationRead
 
@@ -77,4 +77,30 @@ class OrderUDSDiscountSchema(BaseModel):
 
 class OrderProductReadWithOrderId(OrderProductRead):
     id: int
-    order_id: int
\ No newline at end of file
+    order_id: int
+
+
+class OrderSummaryRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    status: str
+    total_price: int | float
+    discount: int
+    final_price: int | float
+    delivery: bool
+    sdek_id: str | None = None
+    created_at: datetime
+    products_count: int
+
+
+class OrderHistoryPage(BaseModel):
+    items: list[OrderSummaryRead]
+    next_cursor: int | None = None
+
+
+class OrderProductHistoryPage(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    items: list[OrderProductReadWithOrderId]
+    next_cursor: int | None = None
@@ -0,0 +1,117 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import aiohttp
+from loguru import logger
+
+from core.config import UDSConfig, settings
+from core.http_sessions import HttpSessionRegistry, http_sessions
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class UDSUnavailableError(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class UDSResponse:
+    status: int
+    url: str
+    data: Any
+
+
+class UDSClient:
+    """
+    Shared async HTTP client for the UDS partner API.
+
+    Uses the `uds` session of the HttpSessionRegistry (connection limit
+    and timeouts in settings.http_clients.uds), retries with backoff for
+    idempotent calls and a circuit breaker, so a slow or dead UDS does not
+    hold up the event loop or pile up requests.
+    """
+
+    def __init__(
+        self,
+        config: UDSConfig,
+        sessions: HttpSessionRegistry = http_sessions,
+    ) -> None:
+        self.config = config
+        self.sessions = sessions
+        self.auth = aiohttp.BasicAuth(config.username, config.password)
+        self.breaker = CircuitBreaker(
+            name="uds",
+            failure_threshold=config.circuit_failure_threshold,
+            reset_timeout=config.circuit_reset_seconds,
+        )
+
+    def _headers(self) -> dict:
+        return {
+            "Accept": "application/json",
+            "Accept-Charset": "utf-8",
+            "Content-Type": "application/json",
+            "X-Origin-Request-Id": self.config.origin_request_id,
+            "X-Timestamp": datetime.utcnow().isoformat(),
+        }
+
+    async def _send(self, method: str, url: str, **kwargs) -> UDSResponse:
+        async with self.sessions.uds.request(
+            method, url, headers=self._headers(), auth=self.auth, **kwargs
+        ) as response:
+            text = await response.text()
+            try:
+                data = await response.json(content_type=None) if text else None
+            except ValueError:
+                data = None
+            return UDSResponse(
+                status=response.status,
+                url=str(response.url),
+                data=data,
+            )
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        idempotent: bool = False,
+        **kwargs,
+    ) -> UDSResponse:
+        attempts = 1 + (self.config.retries if idempotent else 0)
+
+        for attempt in range(1, attempts + 1):
+            try:
+                with self.breaker.call():
+                    response = await self._send(method, url, **kwargs)
+            except CircuitOpenError as e:
+                raise UDSUnavailableError(str(e)) from e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.breaker.record_failure()
+                error = e
+                logger.warning(
+                    f"UDS {method} {url} failed "
+                    f"(attempt {attempt}/{attempts}): {e!r}"
+                )
+            else:
+                if response.status < 500:
+                    self.breaker.record_success()
+                    return response
+
+                self.breaker.record_failure()
+                error = None
+                logger.warning(
+                    f"UDS {method} {url} returned {response.status} "
+                    f"(attempt {attempt}/{attempts})"
+                )
+                if attempt == attempts:
+                    return response
+
+            if attempt < attempts:
+                await asyncio.sleep(
+                    self.config.retry_backoff_seconds * 2 ** (attempt - 1)
+                )
+
+        raise UDSUnavailableError(f"UDS request failed: {error!r}")
+
+uds_client = UDSClient(settings.uds_config)
@@ -2,40 +2,64 @@ from contextlib import asynccontextmanager
 from fastapi import Request
 import uvicorn
 from fastapi import FastAPI
-from fastapi.responses import ORJSONResponse
 # from sqladmin import Admin
 from fastapi.middleware.cors import CORSMiddleware
 
 from core.admin import create_admin
+from core.authentication.password import password_helper
 from core.config import settings
 from core.celery import app as celery_app
 
 from api import router as api_router
+from api.metrics import router as metrics_router
 from core.models import db_helper
-from core.models.db_helper import AsyncSessionLocal
+from core.http_sessions import http_sessions
+from core.loop_monitor import loop_monitor
+from core.metrics import MetricsMiddleware, mark_process_dead
+from core.request_timing import RequestTimingMiddleware, TimedORJSONResponse
+from core.redis_helper import redis_helper
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
+    http_sessions.startup()
+    if settings.loop_monitor.enabled:
+        loop_monitor.start()
     yield
     # shutdown
+    await loop_monitor.stop()
     await db_helper.dispose()
+    await redis_helper.dispose()
+    await http_sessions.close()
+    password_helper.shutdown()
+    mark_process_dead()
 
 
 main_app = FastAPI(
-    default_response_class=ORJSONResponse,
+    default_response_class=TimedORJSONResponse,
     lifespan=lifespan,
     debug=True
 )
 
-@main_app.middleware("http")
-async def add_session_to_state(request: Request, call_next):
-    async with AsyncSessionLocal() as session:
-        request.state.session = session
-        response = await call_next(request)
+
+async def mark_recent_write(request: Request, call_next):
+    response = await call_next(request)
+    await db_helper.mark_recent_write(request)
+
     return response
 
+
+# Без реплик все читают из primary, метка не нужна
+if db_helper.has_replicas:
+    main_app.middleware("http")(mark_recent_write)
+
+if settings.request_timing.enabled:
+    main_app.add_middleware(RequestTimingMiddleware)
+
+if settings.metrics.enabled:
+    main_app.add_middleware(MetricsMiddleware)
+
 main_app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -55,6 +79,9 @@ main_app.include_router(
     api_router,
 )
 
+if settings.metrics.enabled:
+    main_app.include_router(metrics_router)
+
 admin = create_admin(main_app)
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload
 
@@ -143,11 +143,47 @@ class CartService(CalculateTotalPriceMixin):
         for cart_product_to_delete in current_state.values():
             await self.session.delete(cart_product_to_delete)
 
+    async def _lock_cart(self, cart: Cart) -> None:
+        """
+        Блокирует строку корзины до конца транзакции. Все изменения одной
+        корзины (двойные нажатия, несколько вкладок) выполняются по очереди,
+        поэтому количество и атомайзеры не теряются и не дублируются.
+        """
+        await self.session.execute(
+            select(Cart.id).where(Cart.id == cart.id).with_for_update()
+        )
+
+    async def _get_cart_product(
+            self,
+            cart: Cart,
+            variation_id: int,
+            *options,
+    ) -> CartProduct | None:
+        # populate_existing: позиция могла быть загружена вместе с
+        # пользователем до блокировки, берем актуальное состояние
+        return await self.session.scalar(
+            select(CartProduct)
+            .where(
+                CartProduct.cart_id == cart.id,
+                CartProduct.product_variation_id == variation_id,
+                CartProduct.parent_cart_product_id.is_(None),
+            )
+            .options(selectinload(CartProduct.children), *options)
+            .execution_options(populate_existing=True)
+        )
+
     async def _process_cart_update(self, cart: Cart):
-        """Общая функция для коммита, обновления и пересчета цены."""
-        await self.session.commit()
-        await self.session.refresh(cart)
-        cart.total_price = await self.calculate_total_price(cart)
+        """Пересчитывает сумму в БД и фиксирует изменения одним коммитом."""
+        await self.session.flush()
+        cart.total_price = await self.session.scalar(
+            select(
+                func.coalesce(
+                    func.sum(ProductVariation.price * CartProduct.quantity), 0
+                )
+            )
+            .join(CartProduct.product_variation)
+            .where(CartProduct.cart_id == cart.id)
+        )
         await self.session.commit()
         await self.session.refresh(cart)
 
@@ -178,16 +214,9 @@ class CartService(CalculateTotalPriceMixin):
             ]
         )
         cart = user.cart
+        await self._lock_cart(cart)
 
-        cart_product = await self.session.scalar(
-            select(CartProduct).where(
-                CartProduct.cart_id == cart.id,
-                CartProduct.product_variation_id == variation.id
-                )
-            .options(
-                selectinload(CartProduct.children)
-            )
-        )
+        cart_product = await self._get_cart_product(cart, variation.id)
 
         is_new_product = False
 
@@ -218,22 +247,21 @@ class CartService(CalculateTotalPriceMixin):
             data: CartAddProductSchema,
     ) -> Cart:
         cart = user.cart
-        cart_product = await self.session.scalar(
-            select(CartProduct).where(
-                CartProduct.cart_id == cart.id,
-                CartProduct.product_variation_id == data.variation_id
-                )
-            .options(
-                selectinload(CartProduct.children),
-                joinedload(CartProduct.product_variation)
-                .selectinload(ProductVariation.properties),
-                joinedload(CartProduct.product_variation)
-                .joinedload(ProductVariation.product)
-                .joinedload(Product.category)
-                .joinedload(Category.group),
-                )
+        await self._lock_cart(cart)
+
+        cart_product = await self._get_cart_product(
+            cart,
+            data.variation_id,
+            joinedload(CartProduct.product_variation)
+            .selectinload(ProductVariation.properties),
+            joinedload(CartProduct.product_variation)
+            .joinedload(ProductVariation.product)
+            .joinedload(Product.category)
+            .joinedload(Category.group),
         )
         if not cart_product:
+            # Снимаем блокировку
+            await self.session.commit()
             return cart
 
         if data.quantity <= 0:
@@ -256,28 +284,28 @@ class CartService(CalculateTotalPriceMixin):
             data: CartRemoveProductSchema,
     ) -> Cart:
         cart = user.cart
-        cart_product = await self.session.scalar(
-            select(CartProduct).where(
-                CartProduct.cart_id == cart.id,
-                CartProduct.product_variation_id == data.product_variation_id
-                )
+        await self._lock_cart(cart)
+
+        cart_product = await self._get_cart_product(
+            cart, data.product_variation_id
         )
         if cart_product:
             await self.session.delete(cart_product)
             await self._process_cart_update(cart)
+        else:
+            await self.session.commit()
 
         return cart
 
     async def clear_cart(self, user: User) -> Cart:
         cart = user.cart
+        await self._lock_cart(cart)
 
         await self.session.execute(delete(CartProduct).where(CartProduct.cart_id == cart.id))
+        cart.total_price = 0
 
         await self.session.commit()
-
         await self.session.refresh(cart)
-        cart.total_price = await self.calculate_total_price(cart)
-        await self.session.commit()
 
         return cart
 
@@ -1,40 +1,134 @@
-from pprint import pprint
-from typing import List
-from unittest.mock import patch
+import asyncio
+import json
+import secrets
+import time
+from datetime import datetime
+from weakref import WeakKeyDictionary
 
 import aiohttp
 from loguru import logger
-from sqlalchemy import select, desc, asc, Select, and_, func, or_
+from sqlalchemy import select, func, or_, and_, delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload, aliased, contains_eager, load_only
 
-from api.dependencies.pagination import Pagination
-from api.dependencies.product.ordering import Ordering
-from core.filters.products import ProductFilter, PropertyFilter
-from core.models import Product, Category, CategoryProperty, Brand, User, Order
-from core.schemas import PaginationMetadata
-from core.models.product import ProductVariation, ProductProperty
-from core.schemas.product import ProductPropertiesFilter, ProductResponseWithPagination
-import redis
+from redis.exceptions import RedisError
+
+from core.config import settings
+from core.models import Order, CdekCity, ShipmentStatus
+from core.redis_helper import redis_helper
 
 
 
 class DeliveryService:
-    def __init__(self, session: AsyncSession, redis_url, client_id: str, client_secret: str):
+    TOKEN_KEY = "cdek:oauth_token:{client_id}"
+    TOKEN_LOCK_KEY = "cdek:oauth_token_lock:{client_id}"
+    CITIES_PAGE_SIZE = 1000
+
+    # Один запрос за токеном на процесс; между процессами - lock в Redis.
+    # asyncio.Lock привязан к своему event loop, поэтому словарь на каждый loop
+    _token_locks: WeakKeyDictionary[
+        asyncio.AbstractEventLoop, dict[str, asyncio.Lock]
+    ] = WeakKeyDictionary()
+
+    # Снимает lock, только если он еще наш: после ex его мог взять другой процесс
+    RELEASE_LOCK_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(
+            self,
+            session: AsyncSession,
+            client_id: str,
+            client_secret: str,
+            http_session: aiohttp.ClientSession,
+    ):
         self.session: AsyncSession = session
-        self.token: str = ''
-        self.redis = redis.Redis.from_url(redis_url)
+        self.http_session = http_session
+        self.redis = redis_helper.client
 
         self.client_id = client_id
         self.client_secret = client_secret
 
+        self.token_key = self.TOKEN_KEY.format(client_id=client_id)
+        self.token_lock_key = self.TOKEN_LOCK_KEY.format(client_id=client_id)
+
+    async def _get_cached_token(self) -> tuple[str, float] | None:
+        """Возвращает (token, expires_at) из Redis."""
+        try:
+            value = await self.redis.get(self.token_key)
+        except RedisError as e:
+            logger.warning(f"CDEK token cache unavailable: {e}")
+            return None
+
+        if value is None:
+            return None
+
+        data = json.loads(value)
+        return data["access_token"], data["expires_at"]
+
+    @staticmethod
+    def _needs_renewal(expires_at: float) -> bool:
+        return (
+            expires_at - time.time()
+            < settings.sdek_config.token_renew_before_seconds
+        )
+
+    def _token_lock(self) -> asyncio.Lock:
+        locks = self._token_locks.setdefault(asyncio.get_running_loop(), {})
+        return locks.setdefault(self.client_id, asyncio.Lock())
+
     async def get_token(self) -> str:
-        token = self.redis.get(self.token)
-        if token:
-            print('cache token')
-            return token.decode()
+        cached = await self._get_cached_token()
+        if cached and not self._needs_renewal(cached[1]):
+            return cached[0]
+
+        lock = self._token_lock()
+        # Досрочное обновление уже идет в этом процессе, старый токен еще действует
+        if lock.locked() and cached and cached[1] > time.time():
+            return cached[0]
+
+        async with lock:
+            # Пока ждали, токен мог обновить другой запрос
+            cached = await self._get_cached_token()
+            if cached and not self._needs_renewal(cached[1]):
+                return cached[0]
+
+            lock_timeout = settings.sdek_config.token_lock_timeout_seconds
+            lock_value = secrets.token_hex(16)
+            try:
+                acquired = await self.redis.set(
+                    self.token_lock_key, lock_value, nx=True, ex=lock_timeout
+                )
+            except RedisError:
+                return await self.update_token()
+
+            if not acquired:
+                # Токен обновляет другой процесс: старый еще действует -
+                # используем его, иначе ждем новый
+                if cached and cached[1] > time.time():
+                    return cached[0]
+
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(0.1)
+                    cached = await self._get_cached_token()
+                    if cached and cached[1] > time.time():
+                        return cached[0]
+
+                return await self.update_token()
 
-        return await self.update_token()
+            try:
+                return await self.update_token()
+            finally:
+                try:
+                    await self.redis.eval(
+                        self.RELEASE_LOCK_SCRIPT, 1, self.token_lock_key, lock_value
+                    )
+                except RedisError as e:
+                    logger.warning(f"CDEK token cache unavailable: {e}")
 
     async def update_token(self) -> str:
         url = "https://api.cdek.ru/v2/oauth/token"
@@ -47,34 +141,175 @@ class DeliveryService:
             "client_secret": self.client_secret
         }
 
-        async with aiohttp.ClientSession() as http_session:
-            async with http_session.post(url, data=data, headers=headers) as response:
-                if response.status == 200:
-                    json_response = await response.json()
-                    access_token = json_response.get("access_token")
-                    expires_in = json_response.get("expires_in", 3600)
-                    self.redis.set(self.token, access_token, ex=expires_in - 60)
-                    return access_token
-                else:
-                    error_message = await response.text()
-                    raise Exception(f"Failed to update token: {response.status} - {error_message}")
+        async with self.http_session.post(url, data=data, headers=headers) as response:
+            if response.status == 200:
+                json_response = await response.json()
+                access_token = json_response.get("access_token")
+                expires_in = json_response.get("expires_in", 3600)
+                try:
+                    await self.redis.set(
+                        self.token_key,
+                        json.dumps({
+                            "access_token": access_token,
+                            "expires_at": time.time() + expires_in,
+                        }),
+                        ex=expires_in,
+                    )
+                except RedisError as e:
+                    logger.warning(f"CDEK token cache unavailable: {e}")
+                return access_token
+            else:
+                error_message = await response.text()
+                raise Exception(f"Failed to update token: {response.status} - {error_message}")
+
+
+    async def get_status(self, sdek_id: str) -> dict:
+        """
+        Последний статус отправления. Отдается из shipment_statuses,
+        которые обновляет фоновый опрос; в CDEK идем только для
+        отправлений, которых еще нет в таблице.
+        """
+        data = await self.session.scalar(
+            select(ShipmentStatus.data).where(ShipmentStatus.sdek_id == sdek_id)
+        )
+        if data is not None:
+            return data
+
+        status = await self._fetch_status(sdek_id)
 
+        order_id = await self.session.scalar(
+            select(Order.id).where(Order.sdek_id == sdek_id)
+        )
+        if order_id is not None:
+            await self._save_statuses([(order_id, sdek_id, status)])
+            await self.session.commit()
 
-    async def get_status(self, order_id: int) -> Product:
+        return status
+
+    async def _fetch_status(self, sdek_id: str) -> dict:
         token = await self.get_token()
-        url = f"https://api.edu.cdek.ru/v2/orders/{order_id}"
+        url = f"https://api.edu.cdek.ru/v2/orders/{sdek_id}"
         headers = {
             "Authorization": f"Bearer {token}"
         }
-        async with aiohttp.ClientSession() as http_session:
-            async with http_session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    json_response = await response.json()
-                    pprint(json_response)
-                    return json_response['entity']['statuses'][0]
-                else:
-                    error_message = await response.text()
-                    raise Exception(f"Failed to update token: {response.status} - {error_message}")
+        async with self.http_session.get(url, headers=headers) as response:
+            if response.status == 200:
+                json_response = await response.json()
+                return json_response['entity']['statuses'][0]
+            else:
+                error_message = await response.text()
+                raise Exception(f"Failed to get sdek status: {response.status} - {error_message}")
+
+    async def _save_statuses(self, statuses: list[tuple[int, str, dict]]) -> None:
+        final_statuses = settings.sdek_config.shipment_final_statuses
+        checked_at = datetime.utcnow()
+
+        stmt = insert(ShipmentStatus).values([
+            {
+                "order_id": order_id,
+                "sdek_id": sdek_id,
+                "code": status["code"],
+                "name": status.get("name"),
+                "data": status,
+                "is_final": status["code"] in final_statuses,
+                "checked_at": checked_at,
+            }
+            for order_id, sdek_id, status in statuses
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ShipmentStatus.order_id],
+            set_={
+                "sdek_id": stmt.excluded.sdek_id,
+                "code": stmt.excluded.code,
+                "name": stmt.excluded.name,
+                "data": stmt.excluded.data,
+                "is_final": stmt.excluded.is_final,
+                "checked_at": stmt.excluded.checked_at,
+                "failures": 0,
+                "last_error": None,
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def _save_failures(self, failures: list[tuple[int, str, str]]) -> None:
+        checked_at = datetime.utcnow()
+
+        # Последний известный статус не затираем
+        stmt = insert(ShipmentStatus).values([
+            {
+                "order_id": order_id,
+                "sdek_id": sdek_id,
+                "is_final": False,
+                "checked_at": checked_at,
+                "failures": 1,
+                "last_error": error,
+            }
+            for order_id, sdek_id, error in failures
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ShipmentStatus.order_id],
+            set_={
+                "checked_at": stmt.excluded.checked_at,
+                "failures": ShipmentStatus.failures + 1,
+                "last_error": stmt.excluded.last_error,
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def refresh_shipment_statuses(self) -> int:
+        """
+        Обновляет статусы отправлений, которые еще в пути: давно не
+        проверенные первыми, не больше shipment_poll_batch_size за раз.
+        Неудачная проверка тоже отмечается, и отправление уходит в конец
+        очереди, иначе постоянно падающие занимали бы весь batch.
+        """
+        config = settings.sdek_config
+        stmt = (
+            select(Order.id, Order.sdek_id)
+            .outerjoin(ShipmentStatus, ShipmentStatus.order_id == Order.id)
+            .where(
+                Order.sdek_id.is_not(None),
+                or_(
+                    ShipmentStatus.id.is_(None),
+                    and_(
+                        ShipmentStatus.is_final.is_(False),
+                        ShipmentStatus.failures < config.shipment_poll_max_failures,
+                    ),
+                ),
+            )
+            .order_by(ShipmentStatus.checked_at.asc().nulls_first())
+            .limit(config.shipment_poll_batch_size)
+        )
+        shipments = (await self.session.execute(stmt)).all()
+        if not shipments:
+            return 0
+
+        semaphore = asyncio.Semaphore(config.shipment_poll_concurrency)
+
+        async def fetch(sdek_id: str) -> dict:
+            async with semaphore:
+                return await self._fetch_status(sdek_id)
+
+        results = await asyncio.gather(
+            *(fetch(sdek_id) for _, sdek_id in shipments),
+            return_exceptions=True,
+        )
+
+        statuses, failures = [], []
+        for (order_id, sdek_id), result in zip(shipments, results):
+            if isinstance(result, Exception):
+                logger.error(f"Can't get sdek status for order {order_id}: {result}")
+                failures.append((order_id, sdek_id, repr(result)))
+                continue
+            statuses.append((order_id, sdek_id, result))
+
+        if statuses:
+            await self._save_statuses(statuses)
+        if failures:
+            await self._save_failures(failures)
+        await self.session.commit()
+
+        return len(statuses)
 
     async def create_order(self, order: Order):
         products = []
@@ -135,26 +370,143 @@ class DeliveryService:
             "Authorization": f"Bearer {token}"
         }
         print(payload)
-        async with aiohttp.ClientSession() as http_session:
-            async with http_session.post(url, json=payload, headers=headers) as response:
-                if response.status == 200 or response.status == 202:
-                    json_response = await response.json()
-                    logger.info(json_response)
+        async with self.http_session.post(url, json=payload, headers=headers) as response:
+            if response.status == 200 or response.status == 202:
+                json_response = await response.json()
+                logger.info(json_response)
+
+                order.sdek_id = json_response['entity']['uuid']
+                await self.session.commit()
+
+
+            else:
+                error_message = await response.text()
+                logger.error(response.json())
+                raise Exception(f"Failed to create sdek delivery: {response.status} - {error_message}")
+
+
+    async def get_cities(self, name: str, country_code: str = "RU") -> list[dict]:
+        cities = await self._suggest_cities_local(name, country_code)
+        if cities:
+            return cities
+
+        # Справочник еще не загружен или город не найден - спрашиваем CDEK
+        try:
+            return await self._suggest_cities_live(name, country_code)
+        except Exception as e:
+            logger.error(e)
+            return []
+
+    async def _suggest_cities_local(self, name: str, country_code: str) -> list[dict]:
+        name = name.strip().lower()
+        if not name:
+            return []
+
+        pattern = (
+            name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        stmt = (
+            select(CdekCity.city_uuid, CdekCity.code, CdekCity.full_name)
+            .where(CdekCity.country_code == country_code.upper())
+            .limit(settings.sdek_config.cities_suggest_limit)
+        )
+
+        rows = (
+            await self.session.execute(
+                stmt.where(
+                    func.lower(CdekCity.full_name).like(f"{pattern}%", escape="\\")
+                )
+                .order_by(func.length(CdekCity.full_name), CdekCity.full_name)
+            )
+        ).all()
 
-                    order.sdek_id = json_response['entity']['uuid']
-                    await self.session.commit()
+        if not rows:
+            rows = (
+                await self.session.execute(
+                    stmt.where(
+                        CdekCity.full_name.ilike(f"%{pattern}%", escape="\\")
+                    )
+                    .order_by(func.similarity(CdekCity.full_name, name).desc())
+                )
+            ).all()
 
+        return [row._asdict() for row in rows]
 
-                else:
+    async def refresh_cities(self, country_code: str) -> int:
+        """Загружает справочник городов страны из CDEK в cdek_cities."""
+        token = await self.get_token()
+        url = "https://api.edu.cdek.ru/v2/location/cities"
+        headers = {
+            "Authorization": f"Bearer {token}"
+        }
+        started_at = datetime.utcnow()
+        total = 0
+        page = 0
+
+        while True:
+            params = {
+                "country_codes": country_code,
+                "size": self.CITIES_PAGE_SIZE,
+                "page": page,
+            }
+            async with self.http_session.get(url, headers=headers, params=params) as response:
+                if response.status != 200:
                     error_message = await response.text()
-                    logger.error(response.json())
-                    raise Exception(f"Failed to create sdek delivery: {response.status} - {error_message}")
+                    raise Exception(f"Failed to fetch cities: {response.status} - {error_message}")
+                cities = await response.json()
 
+            rows = {
+                city["city_uuid"]: {
+                    "city_uuid": city["city_uuid"],
+                    "code": city["code"],
+                    "city": city["city"],
+                    "full_name": ", ".join(
+                        part for part in (
+                            city.get("city"),
+                            city.get("region"),
+                            city.get("country"),
+                        )
+                        if part
+                    ),
+                    "country_code": country_code,
+                    "updated_at": started_at,
+                }
+                for city in cities
+            }
+            if rows:
+                stmt = insert(CdekCity).values(list(rows.values()))
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[CdekCity.city_uuid],
+                    set_={
+                        "code": stmt.excluded.code,
+                        "city": stmt.excluded.city,
+                        "full_name": stmt.excluded.full_name,
+                        "country_code": stmt.excluded.country_code,
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                )
+                await self.session.execute(stmt)
+
+            total += len(rows)
+            if len(cities) < self.CITIES_PAGE_SIZE:
+                break
+            page += 1
+
+        if total:
+            # Города, которых больше нет в CDEK
+            await self.session.execute(
+                delete(CdekCity).where(
+                    CdekCity.country_code == country_code,
+                    CdekCity.updated_at < started_at,
+                )
+            )
+        await self.session.commit()
 
-    async def get_cities(self, name: str, country_code: str = "RU") -> dict:
+        return total
+
+    async def _suggest_cities_live(self, name: str, country_code: str) -> list[dict]:
         token = await self.get_token()
         url = "https://api.edu.cdek.ru/v2/location/suggest/cities"
-        print(token)
         headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
@@ -164,11 +516,10 @@ class DeliveryService:
             "country_code": country_code
         }
 
-        async with aiohttp.ClientSession() as http_session:
-            async with http_session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_message = await response.text()
-                    logger.error(f"Failed to fetch cities: {response.status} - {error_message}")
-                    raise Exception(f"Failed to fetch cities: {response.status} - {error_message}")
+        async with self.http_session.get(url, headers=headers, params=params) as response:
+            if response.status == 200:
+                return await response.json()
+            else:
+                error_message = await response.text()
+                logger.error(f"Failed to fetch cities: {response.status} - {error_message}")
+                raise Exception(f"Failed to fetch cities: {response.status} - {error_message}")
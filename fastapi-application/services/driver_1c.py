@@ -1,16 +1,20 @@
 import asyncio
+import gc
 import json
+from contextlib import contextmanager
 
 import aiohttp
+import orjson
 import requests
 from loguru import logger
-from requests import JSONDecodeError
+from pydantic import ValidationError
 from requests.auth import HTTPBasicAuth
 from sqlalchemy import select, delete, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
+from core.metrics import upstream_response_hook, upstream_trace
 from core.models import Brand, Category, Group, CategoryProperty, Value, \
     Product, Order
 from core.models.product import ProductVariation, ProductProperty, \
@@ -22,13 +26,7 @@ from core.schemas.category import (
     CategoryPropertyCreate,
     ValueRead,
 )
-from core.schemas.product import (
-    ProductCreateSchema,
-    ProductImageCreateSchema,
-    ProductVariationCreateSchema,
-    ProductPropertyCreateSchema,
-    ProductVariationImageCreateSchema,
-)
+from core.schemas.product import ProductCreateSchema
 from core.schemas.schemas_1c import (
     Product1C,
     Variation1C,
@@ -38,17 +36,49 @@ from core.schemas.schemas_1c import (
 )
 
 
+def _parse_error(
+    product_data: dict,
+    variation_data: dict | None,
+    error: str,
+    loc: tuple = (),
+) -> dict:
+    return {
+        "product": product_data.get("code_1c"),
+        "variation": variation_data.get("code_1c") if variation_data else None,
+        "loc": ".".join(str(part) for part in loc),
+        "error": error,
+    }
+
+
+@contextmanager
+def _gc_paused():
+    # Валидация создаёт сотни тысяч объектов, и каждый порог сборщика
+    # запускает обход всего разобранного ответа. Циклов там нет, так что
+    # сборщик на это время можно выключить
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
 class Driver1C:
     AUTH = HTTPBasicAuth(
         settings.config_1c.username,
         settings.config_1c.password,
     )
 
+    def __init__(self, http_session: aiohttp.ClientSession):
+        self.http_session = http_session
+
     @classmethod
     def get_brands(cls):
         response = requests.get(
             url=settings.config_1c.brands_url,
             auth=cls.AUTH,
+            hooks={"response": upstream_response_hook("one_c")},
         )
 
         if response.status_code != 200:
@@ -60,8 +90,8 @@ class Driver1C:
             )
 
         try:
-            data = response.json()
-        except JSONDecodeError:
+            data = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
             logger.exception(
                 f"Can't parse brands. Error code: {response.status_code}\nMessage: {response.text}"
             )
@@ -90,6 +120,7 @@ class Driver1C:
         response = requests.get(
             url=settings.config_1c.categories_url,
             auth=cls.AUTH,
+            hooks={"response": upstream_response_hook("one_c")},
         )
 
         if response.status_code != 200:
@@ -102,8 +133,8 @@ class Driver1C:
             )
 
         try:
-            data = response.json()
-        except JSONDecodeError:
+            data = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
             logger.exception(
                 f"Can't parse categories. Error code: {response.status_code}\n"
                 f"Message: {response.text}"
@@ -162,6 +193,7 @@ class Driver1C:
             url=settings.config_1c.products_url,
             json={"category": category_name},
             auth=cls.AUTH,
+            hooks={"response": upstream_response_hook("one_c")},
         )
 
         if response.status_code != 200:
@@ -170,8 +202,8 @@ class Driver1C:
             )
 
         try:
-            data = response.json()
-        except JSONDecodeError:
+            data = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
             return dict()
 
         return data
@@ -192,24 +224,81 @@ class Driver1C:
                     f"URL: {response.url}\ncategory: {category_name}"
                 )
             try:
-                data = await response.json()
-            except (json.decoder.JSONDecodeError, aiohttp.ContentTypeError):
+                data = orjson.loads(await response.read())
+            except orjson.JSONDecodeError:
                 return
 
             return data
 
     @classmethod
-    async def get_products_by_category_list(cls, categories: list):
-        async with aiohttp.ClientSession() as session:
+    async def get_products_by_category_list(cls, categories: list) -> dict:
+        """-> {category name: response}, without empty responses"""
+        async with aiohttp.ClientSession(
+            trace_configs=[upstream_trace("one_c")]
+        ) as session:
             tasks = [
                 cls.fetch_products(session, category["name"])
                 for category in categories
             ]
             responses = await asyncio.gather(*tasks)
 
-        products = [response for response in responses if response]
+        return {
+            category["name"]: response
+            for category, response in zip(categories, responses)
+            if response
+        }
 
-        return products
+    @staticmethod
+    def _variation_row(variation_data: dict) -> dict:
+        return {
+            "uuid_1c": variation_data["code_1c"],
+            "name": variation_data["name"],
+            "quantity": int(variation_data["quantity"]),
+            "price": variation_data["price"],
+            "sale_quantity": int(variation_data["salequantity"]),
+            "properties": [
+                {"uuid_1c": prop["id"], "name": prop["name"], "value": prop["value"]}
+                for prop in variation_data["properties"]
+            ],
+            "images": [
+                {"url": image["path"], "is_main": image["main"]}
+                for image in variation_data["images"]
+            ],
+        }
+
+    @classmethod
+    def _product_row(
+        cls,
+        product_data: dict,
+        brands_map: dict,
+        categories_map: dict,
+        errors: list[dict],
+    ) -> tuple[dict, list[dict]]:
+        """-> (row for validation, source of each kept variation)"""
+        variations, sources = [], []
+        for variation_data in product_data["variations"]:
+            try:
+                variations.append(cls._variation_row(variation_data))
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append(_parse_error(product_data, variation_data, repr(e)))
+                continue
+            sources.append(variation_data)
+
+        row = {
+            "uuid_1c": product_data["code_1c"],
+            "title": product_data["title"],
+            "description": product_data["description"],
+            "usingmethod": product_data["usingmethod"],
+            "composition": product_data["composition"],
+            "brand_id": brands_map.get((product_data.get("brand") or "").lower()),
+            "category_id": categories_map[product_data["category"]],
+            "images": [
+                {"url": image["path"], "is_main": image["main"]}
+                for image in product_data["images"]
+            ],
+            "variations": variations,
+        }
+        return row, sources
 
     @classmethod
     def parse_products(
@@ -217,74 +306,80 @@ class Driver1C:
         data,
         brands_map: dict,
         categories_map: dict,
+        errors: list[dict] | None = None,
     ) -> list[ProductCreateSchema]:
+        """
+        Invalid variations are dropped, invalid products too; each drop is
+        appended to `errors` as {"product", "variation", "loc", "error"}.
+        """
         if not data:
             return []
+        if errors is None:
+            errors = []
 
         products = []
 
-        for product_data in data["data"]:
-            try:
-                brand_id = brands_map[product_data.get("brand", "").lower()]
-            except KeyError:
-                brand_id = None
-
-            variations = []
-
-            for variation_data in product_data["variations"]:
+        with _gc_paused():
+            for product_data in data["data"]:
                 try:
-                    variation = ProductVariationCreateSchema(
-                        uuid_1c=variation_data["code_1c"],
-                        name=variation_data["name"],
-                        quantity=int(variation_data["quantity"]),
-                        price=variation_data["price"],
-                        sale_quantity=int(variation_data["salequantity"]),
-                        properties=[
-                            ProductPropertyCreateSchema(
-                                uuid_1c=prop["id"],
-                                name=prop["name"],
-                                value=prop["value"],
-                            )
-                            for prop in variation_data["properties"]
-                        ],
-                        images=[
-                            ProductVariationImageCreateSchema(
-                                url=image["path"],
-                                is_main=image["main"],
-                            )
-                            for image in variation_data["images"]
-                        ]
+                    row, variation_sources = cls._product_row(
+                        product_data, brands_map, categories_map, errors
                     )
-                    variations.append(variation)
-                except Exception as e:
-                    with open("errors.txt", "a", encoding="utf-8") as f:
-                        f.write(
-                            f"{product_data}\n{variation_data['code_1c']}\n"
-                            f"{e}\n\n"
-                        )
+                except (KeyError, TypeError, ValueError, AttributeError) as e:
+                    errors.append(_parse_error(product_data, None, repr(e)))
+                    continue
 
-            product = ProductCreateSchema(
-                uuid_1c=product_data["code_1c"],
-                title=product_data["title"],
-                description=product_data["description"],
-                usingmethod=product_data["usingmethod"],
-                composition=product_data["composition"],
-                brand_id=brand_id,
-                category_id=categories_map[product_data["category"]],
-                images=[
-                    ProductImageCreateSchema(
-                        url=image['path'],
-                        is_main=image['main']
-                    )
-                    for image in product_data["images"]
-                ],
-                variations=variations,
-            )
-
-            products.append(product)
+                product = cls._validate_product(
+                    row, product_data, variation_sources, errors
+                )
+                if product is not None:
+                    products.append(product)
 
         return products
 
+    @staticmethod
+    def _validate_product(
+        row: dict,
+        product_data: dict,
+        variation_sources: list[dict],
+        errors: list[dict],
+    ) -> ProductCreateSchema | None:
+        # Товар целиком из dict: вложенные модели строит pydantic-core.
+        # При ошибке в вариациях выкидываем их и валидируем товар ещё раз
+        while True:
+            try:
+                return ProductCreateSchema.model_validate(row)
+            except ValidationError as e:
+                bad_variations = set()
+                for error in e.errors(include_url=False, include_input=False):
+                    loc = error["loc"]
+                    if len(loc) < 2 or loc[0] != "variations":
+                        errors.append(
+                            _parse_error(product_data, None, error["msg"], loc)
+                        )
+                        return None
+                    if loc[1] not in bad_variations:
+                        bad_variations.add(loc[1])
+                        errors.append(
+                            _parse_error(
+                                product_data,
+                                variation_sources[loc[1]],
+                                error["msg"],
+                                loc[2:],
+                            )
+                        )
+
+                row["variations"] = [
+                    variation
+                    for n, variation in enumerate(row["variations"])
+                    if n not in bad_variations
+                ]
+                variation_sources = [
+                    source
+                    for n, source in enumerate(variation_sources)
+                    if n not in bad_variations
+                ]
+
     def _parse_order(self, order: Order) -> Order1C:
         products = []
 
@@ -320,46 +415,54 @@ class Driver1C:
 
         return order_1c
 
-    async def create_1c_order(
-            self,
-            order: Order,
-            retries: int = 3,
-            retry_delay: int = 5
-    ) -> dict:
+    async def _post_orders(self, url: str, payload: dict) -> dict:
+        # Одна попытка: повторы с backoff делает очередь (outbox)
+        async with self.http_session.post(
+                url,
+                json=payload,
+                auth=aiohttp.BasicAuth(
+                    settings.config_1c.username,
+                    settings.config_1c.password,
+                ),
+        ) as response:
+            text = await response.text()
+
+            if response.status != 200:
+                raise Exception(
+                    f"Error create order request. "
+                    f"Error code: {response.status}\n"
+                    f"Message: {text}"
+                )
+
+            try:
+                return json.loads(text)
+            except json.decoder.JSONDecodeError:
+                raise Exception(
+                    f"Error create order request. "
+                    f"Can't parse response. "
+                    f"Message: {text}"
+                )
+
+    async def create_1c_order(self, order: Order) -> dict:
         order_1c = self._parse_order(order)
-        result = None
-        async with aiohttp.ClientSession() as session:
-            for _ in range(retries):
-                async with session.post(
-                        settings.config_1c.order_create_url,
-                        json=order_1c.model_dump(),
-                        auth=aiohttp.BasicAuth(
-                            settings.config_1c.username,
-                            settings.config_1c.password,
-                        ),
-                ) as response:
-                    if not response.status == 200:
-                        logger.error(
-                            f"Error create order request. "
-                            f"Error code: {response.status}\n"
-                            f"Message: {await response.text()}"
-                        )
-                        await asyncio.sleep(retry_delay)
-                        logger.info(f"Retrying... ({_ + 1})")
-                        continue
-
-                    try:
-                        result = await response.json()
-                    except json.decoder.JSONDecodeError:
-                        logger.error(
-                            f"Error create order request. "
-                            f"Can't parse response. "
-                            f"Error code: {response.status}\n"
-                            f"Message: {await response.text()}"
-                        )
-                    break
 
-        return result
+        return await self._post_orders(
+            settings.config_1c.order_create_url,
+            order_1c.model_dump(),
+        )
+
+    async def create_1c_orders(self, orders: list[Order]) -> dict[int, str]:
+        """Отправляет несколько заказов за один запрос. -> {order_id: OrderNumber}"""
+        data = await self._post_orders(
+            settings.config_1c.order_batch_create_url,
+            {"orders": [self._parse_order(order).model_dump() for order in orders]},
+        )
+
+        return {
+            int(item["order_id"]): item["OrderNumber"]
+            for item in data.get("orders", [])
+            if item.get("OrderNumber")
+        }
 
 
 class Saver1C:
@@ -1,30 +1,128 @@
+from datetime import datetime, timedelta
 from typing import Type, Sequence
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, insert, delete, func, exists
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload, lazyload
 
-from core.models import User, Order, Address
+from core.config import settings
+from core.schemas.base import KeysetPagination
+from core.models import User, Order, Address, Product
+from core.models.cart import CartProduct
 from core.models.order import OrderProduct, OrderStatus
-from core.schemas.order import OrderCreate, OrderUDSDiscountSchema
+from core.models.outbox import OutboxTopic
+from core.models.payment import OrderPaymentEvent, PaymentEventKind
+from core.models.product import ProductVariation
+from core.schemas.order import (
+    OrderCreate,
+    OrderUDSDiscountSchema,
+    OrderSummaryRead,
+    OrderHistoryPage,
+    OrderProductHistoryPage,
+)
 from core.schemas.user import AddressRead
 from services.carts import CartService
 from services.mixins.calculate_total_price import CalculateTotalPriceMixin
+from services.outbox import OutboxService
 from services.uds import UDSService
 
 
 class OrderService(CalculateTotalPriceMixin):
+    # Только то, что нужно схемам OrderRead/OrderProductRead. Остальные
+    # связи (заказ -> пользователь -> корзина, вариация -> все ее заказы)
+    # не подгружаются.
+    ORDER_PRODUCT_READ_OPTIONS = (
+        lazyload(OrderProduct.order),
+        joinedload(OrderProduct.product_variation).options(
+            lazyload("*"),
+            selectinload(ProductVariation.properties),
+            selectinload(ProductVariation.images),
+            joinedload(ProductVariation.product).options(
+                lazyload("*"),
+                selectinload(Product.images),
+            ),
+        ),
+    )
+
     def __init__(self, session):
         self.session: AsyncSession = session
         self.cart_service = CartService(session)
 
+    async def _reserve_stock(
+        self,
+        lines: dict[int, int],
+        exclude_order_id: int | None = None,
+    ) -> None:
+        """
+        Проверяет остатки для {variation_id: quantity} с учетом
+        активных резервов других заказов. Строки вариаций блокируются
+        до конца транзакции, поэтому параллельные оформления
+        одних и тех же товаров выполняются по очереди.
+        """
+        rows = await self.session.execute(
+            select(ProductVariation.id, ProductVariation.quantity)
+            .where(ProductVariation.id.in_(list(lines)))
+            .order_by(ProductVariation.id)
+            .with_for_update()
+        )
+        stock = dict(rows.all())
+
+        # Резервы - отдельным запросом после блокировки: снимок запроса с
+        # FOR UPDATE взят до ожидания и не видит заказ, который закоммитил
+        # предыдущий владелец блокировки
+        reserved_stmt = (
+            select(
+                OrderProduct.product_variation_id,
+                func.sum(OrderProduct.quantity),
+            )
+            .join(Order, Order.id == OrderProduct.order_id)
+            .where(
+                OrderProduct.product_variation_id.in_(list(stock)),
+                Order.reserved_until > datetime.utcnow(),
+            )
+            .group_by(OrderProduct.product_variation_id)
+        )
+        if exclude_order_id is not None:
+            reserved_stmt = reserved_stmt.where(Order.id != exclude_order_id)
+        reserved = dict((await self.session.execute(reserved_stmt)).all())
+
+        available = {
+            variation_id: quantity - reserved.get(variation_id, 0)
+            for variation_id, quantity in stock.items()
+        }
+
+        unavailable = [
+            variation_id
+            for variation_id, quantity in lines.items()
+            if available.get(variation_id, 0) < quantity
+        ]
+
+        if unavailable:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": "Not enough stock",
+                    "variation_ids": unavailable,
+                },
+            )
+
+    @staticmethod
+    def _reservation_deadline(seconds: int) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=seconds)
+
     async def create_order_from_cart(
         self, user: User, order_data: OrderCreate
     ) -> Order:
         cart = user.cart
 
-        if await self.cart_service.cart_is_empty(cart):
+        # Все шаги ниже выполняются в одной транзакции. Корзина блокируется
+        # первой: повторное нажатие ждет и видит уже пустую корзину, а
+        # позиции, добавленные после загрузки пользователя, не теряются.
+        await self.cart_service._lock_cart(cart)
+        cart_products = await self._get_locked_cart_products(cart)
+
+        if not cart_products:
             raise HTTPException(status_code=400, detail="Cart is empty")
 
         if order_data.use_saved_address:
@@ -41,39 +139,82 @@ class OrderService(CalculateTotalPriceMixin):
         else:
             address_data = order_data.model_dump(exclude={"use_saved_address"})
 
+        lines = self._order_lines(cart_products)
+        total_price = sum(
+            cart_product.product_variation.price * cart_product.quantity
+            for cart_product in cart_products
+        )
+
+        await self._reserve_stock(lines)
+
         order = Order(
-            user=user,
-            total_price=cart.total_price,
-            final_price=cart.total_price,
+            user_id=user.id,
+            total_price=total_price,
+            final_price=total_price,
+            reserved_until=self._reservation_deadline(
+                settings.checkout.reservation_ttl_seconds
+            ),
             **address_data
         )
+        self.session.add(order)
+        await self.session.flush()
+
+        await self.session.execute(
+            insert(OrderProduct),
+            [
+                {
+                    "order_id": order.id,
+                    "product_variation_id": cart_product.product_variation_id,
+                    "quantity": cart_product.quantity,
+                }
+                for cart_product in cart_products
+            ],
+        )
 
-        for cart_product in cart.products:
-            order.products.append(
-                OrderProduct(
-                    order=order,
-                    product_variation=cart_product.product_variation,
-                    quantity=cart_product.quantity,
-                )
-            )
+        await self.session.execute(
+            delete(CartProduct).where(CartProduct.cart_id == cart.id)
+        )
+        cart.total_price = 0
 
-        self.session.add_all([order, *order.products])
         await self.session.commit()
 
+        self.session.expire(cart, ["products"])
         await self.session.refresh(order)
 
-        total_price = await self.calculate_total_price(cart)
-
-        order.total_price = total_price
-        order.final_price = total_price
-
-        await self.session.commit()
-
-        await self.cart_service.clear_cart(user)
-
         return order
 
-    async def _get_order(self, order_id: int) -> Type[Order]:
+    async def _get_locked_cart_products(self, cart) -> Sequence[CartProduct]:
+        # populate_existing: cart.products загружены до блокировки
+        return (
+            await self.session.scalars(
+                select(CartProduct)
+                .where(CartProduct.cart_id == cart.id)
+                .options(
+                    joinedload(CartProduct.product_variation).lazyload("*"),
+                    lazyload(CartProduct.children),
+                )
+                .order_by(CartProduct.id)
+                .execution_options(populate_existing=True)
+            )
+        ).all()
+
+    @staticmethod
+    def _order_lines(
+        products: list[OrderProduct] | list[CartProduct],
+    ) -> dict[int, int]:
+        lines: dict[int, int] = {}
+        for order_product in products:
+            lines[order_product.product_variation_id] = (
+                lines.get(order_product.product_variation_id, 0)
+                + order_product.quantity
+            )
+        return lines
+
+    async def _get_order(
+        self,
+        order_id: int,
+        for_update: bool = False,
+    ) -> Type[Order]:
         stmt = (
             select(Order)
             .where(Order.id == order_id)
@@ -82,6 +223,10 @@ class OrderService(CalculateTotalPriceMixin):
                 .selectinload(OrderProduct.product_variation)
             )
         )
+        if for_update:
+            stmt = stmt.with_for_update(of=Order).execution_options(
+                populate_existing=True
+            )
         result = await self.session.scalar(stmt)
 
         if not result:
@@ -106,20 +251,100 @@ class OrderService(CalculateTotalPriceMixin):
         await self.session.commit()
 
     async def get_orders(self, user: User) -> Sequence[Order]:
-        stmt = select(Order).where(Order.user_id == user.id)
+        stmt = (
+            select(Order)
+            .where(Order.user_id == user.id)
+            .options(
+                lazyload(Order.user),
+                selectinload(Order.products).options(
+                    *self.ORDER_PRODUCT_READ_OPTIONS
+                ),
+            )
+            .order_by(Order.id)
+        )
         result = await self.session.scalars(stmt)
 
         return result.all()
 
     async def get_order_products_by_user(self, user: User) -> Sequence[OrderProduct]:
-        orders = user.orders
         result = await self.session.scalars(
-            select(OrderProduct).where(
-                OrderProduct.order_id.in_(order.id for order in orders)
+            select(OrderProduct)
+            .join(Order, Order.id == OrderProduct.order_id)
+            .where(Order.user_id == user.id)
+            .options(*self.ORDER_PRODUCT_READ_OPTIONS)
+            .order_by(OrderProduct.id)
+        )
+
+        return result.all()
+
+    async def get_order_history(
+        self,
+        user: User,
+        pagination: KeysetPagination,
+    ) -> OrderHistoryPage:
+        stmt = (
+            select(
+                Order.id,
+                Order.status,
+                Order.total_price,
+                Order.discount,
+                Order.final_price,
+                Order.delivery,
+                Order.sdek_id,
+                Order.created_at,
+                func.count(OrderProduct.id).label("products_count"),
             )
+            .outerjoin(OrderProduct, OrderProduct.order_id == Order.id)
+            .where(Order.user_id == user.id)
+            .group_by(Order.id)
+            .order_by(Order.id.desc())
+            .limit(pagination.limit + 1)
+        )
+        if pagination.cursor is not None:
+            stmt = stmt.where(Order.id < pagination.cursor)
+
+        rows = (await self.session.execute(stmt)).all()
+        items = [
+            OrderSummaryRead.model_validate(row._mapping)
+            for row in rows[:pagination.limit]
+        ]
+
+        return OrderHistoryPage(
+            items=items,
+            next_cursor=(
+                items[-1].id if len(rows) > pagination.limit else None
+            ),
         )
 
-        return result.unique().all()
+    async def get_order_products_history(
+        self,
+        user: User,
+        pagination: KeysetPagination,
+    ) -> OrderProductHistoryPage:
+        stmt = (
+            select(OrderProduct)
+            .join(Order, Order.id == OrderProduct.order_id)
+            .where(Order.user_id == user.id)
+            .options(*self.ORDER_PRODUCT_READ_OPTIONS)
+            .order_by(OrderProduct.id.desc())
+            .limit(pagination.limit + 1)
+        )
+        if pagination.cursor is not None:
+            stmt = stmt.where(OrderProduct.id < pagination.cursor)
+
+        rows = (await self.session.scalars(stmt)).all()
+        items = rows[:pagination.limit]
+
+        # Вложенные схемы без from_attributes: включаем на всю страницу
+        return OrderProductHistoryPage.model_validate(
+            {
+                "items": items,
+                "next_cursor": (
+                    items[-1].id if len(rows) > pagination.limit else None
+                ),
+            },
+            from_attributes=True,
+        )
 
     async def set_order_uds_discount(
         self,
@@ -156,7 +381,9 @@ class OrderService(CalculateTotalPriceMixin):
     async def payment_update(
         self, order_id: int, status: OrderStatus, payment_data: dict = None
     ):
-        order = await self._get_order(order_id)
+        # Повторные колбэки одного платежа ждут здесь друг друга, поэтому
+        # переход статуса и outbox-сообщения происходят один раз
+        order = await self._get_order(order_id, for_update=True)
         is_new_order = False
 
         if order.status not in (
@@ -169,38 +396,74 @@ class OrderService(CalculateTotalPriceMixin):
         if order.status != OrderStatus.paid:
             order.status = status
 
+            if status == OrderStatus.paid:
+                # Резерв держится, пока заказ не попадет в 1С
+                order.reserved_until = self._reservation_deadline(
+                    settings.checkout.paid_reservation_ttl_seconds
+                )
+            elif status in (OrderStatus.canceled, OrderStatus.error):
+                order.reserved_until = None
+
+        if is_new_order:
+            self._enqueue_payment_side_effects(order, status)
+
         if payment_data:
-            existing_data = order.payment_data.get(
-                "data", []
-                ) if order.payment_data else []
-            order.payment_data = {"data": [*existing_data, payment_data]}
+            self.session.add(
+                OrderPaymentEvent(
+                    order_id=order.id,
+                    kind=PaymentEventKind.callback,
+                    data=payment_data,
+                )
+            )
 
         await self.session.commit()
         await self.session.refresh(order)
 
         return order, is_new_order
 
+    def _enqueue_payment_side_effects(self, order: Order, status: OrderStatus):
+        """
+        Интеграции после оплаты (1С, CDEK, UDS) пишутся в outbox в той же
+        транзакции, что и статус заказа, и выполняются воркером.
+        """
+        outbox = OutboxService(self.session)
+        payload = {"order_id": order.id}
+
+        if status == OrderStatus.paid:
+            outbox.enqueue(OutboxTopic.create_1c_order, payload)
+            outbox.enqueue(OutboxTopic.create_cdek_order, payload)
+            if order.uds_transaction_id is None:
+                outbox.enqueue(OutboxTopic.create_uds_transaction, payload)
+        elif order.uds_transaction_id:
+            outbox.enqueue(OutboxTopic.refund_uds_transaction, payload)
+
     async def update_payment_response(
         self,
         response_text: str,
         order_id: int
-    ):
-        order = await self._get_order(order_id)
-
-        existing_data = order.payment_responses.get(
-            "data", []
-        ) if order.payment_responses else []
-        order.payment_responses = {"data": [*existing_data, response_text]}
-
+    ) -> None:
+        self.session.add(
+            OrderPaymentEvent(
+                order_id=order_id,
+                kind=PaymentEventKind.response,
+                response_text=response_text,
+            )
+        )
         await self.session.commit()
-        await self.session.refresh(order)
 
-        return order
+    async def _has_payment_events(self, order_id: int) -> bool:
+        return await self.session.scalar(
+            select(
+                exists().where(OrderPaymentEvent.order_id == order_id)
+            )
+        )
 
 
     async def update_order_code_1c(self, order_id: int, code_1c: str):
         order = await self._get_order(order_id)
         order.code_1c = code_1c
+        # Остатки из 1С уже учитывают этот заказ
+        order.reserved_until = None
         await self.session.commit()
         await self.session.refresh(order)
 
@@ -265,6 +528,10 @@ class OrderService(CalculateTotalPriceMixin):
                 OrderStatus.paid,
         ):
         
+            await self._reserve_stock(
+                self._order_lines(original_order.products)
+            )
+
             # Create new order with same user and address details
             new_order = Order(
                 user=user,
@@ -284,6 +551,9 @@ class OrderService(CalculateTotalPriceMixin):
                 # Reset status-related fields
                 status=OrderStatus.created,
                 discount=0,
+                reserved_until=self._reservation_deadline(
+                    settings.checkout.reservation_ttl_seconds
+                ),
             )
 
             # Copy products
@@ -302,13 +572,18 @@ class OrderService(CalculateTotalPriceMixin):
             await self.session.refresh(new_order)
 
             return new_order
-        elif (
-                not original_order.payment_data
-                and not original_order.payment_responses
-        ):
+        elif not await self._has_payment_events(original_order.id):
+            await self._reserve_stock(
+                self._order_lines(original_order.products),
+                exclude_order_id=original_order.id,
+            )
+
             original_order.status = OrderStatus.created
             original_order.discount = 0
             original_order.final_price = original_order.total_price
+            original_order.reserved_until = self._reservation_deadline(
+                settings.checkout.reservation_ttl_seconds
+            )
 
             await self.session.commit()
             await self.session.refresh(original_order)
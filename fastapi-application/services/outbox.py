@@ -0,0 +1,237 @@
+import asyncio
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Sequence
+
+from loguru import logger
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.config import OutboxConfig
+from core.models import OutboxMessage
+from core.models.outbox import OutboxStatus, OutboxTopic
+
+OutboxHandler = Callable[[AsyncSession, dict], Awaitable[None]]
+# Gets payloads of several messages, returns an error (or None) per payload
+OutboxBatchHandler = Callable[
+    [AsyncSession, list[dict]], Awaitable[list[Exception | None]]
+]
+
+
+class OutboxService:
+    def __init__(self, session: AsyncSession):
+        self.session: AsyncSession = session
+
+    def enqueue(self, topic: OutboxTopic, payload: dict) -> OutboxMessage:
+        """Adds a message to the current transaction; caller commits."""
+        message = OutboxMessage(topic=topic.value, payload=payload)
+        self.session.add(message)
+        return message
+
+    async def claim(
+        self,
+        topic: str,
+        limit: int,
+        lease_seconds: int,
+    ) -> Sequence[OutboxMessage]:
+        """
+        Takes due messages of the topic. SKIP LOCKED lets several workers
+        claim in parallel; the lease keeps a claimed message away from
+        other workers until it is completed, failed or the lease runs out.
+        """
+        now = datetime.utcnow()
+        messages = (
+            await self.session.scalars(
+                select(OutboxMessage)
+                .where(
+                    OutboxMessage.topic == topic,
+                    OutboxMessage.status == OutboxStatus.pending,
+                    OutboxMessage.next_attempt_at <= now,
+                )
+                .order_by(OutboxMessage.next_attempt_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+
+        for message in messages:
+            message.attempts += 1
+            message.next_attempt_at = now + timedelta(seconds=lease_seconds)
+
+        await self.session.commit()
+
+        return messages
+
+    async def complete(self, message_id: int) -> None:
+        await self.session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id == message_id)
+            .values(
+                status=OutboxStatus.done,
+                processed_at=datetime.utcnow(),
+                last_error=None,
+            )
+        )
+        await self.session.commit()
+
+    async def fail(
+        self,
+        message: OutboxMessage,
+        error: str,
+        config: OutboxConfig,
+    ) -> bool:
+        """Schedules a retry or dead-letters the message. -> True if dead."""
+        values = {"last_error": error}
+        max_attempts = config.max_attempts_by_topic.get(
+            message.topic, config.max_attempts
+        )
+
+        if message.attempts >= max_attempts:
+            values["status"] = OutboxStatus.dead
+            values["processed_at"] = datetime.utcnow()
+        else:
+            delay = min(
+                config.backoff_base_seconds * 2 ** (message.attempts - 1),
+                config.backoff_max_seconds,
+            )
+            values["next_attempt_at"] = datetime.utcnow() + timedelta(
+                seconds=delay
+            )
+
+        await self.session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id == message.id)
+            .values(**values)
+        )
+        await self.session.commit()
+
+        return values.get("status") == OutboxStatus.dead
+
+
+class OutboxWorker:
+    """Drains the outbox: one loop per topic, bounded concurrency per topic."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        handlers: dict[OutboxTopic, OutboxHandler],
+        config: OutboxConfig,
+        batch_handlers: dict[OutboxTopic, OutboxBatchHandler] | None = None,
+    ):
+        self.session_factory = session_factory
+        self.handlers = handlers
+        self.batch_handlers = batch_handlers or {}
+        self.config = config
+        # topic -> {"done": n, "retry": n, "dead": n} since the last report
+        self.stats: dict[str, Counter] = defaultdict(Counter)
+
+    async def run(self) -> None:
+        await asyncio.gather(
+            self._report_stats(),
+            *(
+                self._run_topic(topic.value, handler)
+                for topic, handler in self.handlers.items()
+                if topic not in self.batch_handlers
+            ),
+            *(
+                self._run_topic(topic.value, handler, batch=True)
+                for topic, handler in self.batch_handlers.items()
+            ),
+        )
+
+    async def _report_stats(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.stats_log_interval_seconds)
+            for topic, counter in self.stats.items():
+                if counter:
+                    logger.info(f"Outbox {topic}: {dict(counter)}")
+            self.stats.clear()
+
+    async def _run_topic(
+        self,
+        topic: str,
+        handler: OutboxHandler | OutboxBatchHandler,
+        batch: bool = False,
+    ) -> None:
+        if batch:
+            limit = self.config.batch_size.get(topic, 1)
+        else:
+            limit = self.config.concurrency.get(topic, 1)
+
+        while True:
+            try:
+                async with self.session_factory() as session:
+                    messages = await OutboxService(session).claim(
+                        topic, limit, self.config.lease_seconds
+                    )
+            except Exception as e:
+                logger.exception(e)
+                messages = []
+
+            if not messages:
+                await asyncio.sleep(self.config.poll_interval_seconds)
+                continue
+
+            if batch:
+                tasks = [self._handle_batch(messages, handler)]
+            else:
+                tasks = [self._handle(message, handler) for message in messages]
+
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.exception(result)
+
+    async def _handle(
+        self,
+        message: OutboxMessage,
+        handler: OutboxHandler,
+    ) -> None:
+        async with self.session_factory() as session:
+            try:
+                await handler(session, message.payload)
+            except Exception as e:
+                await session.rollback()
+                await self._fail(session, message, e)
+                return
+
+            await OutboxService(session).complete(message.id)
+            self.stats[message.topic]["done"] += 1
+
+    async def _handle_batch(
+        self,
+        messages: Sequence[OutboxMessage],
+        handler: OutboxBatchHandler,
+    ) -> None:
+        async with self.session_factory() as session:
+            try:
+                errors = await handler(
+                    session, [message.payload for message in messages]
+                )
+            except Exception as e:
+                await session.rollback()
+                errors = [e] * len(messages)
+
+            for message, error in zip(messages, errors):
+                if error is not None:
+                    await self._fail(session, message, error)
+                    continue
+
+                await OutboxService(session).complete(message.id)
+                self.stats[message.topic]["done"] += 1
+
+    async def _fail(
+        self,
+        session: AsyncSession,
+        message: OutboxMessage,
+        error: Exception,
+    ) -> None:
+        logger.error(
+            f"Outbox {message.topic} #{message.id} failed "
+            f"(attempt {message.attempts}): {error!r}"
+        )
+        dead = await OutboxService(session).fail(message, repr(error), self.config)
+
+        if dead:
+            logger.error(f"Outbox {message.topic} #{message.id} is dead")
+        self.stats[message.topic]["dead" if dead else "retry"] += 1
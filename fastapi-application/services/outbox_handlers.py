@@ -0,0 +1,115 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.http_sessions import http_sessions
+from core.models import Order
+from core.models.outbox import OutboxTopic
+from services.delivery import DeliveryService
+from services.orders import OrderService
+from services.driver_1c import Driver1C
+from services.outbox import OutboxBatchHandler, OutboxHandler
+from services.payments import PaymentsService
+from services.uds import UDSService
+
+
+# Обработчики могут выполниться повторно (ретрай после сбоя воркера),
+# поэтому каждый проверяет, не сделана ли работа раньше.
+
+
+async def create_1c_order(session: AsyncSession, payload: dict) -> None:
+    service = PaymentsService(session, http_sessions)
+    order = await service.order_service._get_order(payload["order_id"])
+
+    if order.code_1c:
+        return
+
+    await service.send_create_1c_order_request(order)
+
+
+async def create_1c_orders(
+    session: AsyncSession, payloads: list[dict]
+) -> list[Exception | None]:
+    order_ids = [payload["order_id"] for payload in payloads]
+    orders = {
+        order.id: order
+        for order in await session.scalars(
+            select(Order).where(Order.id.in_(order_ids))
+        )
+    }
+    to_send = [order for order in orders.values() if not order.code_1c]
+
+    numbers = {}
+    if to_send:
+        numbers = await Driver1C(http_sessions.one_c).create_1c_orders(to_send)
+
+    order_service = OrderService(session)
+    for order_id, number in numbers.items():
+        await order_service.update_order_code_1c(order_id, number)
+
+    errors = []
+    for order_id in order_ids:
+        order = orders.get(order_id)
+        if order is None:
+            errors.append(Exception(f"Order {order_id} not found"))
+        elif not order.code_1c and order_id not in numbers:
+            errors.append(Exception("Order number not found in 1C response"))
+        else:
+            errors.append(None)
+
+    return errors
+
+
+async def create_cdek_order(session: AsyncSession, payload: dict) -> None:
+    order = await OrderService(session)._get_order(payload["order_id"])
+
+    if order.sdek_id:
+        return
+
+    service = DeliveryService(
+        session,
+        settings.sdek_config.client_id,
+        settings.sdek_config.client_secret,
+        http_sessions.cdek,
+    )
+    await service.create_order(order)
+
+
+async def create_uds_transaction(session: AsyncSession, payload: dict) -> None:
+    order = await OrderService(session)._get_order(payload["order_id"])
+
+    if order.uds_transaction_id is not None:
+        return
+
+    uds_transaction = await UDSService(session, order.user).create_transaction(
+        phone_number=order.user.phone_number,
+        total_price=order.total_price,
+        points=0,
+    )
+    order.uds_transaction_id = uds_transaction.id
+    await session.commit()
+
+
+async def refund_uds_transaction(session: AsyncSession, payload: dict) -> None:
+    order = await OrderService(session)._get_order(payload["order_id"])
+
+    if order.uds_transaction_id is None:
+        return
+
+    await UDSService(session, order.user).refund_transaction(
+        order.uds_transaction_id
+    )
+
+
+OUTBOX_HANDLERS: dict[OutboxTopic, OutboxHandler] = {
+    OutboxTopic.create_1c_order: create_1c_order,
+    OutboxTopic.create_cdek_order: create_cdek_order,
+    OutboxTopic.create_uds_transaction: create_uds_transaction,
+    OutboxTopic.refund_uds_transaction: refund_uds_transaction,
+}
+
+# Пакетная выгрузка включается, когда в 1С настроен пакетный эндпоинт
+OUTBOX_BATCH_HANDLERS: dict[OutboxTopic, OutboxBatchHandler] = {}
+
+if settings.config_1c.order_batch_create_url:
+    OUTBOX_BATCH_HANDLERS[OutboxTopic.create_1c_order] = create_1c_orders
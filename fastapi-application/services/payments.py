@@ -1,9 +1,9 @@
 import hashlib
 
-import aiohttp
 import xmltodict
 from core.config import settings
-from core.models import User, Order
+from core.http_sessions import HttpSessionRegistry
+from core.models import User, Order, PaymentWebhookReceipt
 from core.models.order import OrderStatus
 from core.schemas.payments import (
     PaymentSignature,
@@ -11,11 +11,12 @@ from core.schemas.payments import (
     PaymentRequestParams,
     PaymentUrlResponse,
 )
-from fastapi import HTTPException, Response, BackgroundTasks, status
+from fastapi import HTTPException, Response, status
 from loguru import logger
 from services.driver_1c import Driver1C
 from services.orders import OrderService
-from services.uds import UDSService
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.datastructures import FormData
 
@@ -34,10 +35,11 @@ class PaymentsService:
         "pg_can_reject",
     }
 
-    def __init__(self, session):
+    def __init__(self, session, http_sessions: HttpSessionRegistry):
         self.session: AsyncSession = session
+        self.http_sessions = http_sessions
         self.order_service = OrderService(session)
-        self.driver_1c = Driver1C()
+        self.driver_1c = Driver1C(http_sessions.one_c)
 
     async def _generate_signature(
             self,
@@ -110,9 +112,33 @@ class PaymentsService:
 
         return True
 
-    async def result_url_handler(
-            self, data: FormData, background_tasks: BackgroundTasks
-    ):
+    async def _get_webhook_receipt(self, payment_data: PaymentResult) -> str | None:
+        return await self.session.scalar(
+            select(PaymentWebhookReceipt.response_xml).where(
+                PaymentWebhookReceipt.pg_order_id == payment_data.pg_order_id,
+                PaymentWebhookReceipt.pg_payment_id == payment_data.pg_payment_id,
+                PaymentWebhookReceipt.pg_result == payment_data.pg_result,
+            )
+        )
+
+    async def _save_webhook_receipt(
+            self,
+            payment_data: PaymentResult,
+            response_xml: str,
+    ) -> None:
+        # Коммитится вместе с update_payment_response
+        await self.session.execute(
+            insert(PaymentWebhookReceipt)
+            .values(
+                pg_order_id=payment_data.pg_order_id,
+                pg_payment_id=payment_data.pg_payment_id,
+                pg_result=payment_data.pg_result,
+                response_xml=response_xml,
+            )
+            .on_conflict_do_nothing()
+        )
+
+    async def result_url_handler(self, data: FormData):
         logger.debug(f"Requesting payment result url")
         logger.debug(f"Request data: {data}")
 
@@ -139,6 +165,16 @@ class PaymentsService:
                 "result_url",
             )
 
+        if check_signature:
+            # Повтор уже обработанного колбэка - отдаем тот же ответ
+            receipt_xml = await self._get_webhook_receipt(payment_data)
+            if receipt_xml is not None:
+                logger.info(
+                    f"Duplicate payment result for order: {payment_data.pg_order_id} "
+                    f"| payment_id: {payment_data.pg_payment_id}"
+                )
+                return Response(content=receipt_xml, media_type="application/xml")
+
         if invalid_data:
             pg_status = "error"
             pg_description = "Некорректные данные"
@@ -165,10 +201,9 @@ class PaymentsService:
             order_status = OrderStatus.error
 
         order = None
-        is_new_order = False
         if not invalid_data:
             try:
-                order, is_new_order = await self.order_service.payment_update(
+                order, _ = await self.order_service.payment_update(
                     order_id=int(payment_data.pg_order_id),
                     status=order_status,
                     payment_data={**data},
@@ -202,45 +237,13 @@ class PaymentsService:
             <pg_sig>{response_signature.signature}</pg_sig>
         </response>"""
 
-        order = await self.order_service.update_payment_response(
-            response_xml, order.id
-        )
-
-        if order and pg_status == "ok" and is_new_order:
-            background_tasks.add_task(
-                self.send_create_1c_order_request,
-                order,
+        if order is not None:
+            if check_signature:
+                await self._save_webhook_receipt(payment_data, response_xml)
+            await self.order_service.update_payment_response(
+                response_xml, order.id
             )
 
-            if order.uds_transaction_id is None:
-                uds_service = UDSService(self.session, order.user)
-                try:
-                    uds_transaction = await uds_service.create_transaction(
-                        phone_number=order.user.phone_number,
-                        total_price=order.total_price,
-                        points=0,
-                    )
-                    order.uds_transaction_id = uds_transaction.id
-                    await self.session.commit()
-                except Exception as e:
-                    logger.error(
-                        f"Error creating uds transaction for order: {order.id}"
-                        )
-                    logger.error(e)
-        elif order and pg_status != "ok" and is_new_order:
-            if order.uds_transaction_id:
-                try:
-                    uds_service = UDSService(self.session, order.user)
-                    await uds_service.refund_transaction(
-                        order.uds_transaction_id
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"Error refunding uds transaction "
-                        f"for order: {order.id}"
-                        )
-                    logger.error(e)
-
         return Response(content=response_xml, media_type="application/xml")
 
     async def send_create_1c_order_request(self, order: Order) -> None:
@@ -283,32 +286,31 @@ class PaymentsService:
             **params,
         )
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                    url=settings.freedom_pay_config.init_payment_url,
-                    params={
-                        "pg_sig": signature.signature,
-                        **request_params.dict(),
-                    },
-            ) as response:
-                if response.status != 200:
-                    raise HTTPException(
-                        status_code=response.status,
-                        detail="Error getting payment URL",
-                    )
-
-                response_text = await response.text()
-                response_data = xmltodict.parse(response_text)["response"]
-
-                logger.info(f"Response text: {response_text}")
-                logger.info(f"Response data: {response_data}")
-
-            if response_data.get("pg_status") != "ok":
+        async with self.http_sessions.freedom_pay.post(
+                url=settings.freedom_pay_config.init_payment_url,
+                params={
+                    "pg_sig": signature.signature,
+                    **request_params.dict(),
+                },
+        ) as response:
+            if response.status != 200:
                 raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    status_code=response.status,
                     detail="Error getting payment URL",
                 )
 
+            response_text = await response.text()
+            response_data = xmltodict.parse(response_text)["response"]
+
+            logger.info(f"Response text: {response_text}")
+            logger.info(f"Response data: {response_data}")
+
+        if response_data.get("pg_status") != "ok":
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error getting payment URL",
+            )
+
         await self.check_signature(
             response_data.pop("pg_sig"),
             response_data,
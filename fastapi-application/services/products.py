@@ -2,7 +2,21 @@ from typing import List
 
 from fastapi import HTTPException, status
 from loguru import logger
-from sqlalchemy import select, desc, asc, Select, and_, func, or_
+from sqlalchemy import (
+    ARRAY,
+    Select,
+    String,
+    all_,
+    and_,
+    any_,
+    asc,
+    desc,
+    distinct,
+    func,
+    literal,
+    or_,
+    select,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload, aliased, contains_eager, load_only
 
@@ -85,17 +99,43 @@ class ProductService:
             return True
         return False
 
+    @staticmethod
+    def _text_array(values: List[str]):
+        # Один bind-параметр-массив вместо IN (...) с переменным числом
+        # параметров: SQL не зависит от длины списка, поэтому compiled cache
+        # SQLAlchemy и prepared statements asyncpg переиспользуются
+        return literal(list(values), ARRAY(String))
+
     def _filter_products_variations_by_properties(
         self, stmt: Select, properties: List[PropertyFilter]
     ):
-        # Если передано несколько свойств, то фильтруем по ним
-        for prop in properties:
-            stmt = stmt.join(ProductVariation.properties).where(
-                ProductProperty.name == prop.name,
-                ProductProperty.value == prop.value
+        # Вариация подходит, если у неё есть хотя бы одно из значений
+        # каждого запрошенного свойства
+        wanted = (
+            func.unnest(
+                self._text_array(prop.name for prop in properties),
+                self._text_array(prop.value for prop in properties),
             )
+            .table_valued("name", "value")
+            .render_derived()
+        )
+        matched_variations = (
+            select(ProductProperty.variation_id)
+            .join(
+                wanted,
+                and_(
+                    ProductProperty.name == wanted.c.name,
+                    ProductProperty.value == wanted.c.value,
+                ),
+            )
+            .group_by(ProductProperty.variation_id)
+            .having(
+                func.count(distinct(ProductProperty.name))
+                == literal(len({prop.name for prop in properties}))
+            )
+        )
 
-        return stmt
+        return stmt.where(ProductVariation.id.in_(matched_variations))
 
     def _filter_products(
         self, product_filter: ProductFilter, properties: List[PropertyFilter] = None
@@ -104,45 +144,43 @@ class ProductService:
         stmt = (
             select(Product)
             .join(Product.variations)
-            .outerjoin(ProductVariation.properties)
+            .outerjoin(Product.brand)
+            .join(Product.category)
             .where(Product.active == True)
         )
-        if properties:
-            stmt = self._filter_products_variations_by_properties(stmt, properties)
 
         stmt = self._filter_products_variations(
-            product_filter, stmt
+            product_filter, stmt, properties
         )
 
-        stmt = (
-            stmt.outerjoin(Product.brand)
-            .join(Product.category)
-            .options(
-                selectinload(Product.images),
-                joinedload(Product.brand),
-                joinedload(Product.category),
-            )
+        # brand/category уже в JOIN - грузим из него, без второй пары JOIN
+        stmt = stmt.options(
+            selectinload(Product.images),
+            contains_eager(Product.brand),
+            contains_eager(Product.category),
         )
 
         if product_filter.brand.name__in:
             logger.info(f"Brand in filter: {product_filter.brand.name__in}")
-            stmt = stmt.where(Brand.name.in_(product_filter.brand.name__in))
+            stmt = stmt.where(
+                Brand.name == any_(self._text_array(product_filter.brand.name__in))
+            )
         if product_filter.category.name__in:
-            stmt = stmt.where(Category.name.in_(product_filter.category.name__in))
+            stmt = stmt.where(
+                Category.name
+                == any_(self._text_array(product_filter.category.name__in))
+            )
 
         if product_filter.search:
-            search_term = product_filter.search.strip()
-            search_words = search_term.split()
+            search_words = product_filter.search.strip().split()
 
-            stmt = stmt.where(
-                and_(
-                    *(
-                        Product.title.ilike(f"%{word}%")
-                        for word in search_words
+            if search_words:
+                # Все слова должны встречаться в названии: title ILIKE ALL (...)
+                stmt = stmt.where(
+                    Product.title.ilike(
+                        all_(self._text_array(f"%{word}%" for word in search_words))
                     )
                 )
-            )
-
 
         return stmt
 
@@ -190,10 +228,11 @@ class ProductService:
 
         # return properties_list
 
-    @staticmethod
     def _filter_products_variations(
+        self,
         product_filter: ProductFilter,
         stmt: Select,
+        properties: List[PropertyFilter] = None,
     ):
 
         price_gte = product_filter.price__gte
@@ -201,40 +240,19 @@ class ProductService:
         product_filter.price__gte = None
         product_filter.price__lte = None
 
-        # Подзапрос для фильтрации вариаций по цене и свойствам
-        variations_query = (
-            select(ProductVariation.id)
-            .outerjoin(ProductVariation.properties)
-            .where(and_(ProductVariation.active == True, ProductVariation.quantity > 0))
+        stmt = stmt.where(
+            ProductVariation.active == True,
+            ProductVariation.quantity > 0,
         )
 
         # Фильтрация по цене
         if price_gte is not None:
-            variations_query = variations_query.where(
-                ProductVariation.price >= price_gte
-            )
+            stmt = stmt.where(ProductVariation.price >= price_gte)
         if price_lte is not None:
-            variations_query = variations_query.where(
-                ProductVariation.price <= price_lte
-            )
+            stmt = stmt.where(ProductVariation.price <= price_lte)
 
-        # # Фильтрация по значениям свойств (properties)
-        # aliases = [
-        #     {
-        #         "alias": aliased(ProductProperty),
-        #         "value": value,
-        #     }
-        #     for value in properties
-        # ]
-        #
-        # for _alias in aliases:
-        #     variations_query = variations_query.join(_alias["alias"]).where(
-        #         _alias["alias"].value == _alias["value"]
-        #     )
-
-        variations_subquery = variations_query.subquery()
-
-        stmt = stmt.where(ProductVariation.id.in_(select(variations_subquery)))
+        if properties:
+            stmt = self._filter_products_variations_by_properties(stmt, properties)
 
         stmt = stmt.options(
             contains_eager(Product.variations).selectinload(ProductVariation.properties)
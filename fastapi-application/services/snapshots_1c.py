@@ -0,0 +1,60 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from loguru import logger
+
+# Raw 1C responses of one import cycle:
+# {"recorded_at": ..., "brands": <brands response>,
+#  "categories": <categories response>,
+#  "products": {<group name>: <products response>}}
+Snapshot1C = dict
+
+SNAPSHOT_PATTERN = "1c-*.json.gz"
+
+
+def _open(path: Path, mode: str, compressed: bool | None = None):
+    if compressed is None:
+        compressed = path.suffix == ".gz"
+    if compressed:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def load_snapshot(path: Path) -> Snapshot1C:
+    """`path` is a snapshot file or a directory, then its latest snapshot is used."""
+    if path.is_dir():
+        snapshots = sorted(path.glob(SNAPSHOT_PATTERN))
+        if not snapshots:
+            raise FileNotFoundError(f"No 1C snapshots in {path}")
+        path = snapshots[-1]
+
+    with _open(path, "r") as file:
+        snapshot = json.load(file)
+
+    logger.info(f"1C snapshot loaded: {path}")
+    return snapshot
+
+
+def write_snapshot(snapshot: Snapshot1C, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Через временный файл: прерванная запись не оставит битый снимок
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with _open(tmp_path, "w", compressed=path.suffix == ".gz") as file:
+        json.dump(snapshot, file, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def save_snapshot(snapshot: Snapshot1C, directory: Path, keep: int) -> Path:
+    """Writes a timestamped compressed snapshot, keeps the last `keep` ones."""
+    recorded_at = datetime.utcnow()
+    path = directory / f"1c-{recorded_at:%Y%m%dT%H%M%S}.json.gz"
+    write_snapshot({"recorded_at": recorded_at.isoformat(), **snapshot}, path)
+
+    for old in sorted(directory.glob(SNAPSHOT_PATTERN))[:-keep]:
+        old.unlink(missing_ok=True)
+
+    logger.info(f"1C snapshot saved: {path}")
+    return path
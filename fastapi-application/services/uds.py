@@ -1,14 +1,11 @@
-from datetime import datetime
-
-import requests
 from fastapi import HTTPException
 from loguru import logger
-from requests.auth import HTTPBasicAuth
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.models import User
 from core.schemas.uds import UDSDataRead, UDSTransactionData
 from core.config import settings
+from core.uds_client import UDSClient, UDSResponse, UDSUnavailableError, uds_client
 
 
 class UDSService:
@@ -17,43 +14,51 @@ class UDSService:
     UDS_TRANSACTION_CREATE_URL = settings.uds_config.uds_transaction_create_url
     UDS_TRANSACTION_REFUND_URL = settings.uds_config.uds_transaction_refund_url
 
-    AUTH = HTTPBasicAuth(settings.uds_config.username, settings.uds_config.password)
-
-    def __init__(self, session, user):
+    def __init__(self, session, user, client: UDSClient = uds_client):
         self.session: AsyncSession = session
         self.user: User = user
+        self.client = client
 
-    @staticmethod
-    def _default_headers():
-        return {
-            "Accept": "application/json",
-            "Accept-Charset": "utf-8",
-            "Content-Type": "application/json",
-            "X-Origin-Request-Id": settings.uds_config.origin_request_id,
-            "X-Timestamp": datetime.utcnow().isoformat(),
-        }
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        idempotent: bool = False,
+        **kwargs,
+    ) -> UDSResponse:
+        try:
+            return await self.client.request(
+                method, url, idempotent=idempotent, **kwargs
+            )
+        except UDSUnavailableError as e:
+            logger.error(e)
+            raise HTTPException(
+                status_code=503,
+                detail="UDS is temporarily unavailable",
+            )
 
     async def get_uds_points(self, uds_code: str) -> UDSDataRead:
         logger.info(f"Requesting UDS points for code: {uds_code} | user: {self.user}")
 
-        response = requests.get(
-            url=self.UDS_CUSTOMER_FIND_URL,
+        response = await self._request(
+            "GET",
+            self.UDS_CUSTOMER_FIND_URL,
             params={"code": uds_code},
-            auth=self.AUTH,
-            headers=self._default_headers(),
+            idempotent=True,
         )
 
-        logger.info(f"Response (UDS customer find) status code: {response.status_code}")
+        logger.info(f"Response (UDS customer find) status code: {response.status}")
 
-        if response.status_code == 200:
-            data = response.json()
+        if response.status == 200:
+            data = response.data
             return UDSDataRead(
                 uid=data["user"]["uid"],
                 points=data["user"]["participant"]["points"],
             )
 
-        if response.status_code == 404:
-            data = response.json()
+        if response.status == 404:
+            data = response.data
             raise HTTPException(
                 status_code=400,
                 detail=f'Error code: {data["errorCode"]}\nMessage: {data["message"]}',
@@ -63,7 +68,7 @@ class UDSService:
             status_code=400,
             detail=f"UDS reqeust error\n"
             f"URL: {response.url}\n"
-            f"Status code: {response.status_code}",
+            f"Status code: {response.status}",
         )
 
     async def create_transaction(
@@ -113,28 +118,27 @@ class UDSService:
                 },
             }
 
-        response = requests.post(
-            url=self.UDS_TRANSACTION_CREATE_URL,
+        response = await self._request(
+            "POST",
+            self.UDS_TRANSACTION_CREATE_URL,
             json=payload,
-            auth=self.AUTH,
-            headers=self._default_headers(),
         )
 
         logger.info(
-            f"Response (UDS create transaction) status code: {response.status_code}"
+            f"Response (UDS create transaction) status code: {response.status}"
         )
 
-        if response.status_code == 200:
-            return UDSTransactionData(**response.json())
+        if response.status == 200:
+            return UDSTransactionData(**response.data)
 
-        if response.status_code == 404:
+        if response.status == 404:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid uds code: {uds_code}",
             )
 
-        if response.status_code == 400:
-            data = response.json()
+        if response.status == 400:
+            data = response.data
             raise HTTPException(
                 status_code=400,
                 detail=f'Error code: {data["errorCode"]}\nMessage: {data["message"]}',
@@ -144,24 +148,23 @@ class UDSService:
             status_code=400,
             detail=f"UDS reqeust error\n"
             f"URL: {response.url}\n"
-            f"Status code: {response.status_code}",
+            f"Status code: {response.status}",
         )
 
     async def refund_transaction(self, transaction_id: int) -> None:
         logger.info(f"Requesting UDS refund for transaction: {transaction_id}")
 
-        response = requests.post(
-            url=self.UDS_TRANSACTION_REFUND_URL.format(
+        response = await self._request(
+            "POST",
+            self.UDS_TRANSACTION_REFUND_URL.format(
                 transaction_id=transaction_id
             ),
-            auth=self.AUTH,
-            headers=self._default_headers(),
         )
 
         logger.info(
-            f"Response (UDS refund) status code: {response.status_code}"
+            f"Response (UDS refund) status code: {response.status}"
         )
-        logger.info(f"Response (UDS refund): {response.text}")
+        logger.info(f"Response (UDS refund): {response.data}")
 
     async def calculate_transaction_info(
         self,
@@ -173,25 +176,25 @@ class UDSService:
             f"Requesting UDS transaction calculation for code: {uds_code} | user: {self.user}"
         )
 
-        response = requests.post(
-            url=self.UDS_TRANSACTION_CALC_URL,
+        response = await self._request(
+            "POST",
+            self.UDS_TRANSACTION_CALC_URL,
             json={
                 "code": uds_code,
                 "receipt": {"total": total_price, "points": points},
             },
-            auth=self.AUTH,
-            headers=self._default_headers(),
+            idempotent=True,
         )
 
         logger.info(
-            f"Response (UDS transaction calculation) status code: {response.status_code}"
+            f"Response (UDS transaction calculation) status code: {response.status}"
         )
 
-        if response.status_code == 200:
-            data = response.json()
+        if response.status == 200:
+            data = response.data
             return data["purchase"]
 
-        if response.status_code == 404:
+        if response.status == 404:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid uds code: {uds_code}",
@@ -201,5 +204,5 @@ class UDSService:
             status_code=400,
             detail=f"UDS reqeust error\n"
             f"URL: {response.url}\n"
-            f"Status code: {response.status_code}",
+            f"Status code: {response.status}",
         )
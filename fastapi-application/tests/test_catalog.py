@@ -0,0 +1,26 @@
+import asyncio
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from benchmarks.catalog import MAX_BIND_PARAMS
+from core.models import Order
+
+
+def test_order_history_loads_past_bind_parameter_limit(database, catalog):
+    # Заказов больше, чем влезает в один INSERT по числу параметров
+    assert catalog.users * catalog.orders * len(Order.__table__.columns) > MAX_BIND_PARAMS
+
+    async def count_orders() -> int:
+        engine = create_async_engine(database, poolclass=NullPool)
+        async with engine.connect() as conn:
+            count = await conn.scalar(
+                select(func.count(Order.id)).where(
+                    Order.customer_email.like("bench-order-%")
+                )
+            )
+        await engine.dispose()
+        return count
+
+    assert asyncio.run(count_orders()) == catalog.users * catalog.orders
@@ -0,0 +1,85 @@
+import asyncio
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import false, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.authentication import strategy
+from core.authentication.strategy import RevocableJWTStrategy
+from core.config import settings
+from core.models import Brand
+from core.models.db_helper import DatabaseHelper
+from core.redis_helper import redis_helper
+
+
+class MemoryRedis:
+    def __init__(self) -> None:
+        self.keys = {}
+
+    async def set(self, key, value, ex=None):
+        self.keys[key] = value
+
+    async def exists(self, *keys):
+        return sum(key in self.keys for key in keys)
+
+
+@pytest.mark.parametrize(
+    "jwt_options",
+    [{}, {"algorithm": "HS512", "token_audience": ["distore"]}],
+)
+def test_bearer_client_reads_its_writes_from_primary(
+    database, monkeypatch, jwt_options
+):
+    monkeypatch.setattr(settings.access_token, "strategy", "jwt")
+    monkeypatch.setattr(
+        strategy,
+        "get_jwt_strategy",
+        lambda: RevocableJWTStrategy(
+            secret="test", lifetime_seconds=60, **jwt_options
+        ),
+    )
+    monkeypatch.setattr(redis_helper, "_client", MemoryRedis())
+
+    helper = DatabaseHelper(url=database, replica_urls=[database])
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def mark_recent_write(request, call_next):
+        response = await call_next(request)
+        await helper.mark_recent_write(request)
+        return response
+
+    @app.post("/write")
+    async def write(session: AsyncSession = Depends(helper.session_getter)):
+        await session.execute(update(Brand).where(false()).values(name="-"))
+        await session.commit()
+
+    @app.get("/read")
+    async def read(session: AsyncSession = Depends(helper.read_session_getter)):
+        return {"primary": session.bind is helper.engine}
+
+    async def scenario():
+        jwt_strategy = strategy.get_jwt_strategy()
+
+        async def headers(user_id: int) -> dict:
+            token = await jwt_strategy.write_token(SimpleNamespace(id=user_id))
+            return {"Authorization": f"Bearer {token}"}
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/read", headers=await headers(1))).json() == {"primary": False}
+
+            await client.post("/write", headers=await headers(1))
+
+            # Без cookies: метка берется из токена
+            client.cookies.clear()
+            assert (await client.get("/read", headers=await headers(1))).json() == {"primary": True}
+            assert (await client.get("/read", headers=await headers(2))).json() == {"primary": False}
+            assert (await client.get("/read")).json() == {"primary": False}
+        await helper.dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import time
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import settings
+from core.models import Order, ShipmentStatus, User
+from core.redis_helper import redis_helper
+from services.delivery import DeliveryService
+
+
+async def create_orders(session, sdek_ids: list[str]) -> None:
+    key = uuid.uuid4().hex
+    user = User(
+        email=f"{key}@example.com",
+        hashed_password="-",
+        nickname=key,
+        phone_number="+996555000000",
+    )
+    session.add_all(
+        Order(
+            customer_name="Test",
+            customer_phone="+996555000000",
+            customer_email="test@example.com",
+            country="Кыргызстан",
+            city="Бишкек",
+            address="ул. Тестовая, 1",
+            total_price=100,
+            final_price=100,
+            sdek_id=sdek_id,
+            user=user,
+        )
+        for sdek_id in sdek_ids
+    )
+    await session.commit()
+
+
+def test_failing_shipments_do_not_starve_the_rest(database, monkeypatch):
+    monkeypatch.setattr(settings.sdek_config, "shipment_poll_batch_size", 2)
+    monkeypatch.setattr(settings.sdek_config, "shipment_poll_max_failures", 3)
+
+    async def fetch_status(sdek_id: str) -> dict:
+        if sdek_id.startswith("broken"):
+            raise Exception("Failed to get sdek status: 404")
+        return {"code": "ACCEPTED", "name": "Принят"}
+
+    async def scenario():
+        engine = create_async_engine(database, poolclass=NullPool)
+        sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False)
+        async with sessionmaker() as session:
+            await create_orders(session, ["broken-1", "broken-2", "ok-1", "ok-2"])
+
+        for _ in range(3):
+            async with sessionmaker() as session:
+                service = DeliveryService(session, "test", "test", http_session=None)
+                monkeypatch.setattr(service, "_fetch_status", fetch_status)
+                await service.refresh_shipment_statuses()
+
+        async with sessionmaker() as session:
+            rows = await session.execute(
+                select(Order.sdek_id, ShipmentStatus.code, ShipmentStatus.failures)
+                .join(ShipmentStatus, ShipmentStatus.order_id == Order.id)
+            )
+            checked = {sdek_id: (code, failures) for sdek_id, code, failures in rows}
+        await engine.dispose()
+
+        assert checked["ok-1"] == ("ACCEPTED", 0)
+        assert checked["ok-2"] == ("ACCEPTED", 0)
+        assert checked["broken-1"][0] is None
+        assert checked["broken-1"][1] >= 1
+
+    asyncio.run(scenario())
+
+
+class MemoryRedis:
+    def __init__(self) -> None:
+        self.keys = {}
+
+    async def get(self, key):
+        return self.keys.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.keys:
+            return None
+        self.keys[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, value):
+        # RELEASE_LOCK_SCRIPT: удаляет ключ, только если значение совпало
+        if self.keys.get(key) == value:
+            del self.keys[key]
+            return 1
+        return 0
+
+
+def cache_token(redis: MemoryRedis, service: DeliveryService, expires_in: float):
+    redis.keys[service.token_key] = json.dumps(
+        {"access_token": "old", "expires_at": time.time() + expires_in}
+    )
+
+
+def test_early_renewal_does_not_block_other_requests(monkeypatch):
+    redis = MemoryRedis()
+    monkeypatch.setattr(redis_helper, "_client", redis)
+    service = DeliveryService(None, "test", "test", http_session=None)
+
+    async def update_token():
+        await asyncio.sleep(0.2)
+        return "new"
+
+    monkeypatch.setattr(service, "update_token", update_token)
+
+    async def scenario():
+        renewal = asyncio.create_task(service.get_token())
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        tokens = await asyncio.gather(*(service.get_token() for _ in range(5)))
+        assert time.monotonic() - started < 0.1
+        return tokens, await renewal
+
+    # Каждый asyncio.run - свой event loop и свои asyncio.Lock
+    for _ in range(2):
+        # Токен еще действует, но пора обновлять
+        cache_token(redis, service, expires_in=60)
+        tokens, renewed = asyncio.run(scenario())
+        assert tokens == ["old"] * 5
+        assert renewed == "new"
+
+
+def test_token_lock_of_another_process_is_kept(monkeypatch):
+    redis = MemoryRedis()
+    monkeypatch.setattr(redis_helper, "_client", redis)
+    service = DeliveryService(None, "test", "test", http_session=None)
+    cache_token(redis, service, expires_in=-1)
+
+    async def update_token():
+        # Наш lock истек, его взял другой процесс
+        redis.keys[service.token_lock_key] = "other"
+        return "new"
+
+    monkeypatch.setattr(service, "update_token", update_token)
+
+    assert asyncio.run(service.get_token()) == "new"
+    assert redis.keys[service.token_lock_key] == "other"
@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+# Точки входа процессов. Каждая импортируется в чистом интерпретаторе:
+# после `import main` циклический импорт уже не проявится
+ENTRYPOINTS = [
+    "main",
+    "background_jobs",
+    "update_data_from_1c",
+    "core.celery",
+    "services.delivery",
+    "services.orders",
+    "services.outbox_handlers",
+]
+
+
+@pytest.mark.parametrize("module", ENTRYPOINTS)
+def test_entrypoint_imports(module):
+    result = subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        cwd=APP_DIR,
+        env=os.environ,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
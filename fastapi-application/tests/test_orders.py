@@ -0,0 +1,227 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.models import Brand, Category, Group, Order, Product, User
+from core.models.cart import Cart, CartProduct
+from core.models.order import OrderProduct
+from core.models.product import ProductVariation
+from core.schemas.base import KeysetPagination
+from core.schemas.order import OrderCreate
+from services.orders import OrderService
+
+ORDER_DATA = OrderCreate(
+    customer_name="Test",
+    customer_phone="+996555000000",
+    customer_email="test@example.com",
+    country="Кыргызстан",
+    country_code="KG",
+    city="Бишкек",
+    city_uuid="test",
+    city_code="0",
+    address="ул. Тестовая, 1",
+)
+
+
+def make_sessionmaker(database: str) -> async_sessionmaker:
+    engine = create_async_engine(database, poolclass=NullPool)
+    return async_sessionmaker(
+        bind=engine,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+    )
+
+
+async def create_variation(session, quantity: int) -> int:
+    key = uuid.uuid4().hex
+    group = Group(name=f"group-{key}", uuid_1c=f"group-{key}")
+    category = Category(name=f"category-{key}", uuid_1c=f"category-{key}", group=group)
+    brand = Brand(name=f"brand-{key}", image_url="", uuid_1c=f"brand-{key}")
+    product = Product(
+        title=f"product-{key}",
+        uuid_1c=f"product-{key}",
+        brand=brand,
+        category=category,
+    )
+    variation = ProductVariation(
+        name="variation",
+        price=100,
+        quantity=quantity,
+        uuid_1c=f"variation-{key}",
+        product=product,
+    )
+    session.add(variation)
+    await session.commit()
+    return variation.id
+
+
+async def create_user(session, variation_id: int | None = None) -> int:
+    key = uuid.uuid4().hex
+    user = User(
+        email=f"{key}@example.com",
+        hashed_password="-",
+        nickname=key,
+        phone_number="+996555000000",
+    )
+    user.cart = Cart()
+    if variation_id is not None:
+        user.cart.products.append(
+            CartProduct(product_variation_id=variation_id, quantity=1)
+        )
+    session.add(user)
+    await session.commit()
+    return user.id
+
+
+async def checkout(sessionmaker, user_id: int) -> Order:
+    async with sessionmaker() as session:
+        user = await session.get(User, user_id)
+        return await OrderService(session).create_order_from_cart(user, ORDER_DATA)
+
+
+async def reserved_quantity(session, variation_id: int) -> int:
+    return await session.scalar(
+        select(func.coalesce(func.sum(OrderProduct.quantity), 0))
+        .join(Order, Order.id == OrderProduct.order_id)
+        .where(
+            OrderProduct.product_variation_id == variation_id,
+            Order.reserved_until > datetime.utcnow(),
+        )
+    )
+
+
+def test_concurrent_checkouts_do_not_oversell(database):
+    async def scenario():
+        sessionmaker = make_sessionmaker(database)
+        async with sessionmaker() as session:
+            variation_id = await create_variation(session, quantity=1)
+            user_ids = [await create_user(session, variation_id) for _ in range(5)]
+
+        results = await asyncio.gather(
+            *(checkout(sessionmaker, user_id) for user_id in user_ids),
+            return_exceptions=True,
+        )
+
+        orders = [result for result in results if isinstance(result, Order)]
+        rejected = [
+            result for result in results
+            if isinstance(result, HTTPException) and result.status_code == 409
+        ]
+        assert len(orders) == 1
+        assert len(rejected) == 4
+
+        async with sessionmaker() as session:
+            assert await reserved_quantity(session, variation_id) == 1
+
+    asyncio.run(scenario())
+
+
+def test_double_submit_creates_one_order(database):
+    async def scenario():
+        sessionmaker = make_sessionmaker(database)
+        async with sessionmaker() as session:
+            variation_id = await create_variation(session, quantity=10)
+            user_id = await create_user(session, variation_id)
+
+        results = await asyncio.gather(
+            checkout(sessionmaker, user_id),
+            checkout(sessionmaker, user_id),
+            return_exceptions=True,
+        )
+
+        orders = [result for result in results if isinstance(result, Order)]
+        rejected = [
+            result for result in results
+            if isinstance(result, HTTPException) and result.status_code == 400
+        ]
+        assert len(orders) == 1
+        assert len(rejected) == 1
+
+        async with sessionmaker() as session:
+            assert await reserved_quantity(session, variation_id) == 1
+            assert await session.scalar(
+                select(func.count(Order.id)).where(Order.user_id == user_id)
+            ) == 1
+
+    asyncio.run(scenario())
+
+
+def test_checkout_waiting_for_lock_sees_committed_reservation(database):
+    async def scenario():
+        sessionmaker = make_sessionmaker(database)
+        async with sessionmaker() as session:
+            variation_id = await create_variation(session, quantity=1)
+            holder_id = await create_user(session)
+            waiter_id = await create_user(session, variation_id)
+
+        async with sessionmaker() as holder, sessionmaker() as monitor:
+            await holder.execute(
+                select(ProductVariation.id)
+                .where(ProductVariation.id == variation_id)
+                .with_for_update()
+            )
+
+            waiter = asyncio.create_task(checkout(sessionmaker, waiter_id))
+            # Ждем, пока второе оформление встанет на блокировке строки
+            for _ in range(100):
+                waiting = await monitor.scalar(
+                    text(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() "
+                        "AND wait_event_type = 'Lock'"
+                    )
+                )
+                await monitor.rollback()
+                if waiting:
+                    break
+                await asyncio.sleep(0.05)
+            else:
+                pytest.fail("Checkout did not wait for the variation lock")
+
+            order = Order(
+                user_id=holder_id,
+                total_price=100,
+                final_price=100,
+                reserved_until=datetime.utcnow() + timedelta(minutes=30),
+                **ORDER_DATA.model_dump(exclude={"use_saved_address"}),
+            )
+            order.products.append(
+                OrderProduct(product_variation_id=variation_id, quantity=1)
+            )
+            holder.add(order)
+            await holder.commit()
+
+        with pytest.raises(HTTPException) as error:
+            await waiter
+        assert error.value.status_code == 409
+
+    asyncio.run(scenario())
+
+
+def test_order_products_history(database):
+    async def scenario():
+        sessionmaker = make_sessionmaker(database)
+        async with sessionmaker() as session:
+            variation_id = await create_variation(session, quantity=10)
+            user_id = await create_user(session, variation_id)
+
+        order = await checkout(sessionmaker, user_id)
+
+        async with sessionmaker() as session:
+            user = await session.get(User, user_id)
+            page = await OrderService(session).get_order_products_history(
+                user, KeysetPagination(cursor=None, limit=10)
+            )
+
+        assert [item.order_id for item in page.items] == [order.id]
+        assert page.items[0].product_variation.id == variation_id
+        assert page.next_cursor is None
+
+    asyncio.run(scenario())
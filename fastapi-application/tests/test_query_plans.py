@@ -0,0 +1,38 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from benchmarks.query_plans import (
+    CHECKS,
+    MIN_INDEXED_PAGES,
+    analyze,
+    load_samples,
+    run_check,
+)
+
+
+def test_hot_queries_use_indexes(database, catalog):
+    async def scenario():
+        engine = create_async_engine(database, poolclass=NullPool)
+        sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False)
+        async with sessionmaker() as session:
+            samples = await load_samples(session)
+            await session.rollback()
+            pages = await analyze(session)
+
+            results = []
+            for check in CHECKS:
+                result, _ = await run_check(session, check, samples, pages)
+                results.append(result)
+        await engine.dispose()
+        return pages, results
+
+    pages, results = asyncio.run(scenario())
+
+    # Иначе Seq Scan допустим везде и проверка ничего не проверяет
+    assert pages["products"] >= MIN_INDEXED_PAGES
+    assert pages["product_variations"] >= MIN_INDEXED_PAGES
+    assert {
+        result.name: result.seq_scans for result in results if result.violations
+    } == {}
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from core.authentication.token_cache import AccessTokenCache
+
+
+class MemoryRedis:
+    def __init__(self, failures: int = 0) -> None:
+        self.keys = {}
+        self.failures = failures
+
+    async def set(self, key, value, ex=None):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Redis is down")
+        self.keys[key] = str(value).encode()
+
+    async def mget(self, *keys):
+        return [self.keys.get(key) for key in keys]
+
+
+def make_cache(redis: MemoryRedis, monkeypatch) -> AccessTokenCache:
+    cache = AccessTokenCache(
+        ttl_seconds=60,
+        local_ttl_seconds=15,
+        local_max_size=100,
+        lifetime_seconds=3600,
+    )
+    monkeypatch.setattr(AccessTokenCache, "redis", redis)
+    monkeypatch.setattr(AccessTokenCache, "WRITE_RETRY_DELAY_SECONDS", 0)
+    return cache
+
+
+def test_revocation_is_retried(monkeypatch):
+    redis = MemoryRedis(failures=AccessTokenCache.WRITE_ATTEMPTS - 1)
+    cache = make_cache(redis, monkeypatch)
+
+    async def scenario():
+        await cache.revoke("token", time.time() + 60)
+        assert await cache.is_revoked("token", 1, time.time())
+
+    asyncio.run(scenario())
+
+
+def test_lost_revocation_is_not_reported_as_done(monkeypatch):
+    redis = MemoryRedis(failures=AccessTokenCache.WRITE_ATTEMPTS)
+    cache = make_cache(redis, monkeypatch)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(cache.revoke_user(1))
+
+
+def test_tokens_issued_before_revoke_user_are_rejected(monkeypatch):
+    cache = make_cache(MemoryRedis(), monkeypatch)
+
+    async def scenario():
+        issued_at = time.time()
+        await cache.revoke_user(1)
+
+        # Старый токен с целой секундой iat тоже отклоняется
+        assert await cache.is_revoked("old", 1, int(issued_at))
+        assert await cache.is_revoked("old", 1, issued_at)
+        assert not await cache.is_revoked("new", 1, time.time() + 0.001)
+
+    asyncio.run(scenario())
@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+import update_data_from_1c
+from core.models import db_helper
+from services.driver_1c import Driver1C
+
+
+def test_replay_of_failed_cycle_does_not_call_1c(database, monkeypatch):
+    def request_1c(*args, **kwargs):
+        pytest.fail("Replay requested 1C")
+
+    monkeypatch.setattr(Driver1C, "get_brands", request_1c)
+    monkeypatch.setattr(Driver1C, "get_categories", request_1c)
+    monkeypatch.setattr(Driver1C, "get_products_by_category_list", request_1c)
+
+    async def scenario():
+        # Снимок цикла, упавшего на первом же запросе в 1С
+        snapshot = {"recorded_at": "2026-10-19T00:00:00"}
+        try:
+            return await update_data_from_1c.run_cycle(snapshot, fetch_missing=False)
+        finally:
+            await db_helper.dispose()
+
+    assert asyncio.run(scenario()) is False
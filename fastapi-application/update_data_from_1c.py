@@ -1,86 +1,180 @@
+import argparse
 import asyncio
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from pathlib import Path
 
+import orjson
 from loguru import logger
 
+from core import metrics
+from core.config import settings
+from core.loop_monitor import loop_monitor
 from core.models import db_helper
+from core.request_timing import track
 from services.driver_1c import Driver1C, Saver1C
+from services.snapshots_1c import Snapshot1C, load_snapshot, save_snapshot
 
 
-async def save_brands():
-    brands = Driver1C.parse_brands(Driver1C.get_brands())
+@contextmanager
+def stage(name: str, **fields):
+    # Время этапа, число SQL-запросов и время в БД - полями лога и метриками,
+    # числовые поля - количество строк этапа
+    with track() as timing:
+        yield fields
+
+    logger.bind(stage=name, **fields, **timing.as_dict()).info(
+        f"{name}: {timing.total_ms:.0f} ms, "
+        f"{timing.sql_count} queries {timing.db_ms:.0f} ms"
+    )
+
+    metrics.sync_stage_duration.labels(stage=name).set(timing.total_ms / 1000)
+    metrics.sync_stage_queries.labels(stage=name).set(timing.sql_count)
+    for kind, value in fields.items():
+        if isinstance(value, int):
+            metrics.sync_stage_rows.labels(stage=name, kind=kind).set(value)
+
+
+# Ответы 1С за цикл собираются в snapshot: для записи на диск, а при
+# воспроизведении берутся из него вместо запросов в 1С. Запросы за
+# недостающими разделами - только при fetch_missing.
+
+
+class SnapshotSectionMissing(Exception):
+    pass
+
+
+def check_fetch_allowed(section: str, fetch_missing: bool) -> None:
+    if not fetch_missing:
+        raise SnapshotSectionMissing(
+            f"Snapshot has no {section!r} (the recorded cycle failed before "
+            f"fetching it), use --fetch-missing to request it from 1C"
+        )
+
+
+async def save_brands(
+    snapshot: Snapshot1C | None = None,
+    fetch_missing: bool = True,
+):
+    snapshot = {} if snapshot is None else snapshot
+    if "brands" not in snapshot:
+        check_fetch_allowed("brands", fetch_missing)
+        snapshot["brands"] = Driver1C.get_brands()
+
+    brands = Driver1C.parse_brands(snapshot["brands"])
 
     async with db_helper.session_factory() as session:
         saver = Saver1C(session)
 
-        await saver.save_brands(brands)
+        with stage("save_brands", brands=len(brands)):
+            await saver.save_brands(brands)
+
+async def save_categories(
+    snapshot: Snapshot1C | None = None,
+    fetch_missing: bool = True,
+):
+    snapshot = {} if snapshot is None else snapshot
+    if "categories" not in snapshot:
+        check_fetch_allowed("categories", fetch_missing)
+        snapshot["categories"] = Driver1C.get_categories()
 
-async def save_categories():
-    categories = Driver1C.parse_categories(Driver1C.get_categories())
+    categories = Driver1C.parse_categories(snapshot["categories"])
 
     async with db_helper.session_factory() as session:
         saver = Saver1C(session)
 
-        await saver.save_categories(categories)
+        with stage("save_categories", groups=len(categories)):
+            await saver.save_categories(categories)
 
 
-async def get_parse_products():
+async def get_parse_products(snapshot: Snapshot1C, fetch_missing: bool = True):
     async with db_helper.session_factory() as session:
         saver = Saver1C(session)
 
-        print(datetime.utcnow())
+        with stage("load_maps") as fields:
+            brand_map = await saver.get_brands_map_for_1c()
+            category_map = await saver.get_categories_map_for_1c()
 
-        brand_map = await saver.get_brands_map_for_1c()
-        category_map = await saver.get_categories_map_for_1c()
+            fields["brands"] = len(brand_map)
+            fields["categories"] = len(category_map)
 
-        print(datetime.utcnow())
+        with stage("fetch_products") as fields:
+            if "categories" not in snapshot:
+                check_fetch_allowed("categories", fetch_missing)
+                snapshot["categories"] = Driver1C.get_categories()
+            if "products" not in snapshot:
+                check_fetch_allowed("products", fetch_missing)
+                snapshot["products"] = (
+                    await Driver1C.get_products_by_category_list(
+                        snapshot["categories"]["data"]
+                    )
+                )
 
-        categories = Driver1C.get_categories()
-        products_responses = await Driver1C.get_products_by_category_list(
-            categories["data"]
-        )
+            fields["responses"] = len(snapshot["products"])
 
-        print(datetime.utcnow())
+        with stage("parse_products") as fields:
+            products, errors = [], []
 
-        products = []
+            for response in snapshot["products"].values():
+                products.extend(
+                    Driver1C.parse_products(
+                        response, brand_map, category_map, errors
+                    )
+                )
 
-        for response in products_responses:
-            products.extend(Driver1C.parse_products(response, brand_map, category_map))
+            fields["products"] = len(products)
+            fields["errors"] = len(errors)
 
-        print(datetime.utcnow())
-        logger.info(f'Products count: {len(products)}')
+        write_parse_errors(errors)
 
         return products
 
-async def save_products():
-    products = await get_parse_products()
+
+def write_parse_errors(errors: list[dict]) -> None:
+    # Перезаписывается каждый цикл: в файле ошибки последней выгрузки
+    path = settings.config_1c.parse_errors_path
+    if errors:
+        logger.warning(f"1C products/variations skipped: {len(errors)}, see {path}")
+    if path is None:
+        return
+
+    path.write_bytes(
+        orjson.dumps(
+            {
+                "recorded_at": datetime.utcnow().isoformat(),
+                "count": len(errors),
+                "errors": errors,
+            },
+            option=orjson.OPT_INDENT_2,
+        )
+    )
+
+async def save_products(
+    snapshot: Snapshot1C | None = None,
+    fetch_missing: bool = True,
+):
+    snapshot = {} if snapshot is None else snapshot
+    products = await get_parse_products(snapshot, fetch_missing)
 
     async with db_helper.session_factory() as session:
         saver = Saver1C(session)
 
-        start_time = datetime.utcnow()
-        logger.info(f"start save products: {start_time} | {len(products)}")
-
         properties_ids = []
         chunk_size = 50
 
-        for num, chunk in enumerate(
-            [
-                products[i : i + chunk_size]
-                for i in range(0, len(products), chunk_size)
-            ]
-        ):
-            logger.info(f"chunk: {num} start | {datetime.utcnow()}")
-            properties_ids.extend(await saver.save_products(chunk))
-            logger.info(f"chunk: {num} end | {datetime.utcnow()}")
-
-        end_time = datetime.utcnow()
-        logger.info(f"end save products: {end_time}")
+        with stage("save_products", products=len(products)):
+            for num, chunk in enumerate(
+                [
+                    products[i : i + chunk_size]
+                    for i in range(0, len(products), chunk_size)
+                ]
+            ):
+                logger.debug(f"chunk: {num}")
+                properties_ids.extend(await saver.save_products(chunk))
 
-        await saver.deactivate_old_products(products, properties_ids)
-
-        logger.info(f"start time: {start_time} | end time: {datetime.utcnow()}")
-        print(datetime.utcnow())
+        with stage("deactivate_old_products"):
+            await saver.deactivate_old_products(products, properties_ids)
 
 
 async def delete_products(products):
@@ -90,26 +184,89 @@ async def delete_products(products):
         await saver.delete_old_products(products)
 
 
-async def main():
-    while True:
-        try:
-            await save_brands()
-        except Exception as e:
-            logger.exception(e)
+async def run_cycle(snapshot: Snapshot1C, fetch_missing: bool = True) -> bool:
+    """-> True if every phase succeeded"""
+    failed = False
 
+    for phase in (save_brands, save_categories, save_products):
         try:
-            await save_categories()
+            await phase(snapshot, fetch_missing)
+        except SnapshotSectionMissing as e:
+            failed = True
+            logger.error(f"{phase.__name__} skipped: {e}")
         except Exception as e:
+            failed = True
             logger.exception(e)
 
-        try:
-            await save_products()
-        except Exception as e:
-            logger.exception(e)
+    return not failed
+
+
+async def record(snapshot: Snapshot1C) -> None:
+    config = settings.config_1c
+    try:
+        # Сжатие десятков мегабайт не должно блокировать event loop
+        await asyncio.to_thread(
+            save_snapshot, snapshot, config.snapshot_dir, config.snapshot_keep
+        )
+    except Exception as e:
+        logger.exception(e)
+
+
+async def replay(path: Path, fetch_missing: bool = False) -> bool:
+    """
+    One import cycle from a recorded snapshot. Without fetch_missing there
+    are no requests to 1C: phases whose responses the snapshot lacks are
+    skipped and the replay fails.
+    """
+    snapshot = load_snapshot(path)
+    try:
+        return await run_cycle(snapshot, fetch_missing)
+    finally:
+        await db_helper.dispose()
+
+
+async def main():
+    if settings.loop_monitor.enabled:
+        loop_monitor.start()
+
+    while True:
+        snapshot = {}
+
+        if await run_cycle(snapshot):
+            metrics.sync_last_success.set(time.time())
+        metrics.write_textfile("update_data_from_1c")
+
+        # Неудачный цикл записываем тоже: его и нужно воспроизводить
+        if settings.config_1c.snapshot_dir is not None:
+            await record(snapshot)
+
+        if loop_monitor.running:
+            # Блокировки event loop за один цикл импорта
+            loop_monitor.log_report()
+            loop_monitor.reset()
 
         await asyncio.sleep(60 * 5)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
-
+    parser = argparse.ArgumentParser(description="Import the catalog from 1C")
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        help="Run one cycle from a snapshot file (or the latest in a directory)",
+    )
+    parser.add_argument(
+        "--fetch-missing",
+        action="store_true",
+        help="With --replay, request sections missing from the snapshot from 1C",
+    )
+    args = parser.parse_args()
+
+    if args.fetch_missing and not args.replay:
+        parser.error("--fetch-missing needs --replay")
+
+    if args.replay:
+        if not asyncio.run(replay(args.replay, args.fetch_missing)):
+            raise SystemExit(1)
+    else:
+        asyncio.run(main())
@@ -0,0 +1,74 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and calls
+    are rejected for `reset_timeout` seconds. Then a single trial call is let
+    through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self) -> bool:
+        """-> True if this call is the half-open trial."""
+        state = self.state
+        if state == self.OPEN:
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        if state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                raise CircuitOpenError(f"Circuit '{self.name}' is half-open")
+            self._trial_in_flight = True
+            return True
+        return False
+
+    @contextmanager
+    def call(self) -> Iterator[None]:
+        """
+        Guards one call. The trial slot is released however the call ends,
+        also on cancellation or an error that is not recorded as a failure;
+        otherwise the circuit would stay half-open and reject every call.
+        """
+        trial = self.before_call()
+        try:
+            yield
+        finally:
+            if trial:
+                self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()